@@ -4,15 +4,23 @@ import pandas as pd
 import streamlit as st
 from datetime import datetime
 
-from modules.score import score_leads, assign_lifecycle_stage
+from modules.score import build_feature_matrix, score_with_features, assign_lifecycle_stage
 from modules.dedupe import dedupe_leads
 from modules.export_hubspot import export_for_hubspot
 from modules.utils import normalize_columns
+from modules.schema import apply_schema
+from modules.stream import DedupeIndex, stream_leads, write_hubspot_csv
+from modules.parse_cache import cached_parse, parse_cache
+from modules.stage_cache import fingerprint, stage_cache
+from modules.diskcache import CACHE_DIR, DiskCache, content_key
+from modules.lead_store import LeadStore, campaign_hash
+from modules.jobs import CANCELLED, FAILED, JobCancelled, job_runner
+from modules.extractors import registry
+from modules import metrics
 
-from modules.extract_google import google_search_leads
-from modules.extract_event import parse_event_file
-from modules.extract_crm import parse_crm_export
-from modules.extract_indiamart_local import parse_indiamart_files
+# Extractor modules (pdfplumber, lxml, requests, ...) are imported the first time their tab is used
+EXTRACTORS = registry()
+BUILTIN_TABS = ["table", "google", "event", "crm", "indiamart"]
 
 st.set_page_config(page_title="EPS LeadGen (Extractors v2)", page_icon="🧲")
 
@@ -42,34 +50,260 @@ product_needs = st.sidebar.multiselect(
     default=["Vacuum Systems","Evaporation","Condensation","Distillation","Scrubbing"]
 )
 min_score = st.sidebar.slider("Minimum score to keep", 0, 100, 65)
+fuzzy_dedupe = st.sidebar.checkbox("Merge near-duplicate companies", value=False,
+                                   help="Clusters rows sharing a website domain, phone, email or a near-identical company name")
+enrich_websites = st.sidebar.checkbox("Enrich URL-only leads from their websites", value=False,
+                                      help="Crawls homepage and contact/about pages to fill missing company, email, phone and location")
+persist_leads = st.sidebar.checkbox("Merge into the local lead store", value=False,
+                                    help="Upserts each processed batch into the lead store, matched on email, domain, phone and company")
 lead_source = st.sidebar.selectbox("Lead Source", ["Indiamart", "Event", "Referral", "Inbound", "Outbound List", "Other"], index=0)
 
-tabs = st.tabs(["Upload CSV", "Google Search", "Event List", "CRM Export", "IndiaMART (No API)"])
+with st.sidebar.expander("Parse cache"):
+    # Uploads are parsed once per content + extractor version; reruns read the cached frame
+    info = parse_cache().info()
+    st.caption(f"{info['memory_hits']} memory hits, {info['disk_hits']} disk hits, {info['misses']} misses · "
+               f"{info['disk_entries']} files, {info['disk_bytes'] / 1e6:.1f} MB on disk")
+    if st.button("Clear parse cache"):
+        parse_cache().clear()
+        DiskCache("event_pdf").clear()
+        st.rerun()
+
+with st.sidebar.expander("Stage cache"):
+    # Normalize/dedupe/score results per input + parameters; threshold and lead-source changes reuse them
+    info = stage_cache().info()
+    st.caption(f"{info['hits']} hits, {info['misses']} misses, {info['evictions']} evicted · "
+               f"{info['entries']} results, {info['bytes'] / 1e6:.1f} MB")
+    if st.button("Clear stage cache"):
+        stage_cache().clear()
+        st.rerun()
+
+# Stage timings for this rerun, shown in the Performance panel at the bottom of the page. The collector is
+# bound to this session's script thread only; background jobs and other sessions never record into it.
+perf = metrics.Metrics()
+metrics.activate(perf)
+
+if EXTRACTORS.errors:
+    with st.sidebar.expander("Extractor plugins"):
+        for err in EXTRACTORS.errors:
+            st.caption(f"Not loaded: {err}")
+
+with st.sidebar.expander("Background jobs"):
+    # Searches, PDF parses, rescoring and HubSpot syncs run off the script thread; finished results are kept
+    recent = job_runner().jobs()[-8:]
+    if not recent:
+        st.caption("No jobs yet.")
+    for job in reversed(recent):
+        snap = job.snapshot()
+        total = f"/{snap['total']}" if snap["total"] else ""
+        st.caption(f"{snap['label'] or snap['kind']}: {snap['status']} · {snap['done']}{total} · {snap['elapsed_s']}s")
+
+tab_names = [ext.name for ext in EXTRACTORS] + ["lead_store"]
+tabs = dict(zip(tab_names, st.tabs([ext.label for ext in EXTRACTORS] + ["Lead Store"])))
+
+@st.cache_resource
+def lead_store() -> LeadStore:
+    return LeadStore()
+
+def parse_upload(parser, files, label: str) -> pd.DataFrame:
+    misses = parse_cache().stats["misses"]
+    with metrics.stage(f"parse:{label}") as rec:
+        df = rec["rows_out"] = cached_parse(parser, files)
+        rec["cache"] = "miss" if parse_cache().stats["misses"] > misses else "hit"
+    return df
+
+def cached_stage(name: str, input_key: str, fn, rows_in=None, served=None, **params):
+    # One pipeline stage through the stage cache, keyed by its input and only the parameters it reads;
+    # the metrics record says whether it was served from cache. Returns (result, key for the next stage).
+    with metrics.stage(name, rows_in, **params) as rec:
+        value, key, hit = stage_cache().run(name, input_key, fn, **params)
+        rec["cache"] = "hit" if hit else "miss"
+        rec["rows_out"] = value if isinstance(value, pd.DataFrame) else None
+    if hit and served is not None:
+        served.append(name)
+    return value, key
+
+JOB_POLL_S = 1.0
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+@fragment(run_every=JOB_POLL_S)
+def job_progress(key: str):
+    # Polls a running job without rerunning the page; the whole page reruns once it has finished
+    job = job_runner().get(key)
+    if job is None or not job.active:
+        st.rerun()
+    snap = job.snapshot()
+    share = min(snap["done"] / snap["total"], 1.0) if snap["total"] else 0.0
+    total = f"/{snap['total']}" if snap["total"] else ""
+    st.progress(share, text=f"{snap['label']}: {snap['status']} {snap['message']} · {snap['done']}{total} · "
+                            f"{snap['partial_rows']} rows so far · {snap['elapsed_s']}s")
+    partial = job.partial()
+    if partial is not None:
+        st.dataframe(partial.tail(20))
+    if st.button("Cancel", key=f"cancel:{key}"):
+        job.cancel()
+
+def background_job(slot: str, submit=None, force: bool = False):
+    # The job shown in this page slot; submit=(kind, key, fn, label) starts it, or re-attaches to the job
+    # already running or recently finished under that key (force=True runs it again regardless).
+    # Returns the finished job, or None while it still runs.
+    runner = job_runner()
+    if submit is not None:
+        kind, key, fn, label = submit
+        runner.submit(kind, key, fn, label=label, force=force)
+        st.session_state[f"job:{slot}"] = key
+    job = runner.get(st.session_state.get(f"job:{slot}"))
+    if job is None:
+        return None
+    if job.active:
+        job_progress(job.key)
+        return None
+    if job.status in (FAILED, CANCELLED):
+        kept = f" · continuing with the {len(job.result)} rows extracted before it stopped" \
+            if isinstance(job.result, pd.DataFrame) else ""
+        st.warning(f"{job.label} {job.status}{': ' + job.error if job.error else ''}{kept}")
+    return job
+
+def google_job(queries, cse_key, cse_id, site_indiamart, max_results):
+    def run(job):
+        google = EXTRACTORS["google"]
+        if cse_key and cse_id:
+            # All queries and pages fetched concurrently; repeated searches come from the on-disk cache
+            job.progress(0, 1, "searching")
+            df = google.module().google_search_batch(queries, cse_key, cse_id, site_indiamart=site_indiamart,
+                                                     max_results=max_results)
+            errors = df.attrs.get("search_errors")
+            if errors:
+                # Failed, so the incomplete result is not served for the next day; its pages are cached,
+                # so "Search again" only refetches what failed
+                job.emit(df)
+                raise RuntimeError(f"{len(errors)} result pages failed, e.g. {errors[0]}")
+            return df
+        frames = []
+        for i, q in enumerate(queries):
+            frames.append(google.load()(q, site_indiamart=site_indiamart, max_results=max_results))
+            job.emit(frames[-1])
+            job.progress(i + 1, len(queries), q)
+        return pd.concat(frames, ignore_index=True) if frames else None
+    return run
+
+def event_pdf_job(data: bytes):
+    def run(job):
+        event = EXTRACTORS["event"].module()
+        def progress(done, total, rows):
+            job.emit(pd.DataFrame(rows, columns=event.COLUMNS))
+            job.progress(done, total, "pages")
+        return event.parse_event_pdf(data, progress=progress)
+    return run
+
+def rescore_job(store: LeadStore, campaign: dict):
+    def run(job):
+        return {"rescored": store.rescore(progress=lambda n: job.progress(n, message="leads rescored"), **campaign)}
+    return run
+
+def hubspot_sync_job(hs: pd.DataFrame, key: str):
+    # Journaled per export content, so a cancelled or failed sync resumes where it stopped
+    def run(job):
+        from modules.sync_hubspot import sync_dataframe_to_hubspot_batch
+        from modules.hubspot_cache import HubSpotCache
+        os.makedirs(os.path.join(CACHE_DIR, "sync"), exist_ok=True)
+        cache = HubSpotCache()
+        try:
+            res = sync_dataframe_to_hubspot_batch(hs, cache=cache, journal_path=os.path.join(CACHE_DIR, "sync", f"{key}.jsonl"),
+                                                  resume=True, concurrency=4,
+                                                  progress=lambda done, total: job.progress(done, total, "rows", check=False),
+                                                  should_stop=lambda: job.cancelled)
+        finally:
+            cache.close()
+        res.pop("batches", None)
+        if res["stopped"]:
+            raise JobCancelled(res)
+        return res
+    return run
+
+def sync_panel(hs: pd.DataFrame, source_label: str):
+    if hs is None or hs.empty or not os.getenv("HUBSPOT_PRIVATE_APP_TOKEN"):
+        return
+    key = content_key("hubspot_sync", fingerprint(hs))
+    # A sync that ended with failed rows is not kept, so syncing again retries just those (the journal skips
+    # the rest); "Run again" also re-checks a clean one against HubSpot
+    previous = job_runner().get(key)
+    again = previous is not None and not previous.active and \
+        st.button("Run sync again", key=f"sync_again:{source_label}")
+    start = st.button("Sync to HubSpot", key=f"sync_button:{source_label}") or again
+    job = background_job(f"sync:{source_label}", ("hubspot_sync", key, hubspot_sync_job(hs, key),
+                                                  f"HubSpot sync ({source_label})") if start else None, force=again)
+    if job is not None and isinstance(job.result, dict):
+        res = job.result
+        st.caption(f"HubSpot: {res['contacts_synced']} synced, {res['unchanged']} unchanged, {res['skipped']} already "
+                   f"synced, {res['failed']} failed")
+        for err in res["errors"][:5]:
+            st.caption(f"  {err}")
 
 def process_and_display(df: pd.DataFrame, source_label: str):
     if df is None or df.empty:
         st.warning("No rows found from this extractor.")
         return None, None, None
-    df = normalize_columns(df)
+    served = []
+    campaign = {"industry_focus": industry_focus, "regions": regions, "product_needs": product_needs}
+    raw = df
+    df, key = cached_stage("normalize", fingerprint(raw), lambda: apply_schema(normalize_columns(raw)), raw, served)
     st.subheader(f"Preview from {source_label}")
     st.dataframe(df.head(20))
 
-    df = dedupe_leads(df)
-    df_scored = score_leads(df, industry_focus=industry_focus, regions=regions, product_needs=product_needs)
-    df_scored = assign_lifecycle_stage(df_scored)
+    if enrich_websites:
+        def enrich(frame=df):
+            from modules.enrich import enrich_leads
+            with st.spinner("Crawling lead websites..."):
+                return enrich_leads(frame)
+        df, key = cached_stage("enrich", key, enrich, df, served)
+        stats = df.attrs.get("enrich_stats")
+        if stats:
+            st.caption(f"Enrichment: {stats['sites']} sites, {stats['fetched']} pages fetched, "
+                       f"{stats['cached']} from cache, {stats['failed']} failed")
+    normalized = df
+    df, key = cached_stage("dedupe", key, lambda: dedupe_leads(normalized, fuzzy=fuzzy_dedupe), normalized, served,
+                           fuzzy=fuzzy_dedupe)
+    deduped = df
+    if persist_leads:
+        # A write, so never served from the stage cache; merge itself skips rows whose row_hash is unchanged
+        with metrics.stage("lead_store_merge", deduped, **campaign) as rec:
+            stats = lead_store().merge(deduped, **campaign)
+            rec["rows_out"] = stats["inserted"] + stats["updated"]
+        st.caption(f"Lead store: {stats['inserted']} new, {stats['updated']} updated, {stats['unchanged']} unchanged")
+    features, _ = cached_stage("features", key, lambda: build_feature_matrix(deduped), deduped, served)
+    df_scored, _ = cached_stage("score", key, lambda: assign_lifecycle_stage(score_with_features(deduped, features, **campaign)),
+                                deduped, served, **campaign)
 
     st.subheader("Scored + Lifecycle")
     st.dataframe(df_scored.head(20))
-    keep = df_scored[df_scored["lead_score"] >= min_score].copy()
+    if served:
+        st.caption(f"Served from stage cache: {', '.join(served)}")
+    with metrics.stage("filter", df_scored) as rec:
+        keep = rec["rows_out"] = df_scored[df_scored["lead_score"] >= min_score]
     st.metric("Leads above threshold", len(keep))
-    hs = export_for_hubspot(keep, lead_source=lead_source)
+    with metrics.stage("export", keep) as rec:
+        hs = rec["rows_out"] = export_for_hubspot(keep, lead_source=lead_source)
+    sync_panel(hs, source_label)
     return df, df_scored, hs
 
 # Upload CSV
-with tabs[0]:
-    up = st.file_uploader("Upload leads CSV", type=["csv"])
-    if up:
-        df = pd.read_csv(up)
+with tabs["table"]:
+    up = st.file_uploader("Upload leads CSV or spreadsheet", type=list(EXTRACTORS["table"].file_types))
+    stream_mode = st.checkbox("Stream large file (bounded memory)", value=False,
+                              help="Processes the upload in chunks straight to the HubSpot CSV; no previews")
+    if up and stream_mode:
+        out = io.StringIO()
+        index = DedupeIndex()
+        with metrics.stage("stream") as rec:
+            n = rec["rows_out"] = write_hubspot_csv(stream_leads(up, industry_focus, regions, product_needs, min_score=min_score,
+                                                                 lead_source=lead_source, index=index), out)
+        st.metric("Leads above threshold", n)
+        st.caption(f"{index.rows_seen} rows read, {len(index)} unique company/email keys")
+        st.download_button("⬇️ HubSpot-ready CSV", out.getvalue().encode("utf-8"),
+                           file_name=f"hubspot_import_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+                           mime="text/csv")
+    elif up:
+        df = parse_upload(EXTRACTORS["table"].load(), up, "csv")
         raw, scored, hs = process_and_display(df, "CSV Upload")
         if hs is not None:
             st.download_button("⬇️ HubSpot-ready CSV", hs.to_csv(index=False).encode("utf-8"),
@@ -77,34 +311,102 @@ with tabs[0]:
                                mime="text/csv")
 
 # Google Search
-with tabs[1]:
-    query = st.text_input("Query", "evaporator manufacturer site:.in")
+with tabs["google"]:
+    query = st.text_area("Queries (one per line)", "evaporator manufacturer site:.in")
     site_filter_im = st.checkbox("Restrict to IndiaMART (site:indiamart.com)", value=False)
     cse_key = st.text_input("CSE API Key (optional)", type="password")
     cse_id = st.text_input("CSE ID (optional)")
     max_results = st.number_input("Max results", 1, 50, 20)
-    if st.button("Run Google Search"):
-        df = google_search_leads(query, cse_key=cse_key or None, cse_id=cse_id or None,
-                                 site_indiamart=site_filter_im, max_results=int(max_results))
-        process_and_display(df, "Google Search")
+    submit = None
+    run, again = st.button("Run Google Search"), st.button("Search again", help="Ignore the finished search for "
+                                                                               "these queries and run it anew")
+    if run or again:
+        # The same search again re-attaches to the running or finished (within a day) job instead of starting over
+        queries = [q for q in query.splitlines() if q.strip()]
+        key = content_key("google_search", queries, site_filter_im, int(max_results), cse_key, cse_id)
+        submit = ("google_search", key, google_job(queries, cse_key, cse_id, site_filter_im, int(max_results)),
+                  f"Google search ({len(queries)} queries)")
+    job = background_job("google", submit, force=again)
+    if job is not None:
+        process_and_display(job.result, "Google Search")
 
 # Event List
-with tabs[2]:
-    ev = st.file_uploader("Event file", type=["xlsx","xls","csv","pdf"])
-    if ev:
-        df = parse_event_file(ev)
+with tabs["event"]:
+    ev = st.file_uploader("Event file", type=list(EXTRACTORS["event"].file_types))
+    if ev and ev.name.lower().endswith(".pdf"):
+        # Large PDFs take minutes: parsed in the background, pages cached as they finish so a resume is cheap
+        key = content_key("event_pdf", parse_cache().key(EXTRACTORS["event"].load(), ev))
+        job = job_runner().get(key)
+        resume = job is not None and job.status in (FAILED, CANCELLED) and st.button("Resume PDF parsing")
+        start = resume or job is None or st.session_state.get("job:event") != key
+        job = background_job("event", ("event_pdf", key, event_pdf_job(ev.getvalue()), ev.name) if start else None)
+        if job is not None:
+            process_and_display(job.result, "Event List")
+    elif ev:
+        df = parse_upload(EXTRACTORS["event"].load(), ev, "event")
         process_and_display(df, "Event List")
 
 # CRM Export
-with tabs[3]:
-    crm = st.file_uploader("CRM export file", type=["xlsx","xls","csv"])
+with tabs["crm"]:
+    crm = st.file_uploader("CRM export file", type=list(EXTRACTORS["crm"].file_types))
     if crm:
-        df = parse_crm_export(crm)
+        df = parse_upload(EXTRACTORS["crm"].load(), crm, "crm")
         process_and_display(df, "CRM Export")
 
 # IndiaMART (No API)
-with tabs[4]:
-    files = st.file_uploader("Upload IndiaMART files (HTML/CSV/XLS/XLSX)", type=["html","htm","csv","xls","xlsx"], accept_multiple_files=True)
+with tabs["indiamart"]:
+    files = st.file_uploader("Upload IndiaMART files (HTML/CSV/XLS/XLSX)", type=list(EXTRACTORS["indiamart"].file_types),
+                             accept_multiple_files=True)
     if files:
-        df = parse_indiamart_files(files)
+        df = parse_upload(EXTRACTORS["indiamart"].load(), files, "indiamart")
         process_and_display(df, "IndiaMART (No API)")
+
+# Extractors from installed plugins: a generic upload tab each
+for ext in EXTRACTORS:
+    if ext.name in BUILTIN_TABS:
+        continue
+    with tabs[ext.name]:
+        if ext.description:
+            st.caption(ext.description)
+        if not ext.file_types:
+            st.caption("This source takes no file uploads.")
+            continue
+        up = st.file_uploader(f"{ext.label} file{'s' if ext.multiple else ''}", type=list(ext.file_types),
+                              accept_multiple_files=ext.multiple, key=f"upload:{ext.name}")
+        if up:
+            process_and_display(parse_upload(ext.load(), up, ext.name), ext.label)
+
+# Lead Store
+with tabs["lead_store"]:
+    store = lead_store()
+    st.caption(f"{len(store)} leads stored")
+    q_min = st.slider("Minimum score", 0, 100, min_score, key="store_min_score")
+    q_stages = st.multiselect("Lifecycle stage", ["salesqualifiedlead", "marketingqualifiedlead", "lead"])
+    q_regions = st.multiselect("Region / state / country", regions)
+    submit = None
+    if st.button("Rescore with current campaign settings"):
+        campaign = {"industry_focus": industry_focus, "regions": regions, "product_needs": product_needs}
+        # Only leads scored under other settings are touched, so every click runs a new (cheap) job; results
+        # are not persisted (jobs.RESULT_TTL), so a key per campaign is all that is stored
+        key = content_key("rescore", campaign_hash(**campaign))
+        submit = ("rescore", key, rescore_job(store, campaign), "Lead store rescore")
+    job = background_job("rescore", submit, force=submit is not None)
+    if job is not None and isinstance(job.result, dict):
+        st.caption(f"{job.result['rescored']} leads rescored")
+    st.dataframe(store.query(q_min, regions=q_regions, stages=q_stages, limit=200))
+    if st.button("Prepare CSV of all matching leads"):
+        out = io.StringIO()
+        for i, chunk in enumerate(store.iter_query(q_min, regions=q_regions, stages=q_stages)):
+            chunk.to_csv(out, header=i == 0, index=False)
+        st.download_button("⬇️ Lead store CSV", out.getvalue().encode("utf-8"),
+                           file_name=f"lead_store_{datetime.now().strftime('%Y%m%d_%H%M')}.csv", mime="text/csv")
+
+metrics.activate(None)
+with st.expander("Performance"):
+    summary = perf.summary()
+    if summary.empty:
+        st.caption("No pipeline stages ran on this rerun.")
+    else:
+        st.caption(f"{summary['total_s'].sum():.2f}s across {len(perf.records)} recorded stages and calls; "
+                   "ratio is rows out / rows in (dedupe ratio on the dedupe row)")
+        st.dataframe(summary, hide_index=True)
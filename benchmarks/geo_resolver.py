@@ -0,0 +1,94 @@
+import re
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from modules.score import REGION_HINTS, REGION_RESOLVER
+from benchmarks.synthetic import generate_leads
+
+MIN_ACCURACY = 1.0
+# (country, state, city, email, website, expected regions separated by "|", "" for none)
+LABELLED = [
+    ("India", "Gujarat", "Ankleshwar", "sales@acme.in", "https://acme.in", "India"),
+    (None, None, None, "info@acmechem.com", "https://www.acmechem.com", ""),
+    (None, None, None, "contact@infotech.com", "http://infotech.com", ""),
+    (None, None, None, "sales@coolpumps.com", "https://coolpumps.com", ""),
+    (None, None, None, None, "https://www.acme.co.in/contact", "India"),
+    (None, None, None, "a@acme.com.co", None, "South America"),
+    (None, None, None, None, "https://acme.co", "South America"),
+    ("Romania", None, "Bucharest", None, None, ""),
+    ("Oman", None, "Muscat", None, None, "Middle East"),
+    (None, None, "Indiana", None, "https://acme.us", "North America"),
+    ("United States", "Texas", "Houston", None, None, "North America"),
+    (None, "Maharashtra", "Thane", None, None, "India"),
+    (None, None, "Navi Mumbai", None, None, "India"),
+    ("UAE", None, "Jebel Ali", "x@gmail.com", None, "Middle East"),
+    (None, None, "Abu Dhabi", None, None, "Middle East"),
+    ("Saudi Arabia", "Eastern Province", "Jubail", None, "https://acme.com.sa", "Middle East"),
+    ("Peru", None, "Lima", None, None, "South America"),
+    (None, None, "Perugia", None, None, ""),
+    ("Italy", "Lombardy", "Milano", None, "https://acme.it", "Italy"),
+    ("Bulgaria", None, "Sofia", None, "https://acme.bg", "Bulgaria"),
+    ("Germany", None, "Hamburg", "info@acme.de", None, "Europe"),
+    ("UK", None, "London", None, "https://acme.co.uk", "Europe"),
+    (None, None, None, "ops@acme.co.uk", None, "Europe"),
+    ("Vietnam", None, "Ho Chi Minh", None, None, "SE Asia"),
+    (None, None, "Kuala Lumpur", None, "https://acme.com.my", "SE Asia"),
+    (None, None, None, None, "https://petrochem-solutions.com", ""),
+    (None, None, None, "sales@bharatpumps.com", None, ""),
+    ("India", None, "Pune", None, "https://acme.ae", "India|Middle East"),
+    ("Canada", "Ontario", "Toronto", None, "https://acme.ca", "North America"),
+    ("Mexico", None, "Monterrey", None, "https://acme.com.mx", "North America"),
+    (None, None, None, "x@cloud.chem.com", "https://www.itsolutions.com", ""),
+    ("Brasil", "Sao Paulo", "Campinas", None, None, "South America"),
+    (None, None, "Bangkok", None, "https://acme.co.th", "SE Asia"),
+    ("India", "Telangana", "Hyderabad", "a@acme.org.in", None, "India"),
+    ("Spain", None, "Barcelona", None, None, "Europe"),
+    ("Poland", None, "Warsaw", None, "https://acme.pl", "Europe"),
+]
+
+def legacy_region_hits(df: pd.DataFrame) -> np.ndarray:
+    # The substring scan score.py used before: every hint as a regex over concatenated location/contact text
+    text = lambda c: df[c].astype(object).where(df[c].notna(), "").astype(str).str.lower() if c in df.columns else ""
+    hay = text("country") + " " + text("state") + " " + text("city") + " " + text("email") + " " + text("website")
+    return np.column_stack([hay.str.contains("|".join(re.escape(h) for h in hints)).to_numpy(dtype=bool)
+                            for hints in REGION_HINTS.values()])
+
+def labelled_frame() -> pd.DataFrame:
+    return pd.DataFrame(LABELLED, columns=["country", "state", "city", "email", "website", "expected"])
+
+def accuracy(hits: np.ndarray, expected: pd.Series) -> tuple:
+    # Share of rows whose region set is exactly right, and the rows that are not
+    regions = list(REGION_HINTS)
+    got = ["|".join(r for r, h in zip(regions, row) if h) for row in hits]
+    want = ["|".join(r for r in regions if r in e.split("|")) for e in expected]
+    wrong = [(i, w, g) for i, (w, g) in enumerate(zip(want, got)) if w != g]
+    return 1 - len(wrong) / len(want), wrong
+
+def _timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t
+
+def run(rows: int) -> dict:
+    labelled = labelled_frame()
+    legacy_acc, _ = accuracy(legacy_region_hits(labelled), labelled["expected"])
+    acc, wrong = accuracy(REGION_RESOLVER.hits(labelled), labelled["expected"])
+    df = generate_leads(rows)
+    _, t_legacy = _timed(lambda: legacy_region_hits(df))
+    _, t_resolver = _timed(lambda: REGION_RESOLVER.hits(df))
+    return {"rows": rows, "legacy_s": round(t_legacy, 3), "resolver_s": round(t_resolver, 3),
+            "speedup": round(t_legacy / max(t_resolver, 1e-9), 1), "labelled": len(labelled),
+            "legacy_accuracy": round(legacy_acc, 3), "resolver_accuracy": round(acc, 3), "wrong": wrong}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare the indexed region resolver with the old substring scan "
+                                                 "on a labelled fixture set and on synthetic leads.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    res = run(args.rows)
+    print(res)
+    if res["resolver_accuracy"] < MIN_ACCURACY:
+        sys.exit(f"resolver accuracy {res['resolver_accuracy']} < {MIN_ACCURACY}")
@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+from modules.extractors import BUILTIN
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["pdfplumber", "pdfminer", "lxml", "bs4", "requests", "openpyxl"]
+# What app.py imported at startup before the registry: every extractor module, plus website enrichment
+EAGER_EXTRA = [ext.module_name for ext in BUILTIN] + ["modules.enrich"]
+
+# Runs in a fresh interpreter: app.py's top-level import statements (plus any extra modules), timed
+PROBE = """
+import ast, sys, time, json, importlib
+t = time.perf_counter()
+import streamlit
+t_streamlit = time.perf_counter() - t
+tree = ast.parse(open("app.py").read())
+body = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+exec(compile(ast.Module(body=body, type_ignores=[]), "app.py", "exec"), {})
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - t
+print(json.dumps({"total_s": elapsed, "streamlit_s": t_streamlit, "modules": len(sys.modules),
+                  "heavy": sorted(m for m in %r if m in sys.modules)}))
+""" % (HEAVY,)
+
+def probe(extra=()) -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE, *extra], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def measure(extra=(), repeat: int = 5) -> dict:
+    runs = [probe(extra) for _ in range(repeat)]
+    return {"median_s": round(statistics.median(r["total_s"] for r in runs), 3),
+            "app_only_s": round(statistics.median(r["total_s"] - r["streamlit_s"] for r in runs), 3),
+            "modules": runs[-1]["modules"], "heavy": runs[-1]["heavy"]}
+
+def run(repeat: int = 5) -> dict:
+    probe()  # warm the OS file cache and bytecode, so neither side pays for it
+    lazy, eager = measure((), repeat), measure(EAGER_EXTRA, repeat)
+    return {"eager": eager, "lazy": lazy,
+            "saved_s": round(eager["median_s"] - lazy["median_s"], 3),
+            "app_speedup": round(eager["app_only_s"] / max(lazy["app_only_s"], 1e-9), 1)}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Cold-start import time of app.py with lazily loaded extractors "
+                                                 "versus importing every extractor up front (fresh interpreter per run).")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    res = run(args.repeat)
+    for name in ["eager", "lazy"]:
+        print(f"{name:6} {res[name]}")
+    print(f"saved {res['saved_s']}s per cold start; app imports {res['app_speedup']}x faster")
+    if res["lazy"]["heavy"]:
+        sys.exit(f"extractor dependencies imported at startup: {res['lazy']['heavy']}")
@@ -0,0 +1,88 @@
+import io
+import os
+import sys
+import glob
+import time
+import random
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from modules.extract_indiamart_local import _parse_html, parse_indiamart_files
+
+CITIES = [("Ahmedabad", "Gujarat"), ("Vatva, Ahmedabad", "Gujarat"), ("Pune", "Maharashtra"),
+          ("Chennai", "Tamil Nadu"), ("Hyderabad", "Telangana"), ("Vadodara", "Gujarat")]
+PRODUCTS = ["Forced Circulation Evaporator", "Vacuum Dryer", "Shell and Tube Condenser",
+            "Packed Column Scrubber", "Short Path Distillation Unit", "Agitated Nutsche Filter"]
+
+def legacy_parse_html(file_bytes: bytes):
+    # The BeautifulSoup parser this benchmark compares against
+    soup = BeautifulSoup(file_bytes, "lxml")
+    rows = []
+    cards = soup.select("[class*=prod] , [class*=card] , [class*=cmpny] , [class*=supplier]")
+    if not cards:
+        cards = soup.find_all("a")
+    for el in cards:
+        text = el.get_text(" ", strip=True)
+        link = el.get("href") or ""
+        if not text: continue
+        rows.append({"website": link if link and link.startswith("http") else None,
+                     "notes": f"indiamart_html:{text[:140]}"})
+    return pd.DataFrame(rows)
+
+def synthetic_page(seed: int, cards: int = 40) -> bytes:
+    # A saved listing page: site chrome, then nested product cards with supplier blocks
+    rnd = random.Random(seed)
+    body = []
+    for i in range(cards):
+        city, state = rnd.choice(CITIES)
+        body.append(f"""
+        <div class="card prd-card"><div class="card-body">
+          <div class="prod-img"><img src="/img/{seed}-{i}.jpg"></div>
+          <h3 class="prd-name"><a href="https://www.indiamart.com/proddetail/{seed}{i}.html">{rnd.choice(PRODUCTS)}</a></h3>
+          <span class="prc">Rs {rnd.randint(1, 90)} Lakh</span>
+          <div class="supplier-card"><a class="companyname" href="https://www.indiamart.com/co{seed}x{i}/">Co {seed}-{i} Engineering Pvt Ltd</a>
+            <div class="newLocationUi"><span>{city}, {state}</span></div>
+            <span class="pns_h">0{rnd.randint(7000000000, 9999999999)}</span></div>
+        </div></div>""")
+    nav = "".join(f'<li class="cat-card-link"><a href="/cat/{k}">Category {k}</a></li>' for k in range(60))
+    return f"""<html><head><title>Listing {seed}</title><script>var x = {list(range(200))};</script></head>
+    <body><header><ul class="nav">{nav}</ul></header><main class="prd-listing-wrap">{''.join(body)}</main>
+    <footer><a href="https://www.indiamart.com/">IndiaMART</a></footer></body></html>""".encode("utf-8")
+
+def _as_upload(name: str, data: bytes):
+    f = io.BytesIO(data)
+    f.name = name
+    return f
+
+def _timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t
+
+def run(pages, workers: int = None) -> dict:
+    legacy, t_legacy = _timed(lambda: [legacy_parse_html(p) for p in pages])
+    serial, t_serial = _timed(lambda: [_parse_html(p) for p in pages])
+    pooled, t_pool = _timed(lambda: parse_indiamart_files([_as_upload(f"{i}.html", p) for i, p in enumerate(pages)], workers=workers))
+    return {
+        "pages": len(pages),
+        "legacy_s": round(t_legacy, 3), "legacy_rows": sum(len(f) for f in legacy),
+        "lxml_s": round(t_serial, 3), "lxml_rows": sum(len(f) for f in serial),
+        "lxml_pool_s": round(t_pool, 3), "pool_rows": len(pooled),
+        "speedup": round(t_legacy / max(t_pool, 1e-9), 1),
+    }
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the lxml IndiaMART parser against the old BeautifulSoup one.")
+    parser.add_argument("corpus", nargs="?", help="Directory of saved .html/.htm pages (default: synthetic pages)")
+    parser.add_argument("--pages", type=int, default=300, help="Synthetic pages to generate when no corpus is given")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    if args.corpus:
+        paths = sorted(glob.glob(os.path.join(args.corpus, "*.htm*")))
+        if not paths:
+            sys.exit(f"no .html files in {args.corpus}")
+        pages = [open(p, "rb").read() for p in paths]
+    else:
+        pages = [synthetic_page(i) for i in range(args.pages)]
+    print(run(pages, workers=args.workers))
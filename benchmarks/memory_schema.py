@@ -0,0 +1,63 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from modules.schema import apply_schema, memory_bytes
+from modules.dedupe import dedupe_leads
+from modules.score import score_leads, assign_lifecycle_stage
+from modules.export_hubspot import export_for_hubspot
+
+MIN_RATIO = 3.0
+
+def synthetic_leads(n: int, seed: int = 0) -> pd.DataFrame:
+    # Object-dtype frame shaped like extractor output: unique contact fields, repetitive geography
+    rng = np.random.default_rng(seed)
+    i = np.arange(n)
+    pick = lambda values, p_missing=0.0: np.where(rng.random(n) < p_missing, None, rng.choice(np.array(values, dtype=object), n))
+    return pd.DataFrame({
+        "company_name": [f"Company {k % (n // 2 + 1)} Pvt Ltd" for k in i],
+        "contact_name": pick(["Ravi Kumar", "Plant Manager", "Anita Shah", "Purchase Head", "Marco Rossi"], 0.3),
+        "email": [f"contact{k}@company{k % (n // 2 + 1)}.in" for k in i],
+        "phone": [f"+91 98{k:08d}" for k in i],
+        "website": [f"https://www.company{k % (n // 2 + 1)}.in" for k in i],
+        "country": pick(["India", "UAE", "Italy", "Bulgaria", "Brazil", "Vietnam"], 0.2),
+        "state": pick(["Gujarat", "Maharashtra", "Tamil Nadu", "Dubai", "Lombardy", "Sofia"], 0.4),
+        "city": pick(["Ahmedabad", "Pune", "Chennai", "Dubai", "Milan", "Sofia", "Vadodara", "Mumbai"], 0.4),
+        "industry": pick(["Chemicals", "Pharma", "Food & Beverage", "Oil & Gas", "Agrochemicals"], 0.3),
+        "job_title": pick(["Director", "Maintenance Manager", "Procurement", "Owner", "Project Engineer"], 0.5),
+        "notes": pick(["indiamart_html:Forced Circulation Evaporator", "event_pdf:Hall 3 vacuum dryer",
+                       "google:MVR evaporator supplier", "crm: resin plant expansion"], 0.2),
+    })
+
+def _mb(n: int) -> float:
+    return round(n / 1e6, 1)
+
+def run(n: int) -> dict:
+    raw = synthetic_leads(n)
+    t = time.perf_counter()
+    compact = apply_schema(raw)
+    t_schema = time.perf_counter() - t
+    raw_bytes, compact_bytes = memory_bytes(raw), memory_bytes(compact)
+    scored = assign_lifecycle_stage(score_leads(dedupe_leads(compact), ["Chemicals", "Pharma"], ["India"], ["Evaporation"]))
+    export = export_for_hubspot(scored)
+    return {
+        "rows": n,
+        "object_mb": _mb(raw_bytes),
+        "schema_mb": _mb(compact_bytes),
+        "ratio": round(raw_bytes / compact_bytes, 2),
+        "apply_schema_s": round(t_schema, 2),
+        "scored_mb": _mb(memory_bytes(scored)),
+        "object_columns_after_scoring": [c for c in scored.columns if scored[c].dtype == object],
+        "object_columns_in_export": [c for c in export.columns if export[c].dtype == object],
+    }
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Memory of the canonical lead schema vs object-dtype frames.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    result = run(args.rows)
+    print(result)
+    if result["ratio"] < MIN_RATIO or result["object_columns_after_scoring"] or result["object_columns_in_export"]:
+        sys.exit(1)
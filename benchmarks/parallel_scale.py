@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+import pandas as pd
+
+from modules.dedupe import dedupe_leads
+from modules.score import build_feature_matrix
+from benchmarks.synthetic import generate_leads
+
+def _timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t
+
+def _same(a, b) -> bool:
+    try:
+        pd.testing.assert_frame_equal(a, b)
+        return True
+    except AssertionError:
+        return False
+
+def run(rows: int, workers, fuzzy: bool = False) -> dict:
+    # Each operation at workers=1 (in-process, the pre-parallel code path) and at every count in `workers`;
+    # parallel results must equal the serial ones exactly
+    df = generate_leads(rows)
+    ops = {"dedupe": lambda w: dedupe_leads(df, workers=w),
+           "features": lambda w: build_feature_matrix(df, workers=w)}
+    if fuzzy:
+        ops["fuzzy_dedupe"] = lambda w: dedupe_leads(df, fuzzy=True, workers=w)
+    res = {"rows": rows, "cpus": os.cpu_count(), "ops": {}}
+    for name, op in ops.items():
+        serial, t_serial = _timed(lambda: op(1))
+        runs = {}
+        for w in workers:
+            out, t = _timed(lambda: op(w))
+            runs[w] = {"s": round(t, 2), "speedup": round(t_serial / max(t, 1e-9), 2), "identical": _same(serial, out)}
+        res["ops"][name] = {"serial_s": round(t_serial, 2), "workers": runs}
+    return res
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serial versus shared-memory multi-process dedupe and feature "
+                                                 "scoring on synthetic leads, across worker counts.")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--workers", default=None, help="Comma-separated worker counts (default: 2, 4, ... up to the CPU count)")
+    parser.add_argument("--fuzzy", action="store_true", help="Also time fuzzy dedupe (parallel MinHash signatures)")
+    args = parser.parse_args()
+    cpus = os.cpu_count() or 1
+    counts = [int(w) for w in args.workers.split(",")] if args.workers else \
+        [w for w in (2, 4, 8, 16, 32, 64) if w <= max(cpus, 2)]
+    res = run(args.rows, counts, args.fuzzy)
+    print(f"rows={res['rows']} cpus={res['cpus']}")
+    for name, op in res["ops"].items():
+        print(f"{name:13} serial {op['serial_s']}s  " +
+              "  ".join(f"w={w}: {r['s']}s x{r['speedup']}" for w, r in op["workers"].items()))
+    bad = [f"{name} w={w}" for name, op in res["ops"].items() for w, r in op["workers"].items() if not r["identical"]]
+    if bad:
+        sys.exit(f"parallel results differ from serial: {bad}")
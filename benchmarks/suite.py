@@ -0,0 +1,154 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import tracemalloc
+import pandas as pd
+
+from modules import diskcache, metrics
+from modules.utils import normalize_columns
+from modules.schema import apply_schema
+from modules.dedupe import dedupe_leads
+from modules.score import build_feature_matrix, score_leads, score_with_features, assign_lifecycle_stage
+from modules.export_hubspot import export_for_hubspot
+from modules.stream import stream_leads, write_hubspot_csv
+from modules.extract_event import parse_event_pdf
+from modules.extract_indiamart_local import parse_indiamart_files
+from modules.pipeline import DEFAULT_PROFILE, extract_file, run_pipeline
+from benchmarks.synthetic import write_fixtures
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+TOLERANCE = 0.3  # fail when rows/s drops more than 30% below the baseline
+MEMORY_TOLERANCE = 0.5  # ...or the Python allocation peak grows more than 50% (plus MEMORY_SLACK_MB)
+MEMORY_SLACK_MB = 2.0
+FIXTURE_LIMITS = {"xlsx": 20_000, "html": 20_000, "pdf": 2_000}
+CAMPAIGN = {"industry_focus": ["Chemicals", "Pharma", "Food & Beverage"], "regions": ["India", "Middle East", "Italy"],
+            "product_needs": ["Vacuum Systems", "Evaporation", "Distillation"]}
+
+def benchmarks(rows: int, workdir: str, seed: int = 0) -> list:
+    # (name, rows processed, fn). Inputs for each stage are prepared up front so only the stage itself is timed.
+    paths = write_fixtures(os.path.join(workdir, "fixtures"), rows, seed=seed, limits=FIXTURE_LIMITS)
+    raw = pd.read_csv(paths["csv"])
+    normalized = normalize_columns(raw)
+    canonical = apply_schema(normalized)
+    deduped = dedupe_leads(canonical)
+    features = build_feature_matrix(deduped)
+    staged = assign_lifecycle_stage(score_with_features(deduped, features, **CAMPAIGN))
+    fixture_rows = {fmt: min(rows, FIXTURE_LIMITS.get(fmt, rows)) for fmt in paths}
+    pdf_bytes = open(paths["pdf"], "rb").read()
+
+    def pipeline():
+        diskcache.CACHE_DIR = tempfile.mkdtemp(dir=workdir)  # cold event PDF page cache on every run
+        return run_pipeline(os.path.dirname(paths["csv"]), [dict(DEFAULT_PROFILE)], tempfile.mkdtemp(dir=workdir), workers=1)
+
+    def html_upload():
+        f = io.BytesIO(open(paths["html"], "rb").read())
+        f.name = "listing.html"
+        return parse_indiamart_files([f], workers=1)
+
+    return [
+        ("normalize_columns", rows, lambda: normalize_columns(raw)),
+        ("apply_schema", rows, lambda: apply_schema(normalized)),
+        ("dedupe_leads", rows, lambda: dedupe_leads(canonical)),
+        ("dedupe_leads_fuzzy", rows, lambda: dedupe_leads(canonical, fuzzy=True)),
+        ("build_feature_matrix", len(deduped), lambda: build_feature_matrix(deduped)),
+        ("score_leads", len(deduped), lambda: score_leads(deduped, **CAMPAIGN)),
+        ("assign_lifecycle_stage", len(deduped), lambda: assign_lifecycle_stage(staged)),
+        ("export_for_hubspot", len(deduped), lambda: export_for_hubspot(staged)),
+        ("stream_leads_csv", rows, lambda: write_hubspot_csv(stream_leads(paths["csv"], **CAMPAIGN), io.StringIO())),
+        ("extract_csv", fixture_rows["csv"], lambda: extract_file(paths["csv"])),
+        ("extract_xlsx", fixture_rows["xlsx"], lambda: extract_file(paths["xlsx"])),
+        ("extract_indiamart_html", fixture_rows["html"], html_upload),
+        ("extract_event_pdf", fixture_rows["pdf"],
+         lambda: parse_event_pdf(pdf_bytes, workers=1, cache_dir=tempfile.mkdtemp(dir=workdir))),
+        ("pipeline_end_to_end", sum(fixture_rows.values()), pipeline),
+    ]
+
+def measure(name: str, rows: int, fn, repeat: int = 3, memory: bool = True) -> dict:
+    # Best-of-`repeat` wall time; RSS growth from the first run; Python allocation peak from one extra traced run
+    m = metrics.Metrics()
+    for _ in range(repeat):
+        with m.stage(name, rows) as rec:
+            rec["rows_out"] = fn()
+    best = min(r["wall_s"] for r in m.records)
+    res = {"rows": rows, "best_s": round(best, 4), "rows_per_s": round(rows / max(best, 1e-9)),
+           "rss_delta_mb": m.records[0]["peak_rss_delta_mb"]}
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            res["py_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+        finally:
+            tracemalloc.stop()
+    return res
+
+def regressions(results: dict, baseline: dict, tolerance: float = TOLERANCE, memory_tolerance: float = MEMORY_TOLERANCE) -> list:
+    out = []
+    for name, res in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        floor = base["rows_per_s"] * (1 - tolerance)
+        if res["rows_per_s"] < floor:
+            out.append(f"{name}: {res['rows_per_s']} rows/s < {floor:.0f} ({base['rows_per_s']} baseline -{tolerance:.0%})")
+        if "py_peak_mb" in res and "py_peak_mb" in base:
+            ceiling = base["py_peak_mb"] * (1 + memory_tolerance) + MEMORY_SLACK_MB
+            if res["py_peak_mb"] > ceiling:
+                out.append(f"{name}: {res['py_peak_mb']} MB peak > {ceiling:.1f} ({base['py_peak_mb']} baseline +{memory_tolerance:.0%})")
+    return out
+
+def machine() -> dict:
+    return {"python": platform.python_version(), "pandas": pd.__version__, "platform": platform.platform(),
+            "cpus": os.cpu_count()}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Time every pipeline stage and extractor on synthetic fixtures and "
+                                                 "fail on throughput or memory regressions against a baseline.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Generated leads (XLSX/HTML/PDF fixtures are capped)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", action="append", help="Run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run that measures the allocation peak")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        diskcache.CACHE_DIR = os.path.join(workdir, "cache")  # never read or fill the user's caches
+        t = time.perf_counter()
+        suite = benchmarks(args.rows, workdir)
+        print(f"fixtures for {args.rows} rows in {time.perf_counter() - t:.1f}s", file=sys.stderr)
+        results = {}
+        for name, rows, fn in suite:
+            if args.only and not any(o in name for o in args.only):
+                continue
+            results[name] = measure(name, rows, fn, repeat=args.repeat, memory=not args.no_memory)
+            print(f"{name:<24} {results[name]}", file=sys.stderr)
+
+    report = {"rows": args.rows, "machine": machine(), "results": results}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    print(pd.DataFrame(results).T.to_string())
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"baseline -> {args.baseline}")
+        sys.exit(0)
+    if not os.path.exists(args.baseline):
+        print("no baseline; run with --save-baseline to record one")
+        sys.exit(0)
+    baseline = json.load(open(args.baseline, encoding="utf-8"))
+    if baseline.get("rows") != args.rows:
+        sys.exit(f"baseline was recorded at --rows {baseline.get('rows')}; rerun with that size or --save-baseline")
+    if baseline.get("machine", {}).get("cpus") != os.cpu_count():
+        print(f"note: baseline machine differs ({baseline.get('machine')})")
+    failed = regressions(results, baseline, tolerance=args.tolerance)
+    for f in failed:
+        print("REGRESSION " + f)
+    sys.exit(1 if failed else 0)
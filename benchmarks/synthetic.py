@@ -0,0 +1,190 @@
+import os
+import html
+import numpy as np
+import pandas as pd
+
+from modules.score import INDUSTRY_KEYWORDS, PRODUCT_KEYWORDS, REGION_HINTS, CUSTOMER_TYPES, COMPETITORS
+
+# Filler text that matches none of the scoring dictionaries, for rows that should not hit a keyword
+FILLER = ["trading", "supplies", "services", "enterprises", "traders", "works", "industries", "global"]
+FIRST_NAMES = ["Ravi", "Anita", "Suresh", "Priya", "Marco", "Elena", "Ahmed", "Fatima", "Nguyen", "Carlos", "Ivan"]
+LAST_NAMES = ["Kumar", "Shah", "Patel", "Iyer", "Rossi", "Petrova", "Al Mansoori", "Tran", "Silva", "Novak"]
+TITLES = ["Director", "Plant Manager", "Head of Procurement", "Maintenance Manager", "Owner", "Project Engineer",
+          "Sales Executive", "Accountant", "Operations Lead", "Intern"]
+FREE_MAIL = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com"]
+SUFFIXES = ["Pvt Ltd", "Ltd", "LLC", "SpA", "GmbH", "Industries", "Co", ""]
+
+def _places(region: str):
+    # (country, [cities], tld) from the region's hints: the first hint names the country, dotted hints are TLDs
+    hints = REGION_HINTS[region]
+    words = [h for h in hints if not h.startswith(".")]
+    tld = next((h for h in hints if h.startswith(".")), ".com")
+    name = lambda w: w.upper() if len(w) <= 3 else w.title()  # "uae" -> "UAE", "abu dhabi" -> "Abu Dhabi"
+    country = name(words[0])
+    return country, [name(w) for w in words[1:]] or [country], tld
+
+REGION_PLACES = {r: _places(r) for r in REGION_HINTS}
+DEFAULT_REGION_MIX = {"India": 0.45, "Middle East": 0.12, "SE Asia": 0.1, "South America": 0.06, "Italy": 0.05,
+                      "Bulgaria": 0.02, "Europe": 0.08, "North America": 0.07, "Other": 0.05}
+
+def _pick(rng, values, n):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+
+def _blank(rng, values: np.ndarray, p: float) -> np.ndarray:
+    values = values.copy()
+    values[rng.random(len(values)) < p] = None
+    return values
+
+def generate_leads(n: int, seed: int = 0, duplicate_rate: float = 0.2, keyword_rate: float = 0.5,
+                   region_mix: dict = None, free_email_rate: float = 0.15, competitor_rate: float = 0.02,
+                   missing_rate: float = 0.15) -> pd.DataFrame:
+    # Extractor-shaped object frame. `duplicate_rate` of the rows re-state an earlier lead with different
+    # casing/spacing (exact dedupe keys still match); `keyword_rate` of leads carry industry/product
+    # keywords from score.py; locations follow `region_mix` ({region: weight}, "Other" = no region hint).
+    rng = np.random.default_rng(seed)
+    n_unique = max(1, int(round(n * (1 - duplicate_rate))))
+    ids = pd.Series(np.arange(n_unique)).astype(str).to_numpy(dtype=object)
+
+    mix = region_mix or DEFAULT_REGION_MIX
+    names = list(mix)
+    weights = np.asarray([mix[k] for k in names], dtype=float)
+    region = np.asarray(names, dtype=object)[rng.choice(len(names), n_unique, p=weights / weights.sum())]
+    country = np.empty(n_unique, dtype=object)
+    city = np.empty(n_unique, dtype=object)
+    tld = np.full(n_unique, ".com", dtype=object)
+    for r in names:
+        mask = region == r
+        if r not in REGION_PLACES or not mask.any():
+            country[mask], city[mask] = "Atlantis", "Poseidonia"
+            continue
+        c, cities, t = REGION_PLACES[r]
+        country[mask], city[mask], tld[mask] = c, _pick(rng, cities, mask.sum()), t
+
+    hit = rng.random(n_unique) < keyword_rate
+    industries = list(INDUSTRY_KEYWORDS)
+    ind = np.asarray(industries, dtype=object)[rng.integers(0, len(industries), n_unique)]
+    ind_kw = np.array([INDUSTRY_KEYWORDS[k][0] for k in industries], dtype=object)[rng.integers(0, len(industries), n_unique)]
+    products = [kw for kws in PRODUCT_KEYWORDS.values() for kw in kws]
+    prod_kw = _pick(rng, products, n_unique)
+    ctype_kw = _pick(rng, [kws[0] for kws in CUSTOMER_TYPES.values()], n_unique)
+    filler = _pick(rng, FILLER, n_unique)
+    industry = np.where(hit, ind, _pick(rng, ["Trading", "Services", "Retail"], n_unique))
+    notes = np.where(hit, "enquiry for " + prod_kw + " for " + ind_kw + " " + ctype_kw, "general " + filler + " enquiry")
+    competitor = rng.random(n_unique) < competitor_rate
+    notes[competitor] = notes[competitor] + " currently using " + _pick(rng, COMPETITORS, competitor.sum())
+
+    stem = np.where(hit, ind_kw, filler)
+    company = (_pick(rng, ["Shree", "Apex", "Global", "Delta", "Nova", "Prime"], n_unique) + " " + stem + " " + ids
+               + " " + _pick(rng, SUFFIXES, n_unique))
+    domain = "co" + ids + tld
+    first, last = _pick(rng, FIRST_NAMES, n_unique), _pick(rng, LAST_NAMES, n_unique)
+    free = rng.random(n_unique) < free_email_rate
+    email = np.where(free, first + "." + last + ids + "@" + _pick(rng, FREE_MAIL, n_unique), "sales@" + domain)
+    email = pd.Series(email).str.lower().str.replace(" ", "", regex=False).to_numpy(dtype=object)
+    phone = "+" + pd.Series(rng.integers(10**10, 10**11, n_unique)).astype(str).to_numpy(dtype=object)
+
+    df = pd.DataFrame({
+        "company_name": company,
+        "contact_name": _blank(rng, first + " " + last, missing_rate),
+        "email": _blank(rng, email, missing_rate),
+        "phone": _blank(rng, phone, missing_rate),
+        "website": _blank(rng, "https://www." + domain, missing_rate),
+        "country": _blank(rng, country, missing_rate),
+        "state": None,
+        "city": _blank(rng, city, missing_rate * 2),
+        "industry": _blank(rng, industry, missing_rate * 2),
+        "job_title": _blank(rng, _pick(rng, TITLES, n_unique), missing_rate * 2),
+        "notes": notes,
+    })
+    if n > n_unique:
+        dup = df.iloc[rng.integers(0, n_unique, n - n_unique)].copy()
+        dup["company_name"] = dup["company_name"].str.upper() + "  "
+        dup["email"] = dup["email"].str.upper()
+        df = pd.concat([df, dup], ignore_index=True)
+        df = df.iloc[rng.permutation(n)].reset_index(drop=True)
+    return df
+
+def leads_html(df: pd.DataFrame) -> bytes:
+    # A saved IndiaMART listing page (same markup as benchmarks.indiamart_parser.synthetic_page) for these leads
+    cards = []
+    for r in df.fillna("").itertuples(index=False):
+        cards.append(f"""
+        <div class="card prd-card"><div class="card-body">
+          <h3 class="prd-name"><a href="https://www.indiamart.com/proddetail/x.html">{html.escape(r.notes)}</a></h3>
+          <div class="supplier-card"><a class="companyname" href="{html.escape(r.website)}">{html.escape(r.company_name)}</a>
+            <div class="newLocationUi"><span>{html.escape(r.city)}, {html.escape(r.country)}</span></div>
+            <span class="pns_h">{html.escape(r.phone)}</span></div>
+        </div></div>""")
+    return f"""<html><head><title>Listing</title></head><body><main class="prd-listing-wrap">{''.join(cards)}</main>
+    </body></html>""".encode("utf-8")
+
+def _pdf_text(s: str) -> str:
+    return s.encode("latin-1", "replace").decode("latin-1").replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def text_pdf(pages) -> bytes:
+    # Minimal text-only PDF (Helvetica, one string per line) so fixtures need no PDF library
+    objs = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = ["BT /F1 7 Tf 9 TL 30 810 Td"] + [f"({_pdf_text(line)}) Tj T*" for line in lines] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1")
+        objs.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objs.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+                    b"/Contents %d 0 R >>" % len(objs))
+        kids.append(len(objs))
+    objs[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{k} 0 R" for k in kids).encode(), len(kids))
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, body in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return bytes(out)
+
+def leads_pdf(df: pd.DataFrame, lines_per_page: int = 80) -> bytes:
+    # An exhibitor directory: "Company, City, Country  Email: ..  Tel: ..  Web: .." per line
+    lines = []
+    for r in df.fillna("").itertuples(index=False):
+        parts = [f"{r.company_name}, {r.city}, {r.country}".strip(", ")]
+        parts += [f"{label}: {v}" for label, v in [("Email", r.email), ("Tel", r.phone), ("Web", r.website)] if v]
+        lines.append("  ".join(parts))
+    return text_pdf([lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)])
+
+def write_fixtures(out_dir: str, n: int, seed: int = 0, limits: dict = None, **kw) -> dict:
+    # leads.csv, leads.xlsx, listing.html and directory.pdf from one generated frame; `limits` caps the
+    # rows per format (e.g. {"pdf": 2000}) since XLSX and PDF are far slower to write and parse. Returns {format: path}
+    os.makedirs(out_dir, exist_ok=True)
+    df = generate_leads(n, seed=seed, **kw)
+    head = lambda fmt: df.head((limits or {}).get(fmt) or n)
+    paths = {fmt: os.path.join(out_dir, name) for fmt, name in
+             [("csv", "leads.csv"), ("xlsx", "leads.xlsx"), ("html", "listing.html"), ("pdf", "directory.pdf")]}
+    head("csv").to_csv(paths["csv"], index=False)
+    head("xlsx").to_excel(paths["xlsx"], index=False)
+    with open(paths["html"], "wb") as fh:
+        fh.write(leads_html(head("html")))
+    with open(paths["pdf"], "wb") as fh:
+        fh.write(leads_pdf(head("pdf")))
+    return paths
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate synthetic leads (CSV) or a CSV/XLSX/HTML/PDF fixture set.")
+    parser.add_argument("out", help="CSV path, or a directory with --fixtures")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    parser.add_argument("--keyword-rate", type=float, default=0.5)
+    parser.add_argument("--region-mix", help='JSON weights, e.g. {"India": 0.7, "Other": 0.3}')
+    parser.add_argument("--fixtures", action="store_true", help="Write leads.csv/.xlsx, listing.html and directory.pdf into OUT")
+    args = parser.parse_args()
+    kw = {"duplicate_rate": args.duplicate_rate, "keyword_rate": args.keyword_rate}
+    if args.region_mix:
+        import json
+        kw["region_mix"] = json.loads(args.region_mix)
+    if args.fixtures:
+        print(write_fixtures(args.out, args.rows, seed=args.seed, **kw))
+    else:
+        generate_leads(args.rows, seed=args.seed, **kw).to_csv(args.out, index=False)
+        print(f"{args.rows} rows -> {args.out}")
@@ -0,0 +1,78 @@
+import os
+import re
+import json
+import pandas as pd
+
+from modules import metrics
+from modules.score import build_feature_matrix, score_campaigns, score_with_features, assign_lifecycle_stage
+from modules.dedupe import dedupe_leads
+from modules.export_hubspot import export_for_hubspot
+from modules.utils import normalize_columns
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "campaign"
+
+# Profile keys: name, industry_focus, regions, product_needs, min_score, lead_source (optional)
+def load_profiles(path: str) -> list:
+    with open(path, encoding="utf-8") as fh:
+        profiles = json.load(fh)
+    if isinstance(profiles, dict):
+        profiles = profiles.get("profiles", [profiles])
+    for i, p in enumerate(profiles):
+        p.setdefault("name", f"campaign_{i+1}")
+        p.setdefault("min_score", 65)
+    # Names become score columns and export file names, so they must stay distinct after slugging too
+    seen = {}
+    for p in profiles:
+        slug = _slug(p["name"])
+        if slug in seen:
+            raise ValueError(f"{path}: campaign names {seen[slug]!r} and {p['name']!r} collide; give each profile a distinct name")
+        seen[slug] = p["name"]
+    return profiles
+
+def campaign_exports(df: pd.DataFrame, profiles, lead_source: str = "Indiamart", workers: int = None):
+    # Yields (profile, HubSpot-ready frame) for each profile, sharing one feature matrix
+    with metrics.stage("features", df, workers=workers) as rec:
+        features = rec["rows_out"] = build_feature_matrix(df, workers=workers)
+    with metrics.stage("score_campaigns", df, profiles=len(profiles)) as rec:
+        scores, _ = score_campaigns(df, profiles, features=features)
+        rec["rows_out"] = scores
+    for j, p in enumerate(profiles):
+        with metrics.stage(f"score:{p['name']}", df) as rec:
+            keep = scores.iloc[:, j].to_numpy() >= p.get("min_score", 65)
+            scored = score_with_features(df[keep], features[keep], p.get("industry_focus"), p.get("regions"), p.get("product_needs"))
+            scored = rec["rows_out"] = assign_lifecycle_stage(scored)
+        with metrics.stage(f"export:{p['name']}", scored) as rec:
+            hs = rec["rows_out"] = export_for_hubspot(scored, lead_source=p.get("lead_source") or lead_source)
+        yield p, hs
+
+def write_campaign_exports(df: pd.DataFrame, profiles, out_dir: str, lead_source: str = "Indiamart",
+                           workers: int = None) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    for p, hs in campaign_exports(df, profiles, lead_source=lead_source, workers=workers):
+        path = os.path.join(out_dir, f"hubspot_{_slug(p['name'])}.csv")
+        hs.to_csv(path, index=False)
+        written[p["name"]] = (path, len(hs))
+    return written
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Score one lead CSV against several campaign profiles and write a HubSpot CSV per profile.")
+    parser.add_argument("csv_path", help="Path to leads CSV")
+    parser.add_argument("profiles", help="JSON file with a list of {name, industry_focus, regions, product_needs, min_score}")
+    parser.add_argument("--out-dir", default="exports", help="Directory for hubspot_<profile>.csv files")
+    parser.add_argument("--lead-source", default="Indiamart")
+    parser.add_argument("--fuzzy", action="store_true", help="Merge near-duplicate companies before scoring")
+    parser.add_argument("--workers", type=int, default=None, help="Dedupe and scoring processes for large files (default: 1)")
+    parser.add_argument("--metrics", help="Append per-stage timings (JSONL) to this file")
+    args = parser.parse_args()
+    with metrics.collect(args.metrics, run={"csv_path": args.csv_path}):
+        with metrics.stage("read_csv") as rec:
+            df = rec["rows_out"] = normalize_columns(pd.read_csv(args.csv_path))
+        with metrics.stage("dedupe", df, fuzzy=args.fuzzy) as rec:
+            df = rec["rows_out"] = dedupe_leads(df, fuzzy=args.fuzzy, workers=args.workers)
+        written = write_campaign_exports(df, load_profiles(args.profiles), args.out_dir, args.lead_source,
+                                         workers=args.workers)
+    for name, (path, n) in written.items():
+        print(f"{name}: {n} leads -> {path}")
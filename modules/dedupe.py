@@ -1,14 +1,208 @@
 
+import re
+import zlib
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
-def dedupe_leads(df: pd.DataFrame) -> pd.DataFrame:
+from modules.schema import to_text
+from modules.normalize import contact_keys
+from modules.parallel import from_arrow, map_partitions, map_rows, map_tasks, pool_workers, process_pool, read_shared, share, \
+    to_arrow, unlink
+
+LEGAL_SUFFIXES = {
+    "pvt", "private", "ltd", "limited", "llc", "llp", "inc", "incorporated", "corp", "corporation",
+    "co", "company", "plc", "gmbh", "ag", "kg", "srl", "spa", "sa", "sas", "bv", "nv", "oy", "ab",
+    "pte", "sdn", "bhd", "pty", "fze", "fzco", "fzc", "wll", "ood", "ead", "eood", "tbk", "jsc",
+}
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_MISSING = {"", "nan", "none", "null", "<na>"}
+EXACT_COLUMNS = ["company_name", "email", "website"]  # lower-cased by exact dedupe
+POS, RANK = "__dedupe_pos", "__dedupe_rank"  # helper columns of the parallel path
+
+# MinHash/LSH over company-name 3-gram shingles: 16 bands x 4 rows catch pairs above ~0.5 Jaccard
+NUM_PERM, BANDS = 64, 16
+_MERSENNE = (1 << 61) - 1
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, _MERSENNE, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _MERSENNE, NUM_PERM, dtype=np.uint64)
+
+def normalize_company(name) -> str:
+    if str(name).strip().lower() in _MISSING:
+        return ""
+    tokens = _NON_ALNUM.sub(" ", str(name).lower().replace("&", " and ")).split()
+    while tokens and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    key = " ".join(tokens)
+    return "" if key in _MISSING else key
+
+def _shingles(key: str):
+    grams = {key[i:i+3] for i in range(len(key) - 2)} or {key}
+    return [zlib.crc32(g.encode("utf-8")) for g in grams]
+
+def _minhash(keys) -> np.ndarray:
+    # One row of NUM_PERM signatures per key, vectorized over all shingles at once
+    shingles = [_shingles(k) for k in keys]
+    lengths = np.fromiter((len(s) for s in shingles), dtype=np.int64, count=len(shingles))
+    sig = np.empty((len(keys), NUM_PERM), dtype=np.uint64)
+    if not len(keys):
+        return sig
+    flat = np.fromiter((h for s in shingles for h in s), dtype=np.uint64, count=int(lengths.sum()))
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    for j in range(NUM_PERM):
+        sig[:, j] = np.minimum.reduceat((flat * _A[j] + _B[j]) % _MERSENNE, starts)
+    return sig
+
+def _minhash_block(df: pd.DataFrame) -> np.ndarray:
+    return _minhash(df["key"].tolist())
+
+def _propagate(labels: np.ndarray, codes: np.ndarray):
+    # Hook the root of every member of a block (codes >= 0) onto the block's smallest root,
+    # then pointer-jump so each label points straight at its root again
+    m = codes >= 0
+    if not m.any():
+        return
+    roots = labels[m]
+    mins = np.full(codes.max() + 1, len(labels), dtype=labels.dtype)
+    np.minimum.at(mins, codes[m], roots)
+    np.minimum.at(labels, roots, mins[codes[m]])
+    while True:
+        jumped = labels[labels]
+        if (jumped == labels).all():
+            break
+        labels[:] = jumped
+
+def _components(blocks, n: int) -> np.ndarray:
+    labels = np.arange(n)
+    while True:
+        prev = labels.copy()
+        for codes in blocks:
+            _propagate(labels, codes)
+        if (prev == labels).all():
+            return labels
+
+def _key_codes(keys: np.ndarray) -> np.ndarray:
+    codes, _ = pd.factorize(keys)
+    return np.where(keys == "", -1, codes)
+
+def _name_clusters(keys: np.ndarray, threshold: float, workers: int = None) -> np.ndarray:
+    # Cluster label per unique normalized name. Each LSH bucket is checked against its first
+    # member's signature, so buckets never expand into all-pairs comparisons.
+    sig = map_rows(_minhash_block, pd.DataFrame({"key": keys}), NUM_PERM, np.uint64, workers=workers)
+    rows = NUM_PERM // BANDS
+    blocks = []
+    for b in range(BANDS):
+        bucket = np.zeros(len(keys), dtype=np.uint64)
+        for c in range(b*rows, (b+1)*rows):
+            bucket = bucket * np.uint64(1000003) + sig[:, c]
+        codes, _ = pd.factorize(bucket)
+        _, first = np.unique(codes, return_index=True)
+        rep = first[codes]
+        similar = (sig == sig[rep]).mean(axis=1) >= threshold
+        blocks.append(np.where(similar, codes, -1))
+    return _components(blocks, len(keys))
+
+def cluster_leads(df: pd.DataFrame, threshold: float = 0.8, workers: int = None) -> np.ndarray:
+    # Cluster id per row: connected components over shared email, registrable website domain, E.164 phone,
+    # or a near-identical company name after dropping legal suffixes and punctuation. Components span
+    # every key, so only the name signatures are computed across processes; the graph is joined here.
+    col = lambda c: df[c] if c in df.columns else pd.Series("", index=df.index, dtype=object)
+    names = col("company_name").map(normalize_company).to_numpy(dtype=object)
+    keys = contact_keys(df, ["domain_key", "phone_key", "email_key"])
+    name_codes, uniq = pd.factorize(names)
+    name_labels = _name_clusters(np.asarray(uniq, dtype=object), threshold, workers)
+    blocks = [
+        np.where(names == "", -1, name_labels[name_codes]),
+        *(_key_codes(keys[k].to_numpy(dtype=object)) for k in keys.columns),
+    ]
+    return pd.factorize(_components(blocks, len(df)))[0]
+
+def _row_rank(df: pd.DataFrame) -> np.ndarray:
+    # 2 for an email, +1 for a website: the better-ranked row of a duplicate group survives
+    has_email = to_text(df["email"]).str.contains("@").fillna(False).to_numpy(dtype=bool)
+    has_website = to_text(df["website"]).str.contains("\\.").fillna(False).to_numpy(dtype=bool)
+    return has_email.astype(np.int64) * 2 + has_website
+
+def _exact_scatter(df: pd.DataFrame, splitters: np.ndarray, schema: pa.Schema) -> list:
+    # Worker, round 1 over a contiguous chunk: lower-cases the dedupe columns (the only place they are),
+    # drops rows that already lose to a better row of the same (company, email) in this chunk, and shares
+    # the rest of each company range as a segment of whole rows. [segment name or None] per range.
+    for c in EXACT_COLUMNS:
+        df[c] = to_text(df[c]).str.lower()
+    df[RANK] = _row_rank(df)
+    company = df["company_name"]
+    part = np.full(len(df), len(splitters), dtype=np.int64)
+    known = company.notna().to_numpy()
+    part[known] = np.searchsorted(splitters, company[known].to_numpy(dtype=object), side="right")
+    order = np.lexsort((df[POS].to_numpy(), -df[RANK].to_numpy(), part))
+    df, part = df.iloc[order], part[order]
+    keep = ~df.duplicated(subset=["company_name", "email"]).to_numpy()
+    df, part = df[keep], part[keep]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.cast(pa.schema(list(schema), metadata=table.schema.metadata))
+    edges = np.searchsorted(part, np.arange(len(splitters) + 2))
+    return [share(table.slice(a, b - a)) if b > a else None for a, b in zip(edges[:-1], edges[1:])]
+
+def _exact_gather(names: list) -> str:
+    # Worker, round 2: one company range from every chunk; the survivors, in single-process order
+    # (company, best rank first, input order), shared as one segment of whole rows
+    df = from_arrow(pa.concat_tables([read_shared(n, remove=True) for n in names]))
+    df = df.sort_values(by=["company_name", RANK, POS], ascending=[True, False, True])
+    df = df.drop_duplicates(subset=["company_name", "email"], keep="first").drop(columns=RANK)
+    return share(pa.Table.from_pandas(df, preserve_index=False))
+
+def _dedupe_exact_parallel(df: pd.DataFrame, workers: int) -> pd.DataFrame:
+    # Rows are partitioned on the normalized dedupe key, so each partition dedupes on its own. Partitions are
+    # company-name ranges (split points sampled from the data) rather than hashes: every (company, email)
+    # group still lands in one partition, and the partitions' outputs concatenate straight into the
+    # single-process order with no global re-sort. Whole rows move between workers through shared memory;
+    # this process only converts the frame to Arrow once and concatenates the survivors.
+    step = max(len(df) // (workers * 1000), 1)
+    sample = np.sort(to_text(df["company_name"].iloc[::step]).str.lower().dropna().to_numpy(dtype=object))
+    splitters = np.unique(sample[np.arange(1, workers) * len(sample) // workers]) if len(sample) else \
+        np.array([], dtype=object)
+    table = to_arrow(df).append_column(POS, pa.array(np.arange(len(df), dtype=np.int64)))
+    text = pa.Table.from_pandas(pd.DataFrame({c: to_text(df[c].iloc[:0]) for c in EXACT_COLUMNS}), preserve_index=False)
+    schema = pa.schema([text.schema.field(f.name) if f.name in EXACT_COLUMNS else f for f in table.schema]
+                       + [pa.field(RANK, pa.int64())])
+    shared = []
+    try:
+        with process_pool(workers) as pool:
+            chunks = map_partitions(_exact_scatter, table, workers=workers, args=(splitters, schema), pool=pool)
+            shared += [n for names in chunks for n in names if n]
+            ranges = [[names[p] for names in chunks if names[p]] for p in range(len(splitters) + 1)]
+            outputs = map_tasks(_exact_gather, [r for r in ranges if r], pool=pool)
+            shared += outputs
+        out = from_arrow(pa.concat_tables([read_shared(n, remove=True) for n in outputs]))
+    finally:
+        unlink(shared)
+    pos = out.pop(POS).to_numpy()
+    out.index = df.index[pos]
+    for c in out.columns:
+        # Arrow round-trips categories as object; re-attach the input's own categorical dtype
+        if isinstance(df[c].dtype, pd.CategoricalDtype) and out[c].dtype != df[c].dtype:
+            out[c] = out[c].astype(df[c].dtype)
+    return out
+
+def dedupe_leads(df: pd.DataFrame, fuzzy: bool = False, threshold: float = 0.8, workers: int = None) -> pd.DataFrame:
+    # workers: processes for large frames (default 1); frames under parallel.POOL_MIN_ROWS are always deduped
+    # in-process
+    n = pool_workers(len(df), workers)
+    if not fuzzy and n > 1:
+        return _dedupe_exact_parallel(df, n)
     df = df.copy()
     for c in ["company_name","email","website"]:
         if c in df.columns:
-            df[c] = df[c].astype(str).str.strip().str.lower()
-    df["has_email"] = df["email"].notna() & df["email"].str.contains("@")
-    df["has_website"] = df["website"].notna() & df["website"].str.contains("\.")
+            df[c] = to_text(df[c]).str.lower()
+    df["has_email"] = df["email"].str.contains("@").fillna(False).astype(bool)
+    df["has_website"] = df["website"].str.contains("\\.").fillna(False).astype(bool)
     df["row_rank"] = df["has_email"].astype(int)*2 + df["has_website"].astype(int)
+    if fuzzy:
+        # Near-duplicate mode: keep the best-ranked row of each cluster, tag survivors with their cluster id
+        df["dedupe_cluster"] = cluster_leads(df, threshold=threshold, workers=workers)
+        df_sorted = df.sort_values(by=["dedupe_cluster","row_rank"], ascending=[True, False], kind="mergesort")
+        deduped = df_sorted.drop_duplicates(subset=["dedupe_cluster"], keep="first").sort_index()
+        return deduped.drop(columns=["has_email","has_website","row_rank"], errors="ignore")
     df_sorted = df.sort_values(by=["company_name","row_rank"], ascending=[True, False])
     deduped = df_sorted.drop_duplicates(subset=["company_name","email"], keep="first")
     return deduped.drop(columns=["has_email","has_website","row_rank"], errors="ignore")
@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+CACHE_DIR = os.getenv("LEADGEN_CACHE_DIR", os.path.join(".cache", "leadgen"))
+
+def content_key(*parts) -> str:
+    # sha256 over the parts, so equal inputs share one entry regardless of who asks
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else str(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+class DiskCache:
+    # Content-addressed blobs under <directory>/<namespace>/<ab>/<key>; entries written more than ttl seconds ago
+    # are misses. Nothing is removed until prune(), which drops expired entries and then, over max_bytes, the
+    # least recently used: mtime is the write time (for ttl), atime is set on every hit (for LRU).
+    def __init__(self, namespace: str, directory: str = None, ttl: float = None, max_bytes: int = None):
+        self.root = os.path.join(directory or CACHE_DIR, namespace)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            mtime, now = os.path.getmtime(path), time.time()
+            if self.ttl is not None and now - mtime > self.ttl:
+                return None
+            with open(path, "rb") as fh:
+                data = fh.read()
+            os.utime(path, (now, mtime))  # explicit, as noatime/relatime mounts would not record the read
+            return data
+        except OSError:
+            return None
+
+    def set(self, key: str, data: bytes):
+        # Write-then-rename so concurrent readers never see a partial file
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+
+    def get_json(self, key: str):
+        data = self.get(key)
+        return json.loads(data) if data is not None else None
+
+    def set_json(self, key: str, obj):
+        self.set(key, json.dumps(obj).encode("utf-8"))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def prune(self) -> int:
+        # Walks the whole namespace, so callers run it once per batch of writes, not per entry
+        entries = []
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((max(st.st_atime, st.st_mtime), st.st_mtime, st.st_size, path))
+        now = time.time()
+        if self.ttl is not None:
+            expired = [e for e in entries if now - e[1] > self.ttl]
+            entries = [e for e in entries if now - e[1] <= self.ttl]
+        else:
+            expired = []
+        entries.sort()  # least recently used first
+        total = sum(e[2] for e in entries)
+        over = []
+        for entry in entries:
+            if self.max_bytes is None or total <= self.max_bytes:
+                break
+            over.append(entry)
+            total -= entry[2]
+        removed = 0
+        for _, _, _, path in expired + over:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
@@ -0,0 +1,200 @@
+import re
+import json
+import asyncio
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import pandas as pd
+from lxml import html as lxml_html
+from requests.adapters import HTTPAdapter
+
+from modules.diskcache import DiskCache, content_key
+from modules.schema import TEXT_DTYPE, to_text, to_category
+
+CONTACT_PATHS = ["", "/contact", "/contact-us", "/about", "/about-us"]
+PAGE_CACHE_TTL = 7 * 24 * 3600
+MAX_PAGE_BYTES = 1_000_000
+USER_AGENT = "Mozilla/5.0 (compatible; EPS-LeadGen enrichment)"
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,24}")
+PHONE_RE = re.compile(r"(?:\+|\b0{0,2})\d[\d\s().-]{6,16}\d\b")
+TITLE_SPLIT_RE = re.compile(r"\s+[|\-–—:]\s+")
+ASSET_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".css", ".js")
+_JSONLD_XP = "//script[@type='application/ld+json']/text()"
+_MAILTO_XP = "//a[starts-with(@href, 'mailto:')]/@href"
+_TEL_XP = "//a[starts-with(@href, 'tel:')]/@href"
+_SITE_NAME_XP = "//meta[@property='og:site_name']/@content | //meta[@name='application-name']/@content"
+
+def _homepage(url) -> str:
+    u = str(url).strip()
+    if u.lower() in ("", "nan", "none", "<na>"):
+        return ""
+    if "://" not in u:
+        u = "http://" + u
+    parts = urlsplit(u)
+    return f"{parts.scheme}://{parts.netloc}" if parts.netloc else ""
+
+def _walk_jsonld(obj):
+    if isinstance(obj, dict):
+        yield obj
+        for v in obj.values():
+            yield from _walk_jsonld(v)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from _walk_jsonld(v)
+
+def extract_contact_info(page: bytes, host: str = "") -> dict:
+    # Emails, phones, company name and location from one HTML page; empty values are omitted
+    try:
+        doc = lxml_html.fromstring(page)
+    except (ValueError, lxml_html.etree.ParserError):
+        return {}
+    out = {}
+    text = " ".join(doc.xpath("//body//text()[not(ancestor::script) and not(ancestor::style)]"))
+
+    emails = [h[7:].split("?")[0] for h in doc.xpath(_MAILTO_XP)] + EMAIL_RE.findall(text)
+    emails = [e.strip().lower() for e in emails if e and not e.lower().endswith(ASSET_SUFFIXES)]
+    if emails:
+        own = [e for e in emails if host and e.split("@")[-1].endswith(host.split(":")[0].removeprefix("www."))]
+        out["email"] = (own or emails)[0]
+
+    phones = [h[4:] for h in doc.xpath(_TEL_XP)] + PHONE_RE.findall(text)
+    phones = [re.sub(r"\s+", " ", p).strip() for p in phones if sum(ch.isdigit() for ch in p) >= 8]
+    if phones:
+        out["phone"] = phones[0]
+
+    for blob in doc.xpath(_JSONLD_XP):
+        try:
+            data = json.loads(blob)
+        except ValueError:
+            continue
+        for node in _walk_jsonld(data):
+            if node.get("@type") in ("Organization", "Corporation", "LocalBusiness") and node.get("name"):
+                out.setdefault("company_name", str(node["name"]).strip())
+            for key, col in (("addressLocality", "city"), ("addressRegion", "state"), ("addressCountry", "country")):
+                val = node.get(key)
+                if isinstance(val, dict):
+                    val = val.get("name")
+                if val:
+                    out.setdefault(col, str(val).strip())
+            if node.get("email"):
+                out.setdefault("email", str(node["email"]).removeprefix("mailto:").strip().lower())
+            if node.get("telephone"):
+                out.setdefault("phone", str(node["telephone"]).strip())
+
+    if "company_name" not in out:
+        names = doc.xpath(_SITE_NAME_XP) or doc.xpath("//title/text()")
+        if names:
+            name = TITLE_SPLIT_RE.split(names[0].strip())[0].strip()
+            if name:
+                out["company_name"] = name
+    return out
+
+class _Fetcher:
+    # asyncio front over a pooled requests.Session: a global cap, a per-host cap, timeouts and a page cache
+    def __init__(self, concurrency: int, per_host: int, timeout: float, cache: DiskCache):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.slots = asyncio.Semaphore(concurrency)
+        self.per_host = per_host
+        self.hosts = {}
+        self.timeout = timeout
+        self.cache = cache
+        self.stats = {"fetched": 0, "cached": 0, "failed": 0}
+
+    def _get(self, url: str):
+        # (page or None, whether the miss is worth remembering): a 404 or a non-HTML page stays that way, while
+        # a 429 or 5xx is transient and must not be cached
+        r = self.session.get(url, timeout=self.timeout, allow_redirects=True, stream=True)
+        try:
+            if r.status_code != 200 or "html" not in r.headers.get("Content-Type", "html"):
+                return None, r.status_code != 429 and r.status_code < 500
+            return r.raw.read(MAX_PAGE_BYTES, decode_content=True), True
+        finally:
+            r.close()
+
+    async def fetch(self, url: str):
+        key = content_key(url)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats["cached"] += 1
+                return cached or None  # b"" marks a remembered failure
+        host = urlsplit(url).netloc
+        host_slots = self.hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        # Host slot first: tasks queued behind a busy host must not sit on global slots other hosts could use
+        async with host_slots, self.slots:
+            loop = asyncio.get_running_loop()
+            try:
+                page, keep = await loop.run_in_executor(self.executor, self._get, url)
+            except requests.RequestException:
+                # Network errors are not cached so the next run retries the host
+                self.stats["failed"] += 1
+                return None
+        self.stats["fetched" if page else "failed"] += 1
+        if self.cache is not None and keep:
+            self.cache.set(key, page or b"")
+        return page
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+async def _crawl_site(fetcher: _Fetcher, home: str, paths) -> dict:
+    # Homepage first; contact/about pages only fill fields the homepage did not have
+    info = {}
+    pages = await asyncio.gather(*(fetcher.fetch(home + p) for p in paths))
+    host = urlsplit(home).netloc
+    for page in pages:
+        if page:
+            for k, v in extract_contact_info(page, host).items():
+                info.setdefault(k, v)
+    return info
+
+async def _crawl(homes, paths, concurrency, per_host, timeout, cache):
+    fetcher = _Fetcher(concurrency, per_host, timeout, cache)
+    try:
+        results = await asyncio.gather(*(_crawl_site(fetcher, h, paths) for h in homes))
+    finally:
+        fetcher.close()
+    return dict(zip(homes, results)), fetcher.stats
+
+def enrich_leads(df: pd.DataFrame, concurrency: int = 64, per_host: int = 2, timeout: float = 10.0,
+                 paths=None, cache_ttl=PAGE_CACHE_TTL, cache_dir: str = None) -> pd.DataFrame:
+    # Crawls each distinct site once for rows that have a website but no email/company name, and fills
+    # only the empty columns. Pages are cached on disk; cache_ttl=None turns the cache off.
+    df = df.copy()
+    cols = ["company_name", "email", "phone", "city", "state", "country"]
+    for c in cols + ["website", "notes"]:
+        if c not in df.columns:
+            df[c] = None
+    blank = lambda s: s.isna() | s.astype(str).str.strip().str.lower().isin(["", "nan", "none"])
+    homes = df["website"].map(_homepage)
+    todo = (homes != "") & (blank(df["email"]) | blank(df["company_name"]))
+    if not todo.any():
+        return df
+    cache = DiskCache("pages", directory=cache_dir, ttl=cache_ttl) if cache_ttl is not None else None
+    unique_homes = list(dict.fromkeys(homes[todo]))
+    found, stats = asyncio.run(_crawl(unique_homes, paths or CONTACT_PATHS, concurrency, per_host, timeout, cache))
+    def put(c, mask, values):
+        # Fill through object dtype, then restore the column's canonical dtype if it had one
+        dtype = df[c].dtype
+        col = df[c].astype(object)
+        col[mask] = values
+        df[c] = to_category(col) if isinstance(dtype, pd.CategoricalDtype) else to_text(col) if dtype == TEXT_DTYPE else col
+
+    for c in cols:
+        values = homes.map(lambda h: found.get(h, {}).get(c))
+        fill = todo & blank(df[c]) & values.notna()
+        if fill.any():
+            put(c, fill, values[fill])
+    touched = todo & homes.map(lambda h: bool(found.get(h)))
+    if touched.any():
+        notes = df.loc[touched, "notes"].astype(object).fillna("").astype(str)
+        put("notes", touched, notes.where(notes == "", notes + " | ") + "enriched=website")
+    df.attrs["enrich_stats"] = {"sites": len(unique_homes), **stats}
+    return df
@@ -5,7 +5,7 @@ def export_for_hubspot(df: pd.DataFrame, lead_source: str = "Indiamart") -> pd.D
     out = pd.DataFrame()
     out["company"] = df.get("company_name", "")
     names = df.get("contact_name","").fillna("").str.split(" ", n=1, expand=True)
-    out["firstname"] = names[0]
+    out["firstname"] = names[0] if names.shape[1] > 0 else ""
     out["lastname"] = names[1] if names.shape[1] > 1 else ""
     out["email"] = df.get("email","")
     out["phone"] = df.get("phone","")
@@ -16,9 +16,10 @@ def export_for_hubspot(df: pd.DataFrame, lead_source: str = "Indiamart") -> pd.D
     out["jobtitle"] = df.get("job_title","")
     out["industry"] = df.get("industry","")
     out["lifecyclestage"] = df.get("lifecycle_stage","lead")
-    out["lead_source"] = lead_source
+    out["lead_source"] = pd.Categorical([lead_source] * len(df))
     out["priority_region"] = df.get("priority_region","")
-    out["competitor_flag"] = df.get("competitor_flag", False).astype(str)
+    flag = df["competitor_flag"].fillna(False).astype(bool) if "competitor_flag" in df.columns else pd.Series(False, index=df.index)
+    out["competitor_flag"] = pd.Categorical.from_codes(flag.astype("int8"), ["False", "True"])
     out["lead_score"] = df.get("lead_score",0)
     out["notes"] = df.get("notes","")
     return out
@@ -1,52 +1,172 @@
 
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import pdfplumber
 
-def parse_event_file(file) -> pd.DataFrame:
+from modules.diskcache import DiskCache, content_key
+from modules.ingest import PARSER_VERSION as INGEST_VERSION, read_table, resolve_columns
+
+COLUMNS = ["company_name","contact_name","email","phone","website","country","state","city","industry","job_title","notes"]
+PARSER_VERSION = 3  # bump when parsing changes so cached pages and frames are re-extracted
+POOL_MIN_PAGES = 8  # smaller PDFs are extracted in-process
+PAGE_CACHE_TTL = float(os.getenv("LEADGEN_EVENT_PDF_TTL", 30 * 24 * 3600))  # seconds; also ages out old PARSER_VERSIONs
+PAGE_CACHE_BYTES = int(os.getenv("LEADGEN_EVENT_PDF_CACHE_BYTES", 256 * 1024 * 1024))
+
+COUNTRIES = ["India", "Germany", "Italy", "China", "USA", "United States", "United Kingdom", "UK", "France", "Spain",
+             "Netherlands", "Switzerland", "Austria", "Belgium", "Japan", "South Korea", "Korea", "Taiwan", "Singapore",
+             "Malaysia", "Thailand", "Indonesia", "Vietnam", "UAE", "United Arab Emirates", "Saudi Arabia", "Turkey",
+             "Iran", "Egypt", "South Africa", "Brazil", "Mexico", "Canada", "Australia", "Sweden", "Denmark", "Finland",
+             "Poland", "Czech Republic", "Bangladesh", "Sri Lanka", "Nepal"]
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,24}")
+URL_RE = re.compile(r"(?:https?://|www\.)[^\s,;|]+|\b[a-z0-9-]+(?:\.[a-z0-9-]+)*\.(?:com|in|net|org|co|de|it|cn|uk|biz|info|io)\b", re.I)
+PHONE_RE = re.compile(r"\+?\(?\d[\d\s().-]{6,}\d")
+COUNTRY_RE = re.compile(r"\b(?:" + "|".join(re.escape(c) for c in sorted(COUNTRIES, key=len, reverse=True)) + r")\b", re.I)
+LABEL_RE = re.compile(r"\b(?:e-?mail|tel(?:ephone)?|ph(?:one)?|mob(?:ile)?|fax|web(?:site)?|url)\s*[:.]", re.I)
+STAND_RE = re.compile(r"\b(?:hall|stand|booth|stall)\s*(?:no\.?)?\s*[:#-]?\s*[\w/-]+", re.I)
+EMPTY_BRACKETS_RE = re.compile(r"[(\[][\s,;:/-]*[)\]]")
+_COUNTRY_NAMES = {c.lower(): c for c in COUNTRIES}
+
+def _digits(s: str) -> int:
+    return sum(ch.isdigit() for ch in s)
+
+def parse_line(line: str) -> dict:
+    # Pulls email, website, phone and country out of one directory line; what is left is the company name
+    row, rest = {}, line
+    m = EMAIL_RE.search(rest)
+    if m:
+        row["email"] = m.group(0).lower()
+        rest = rest.replace(m.group(0), " ")
+    m = URL_RE.search(rest)
+    if m:
+        row["website"] = m.group(0).rstrip(".")
+        rest = rest.replace(m.group(0), " ")
+    for m in PHONE_RE.finditer(rest):
+        if _digits(m.group(0)) >= 8:
+            row["phone"] = m.group(0).strip()
+            rest = rest.replace(m.group(0), " ")
+            break
+    m = COUNTRY_RE.search(rest)
+    if m:
+        row["country"] = _COUNTRY_NAMES[m.group(0).lower()]
+        rest = rest[:m.start()] + " " + rest[m.end():]
+    rest = STAND_RE.sub(" ", LABEL_RE.sub(" ", rest))
+    rest = re.sub(r"\s+", " ", EMPTY_BRACKETS_RE.sub(" ", rest)).strip(" ,;:|-–")
+    if sum(ch.isalpha() for ch in rest) >= 3:
+        row["company_name"] = rest
+    return row
+
+def _rows_from_lines(lines) -> list:
+    # A line without a company name (e.g. "Email: ... Tel: ...") continues the entry above it
+    rows = []
+    for line in lines:
+        line = line.strip()
+        if len(line) < 5:
+            continue
+        fields = parse_line(line)
+        if rows and "company_name" not in fields:
+            prev = rows[-1]
+            for k, v in fields.items():
+                prev.setdefault(k, v)
+            prev["notes"] += f" / {line}"
+            continue
+        fields["notes"] = f"event_pdf:{line}"
+        rows.append(fields)
+    return rows
+
+def _rows_from_table(table) -> list:
+    # Header row mapped through the ingest alias table when it names at least two known columns; otherwise rows
+    # are parsed as lines
+    cells = [[(c or "").replace("\n", " ").strip() for c in r] for r in table if any(r)]
+    if not cells:
+        return []
+    mapping = resolve_columns(cells[0], fuzzy=False)
+    header = [mapping.get(i) if mapping.get(i) in COLUMNS else None for i in range(len(cells[0]))]
+    if sum(h is not None for h in header) < 2:
+        return _rows_from_lines(" ".join(r) for r in cells)
+    rows = []
+    for r in cells[1:]:
+        line = " ".join(c for c in r if c)
+        if not line:
+            continue
+        fields = {h: c for h, c in zip(header, r) if h and c}
+        for k, v in parse_line(line).items():
+            if k != "company_name":
+                fields.setdefault(k, v)
+        fields["notes"] = f"event_pdf:{line}"
+        rows.append(fields)
+    return rows
+
+def _page_rows(page) -> list:
+    # Ruled tables win; pages without drawn lines skip table detection and go straight to text lines
+    tables = page.extract_tables() if (page.lines or page.rects) else []
+    if tables:
+        return [row for t in tables for row in _rows_from_table(t)]
+    return _rows_from_lines((page.extract_text() or "").splitlines())
+
+def _extract_pages(data: bytes, page_numbers) -> list:
+    # Worker: [(page_number, rows)] for a run of pages
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [(n, _page_rows(pdf.pages[n])) for n in page_numbers]
+
+def parse_event_pdf(data: bytes, workers: int = None, cache_dir: str = None, progress=None) -> pd.DataFrame:
+    # Pages are cached by (file hash, page number, parser version), so a re-upload only extracts what is missing.
+    # progress(pages_done, pages_total, new_rows) is called as runs of pages finish; if it raises, pages
+    # extracted so far stay cached and a later call resumes from them.
+    cache = DiskCache("event_pdf", directory=cache_dir, ttl=PAGE_CACHE_TTL, max_bytes=PAGE_CACHE_BYTES)
+    file_hash = content_key(data)
+    meta = cache.get_json(content_key(file_hash, "pages"))
+    if meta is None:
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            meta = {"pages": len(pdf.pages)}
+        cache.set_json(content_key(file_hash, "pages"), meta)
+    # Page tables are mapped through ingest.resolve_columns, so its version is part of the page key too
+    keys = [content_key(file_hash, n, PARSER_VERSION, INGEST_VERSION) for n in range(meta["pages"])]
+    pages = {n: cache.get_json(k) for n, k in enumerate(keys)}
+    missing = [n for n, rows in pages.items() if rows is None]
+    done = meta["pages"] - len(missing)
+
+    def store(items):
+        nonlocal done
+        for n, rows in items:
+            cache.set_json(keys[n], rows)
+            pages[n] = rows
+        done += len(items)
+        if progress:
+            progress(done, meta["pages"], [row for _, rows in items for row in rows])
+
+    if progress:
+        progress(done, meta["pages"], [])
+    if missing:
+        workers = workers or min(os.cpu_count() or 1, len(missing))
+        if workers > 1 and len(missing) >= POOL_MIN_PAGES:
+            step = -(-len(missing) // (workers * 2))
+            runs = [missing[i:i + step] for i in range(0, len(missing), step)]
+            pool = ProcessPoolExecutor(max_workers=workers)
+            try:
+                for fut in as_completed([pool.submit(_extract_pages, data, run) for run in runs]):
+                    store(fut.result())
+            finally:
+                pool.shutdown(cancel_futures=True)
+        else:
+            # One run when nobody is watching; otherwise small runs so progress can be reported
+            step = POOL_MIN_PAGES if progress else len(missing)
+            for i in range(0, len(missing), step):
+                store(_extract_pages(data, missing[i:i + step]))
+        cache.prune()
+    df = pd.DataFrame([row for n in range(meta["pages"]) for row in pages[n]], columns=COLUMNS)
+    return df[COLUMNS]
+
+def parse_event_file(file, workers: int = None, progress=None) -> pd.DataFrame:
     name = file.name.lower()
     if name.endswith((".xlsx",".xls",".csv")):
-        if name.endswith(".csv"):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_excel(file)
-        df.columns = [c.strip() for c in df.columns]
-        colmap = {
-            "company":"company_name",
-            "organization":"company_name",
-            "organisation":"company_name",
-            "name":"contact_name",
-            "contact":"contact_name",
-            "email":"email",
-            "mail":"email",
-            "phone":"phone",
-            "mobile":"phone",
-            "website":"website",
-            "city":"city",
-            "state":"state",
-            "country":"country",
-            "title":"job_title",
-            "designation":"job_title",
-            "industry":"industry"
-        }
-        for c in list(df.columns):
-            key = c.strip().lower()
-            if key in colmap:
-                df.rename(columns={c:colmap[key]}, inplace=True)
-        for r in ["company_name","contact_name","email","phone","website","country","state","city","industry","job_title","notes"]:
-            if r not in df.columns: df[r] = None
-        df["notes"] = df.get("notes","").fillna("") + " | source=event_list"
-        return df[["company_name","contact_name","email","phone","website","country","state","city","industry","job_title","notes"]]
+        df = read_table(file)
+        df["notes"] = df["notes"].fillna("").astype(str) + " | source=event_list"
+        return df[COLUMNS]
     elif name.endswith(".pdf"):
-        rows = []
-        with pdfplumber.open(file) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text() or ""
-                for line in text.split("\\n"):
-                    if len(line.strip()) < 5: continue
-                    rows.append({"notes": f"event_pdf:{line.strip()}"})
-        df = pd.DataFrame(rows)
-        for r in ["company_name","contact_name","email","phone","website","country","state","city","industry","job_title"]:
-            if r not in df.columns: df[r] = None
-        return df[["company_name","contact_name","email","phone","website","country","state","city","industry","job_title","notes"]]
+        return parse_event_pdf(file.read(), workers=workers, progress=progress)
     else:
         return pd.DataFrame()
@@ -2,68 +2,148 @@
 import os
 import re
 import time
-from typing import Optional
+import random
+from itertools import product
+from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
 
-def google_search_leads(query: str, cse_key: Optional[str]=None, cse_id: Optional[str]=None, site_indiamart: bool=False, max_results: int=20) -> pd.DataFrame:
-    # Uses Google Programmable Search Engine if key+cx provided.
-    # If not, falls back to a simple public results page scrape (brittle; for demo).
-    q = query.strip()
-    if site_indiamart and "site:" not in q:
-        q = f"site:indiamart.com {q}"
-    items = []
+from modules.utils import TokenBucket
+from modules.diskcache import DiskCache, content_key
 
-    if cse_key and cse_id:
-        start = 1
-        while len(items) < max_results:
-            params = {"key": cse_key, "cx": cse_id, "q": q, "start": start}
-            r = requests.get("https://www.googleapis.com/customsearch/v1", params=params, timeout=15)
-            if r.status_code != 200:
+CSE_ENDPOINT = os.getenv("GOOGLE_CSE_ENDPOINT", "https://www.googleapis.com/customsearch/v1")
+CSE_CACHE_TTL = 24 * 3600  # seconds a raw CSE page is reused
+CSE_CACHE_BYTES = int(os.getenv("LEADGEN_CSE_CACHE_BYTES", 64 * 1024 * 1024))
+CSE_MAX_RETRIES = 3
+CSE_RETRY_STATUSES = {429, 500, 502, 503, 504}
+CSE_MAX_RESULTS = 100  # the API serves at most 100 results per query
+CSE_PAGE_SIZE = 10  # items per CSE page; a shorter page is the query's last
+
+def _lead_row(url: str, notes: str) -> dict:
+    return {
+        "company_name": None,
+        "contact_name": None,
+        "email": None,
+        "phone": None,
+        "website": url,
+        "country": None,
+        "state": None,
+        "city": None,
+        "industry": None,
+        "job_title": None,
+        "notes": notes
+    }
+
+def _url_key(url: str) -> str:
+    # Identity used to drop the same hit returned by several queries
+    return re.sub(r"^https?://(www\.)?", "", url.strip().lower()).rstrip("/")
+
+def build_queries(terms: List[str], regions: List[str] = None) -> List[str]:
+    # e.g. ["evaporator manufacturer"] x ["Gujarat", "Pune"] -> "evaporator manufacturer Gujarat", ...
+    return [f"{t} {r}".strip() for t, r in product(terms, regions or [""])]
+
+def _fetch_page(session, q: str, start: int, cse_key: str, cse_id: str, endpoint: str,
+                limiter: TokenBucket, cache: Optional[DiskCache]):
+    # (items, error): raw CSE JSON is cached by (engine, query, start); the API key is not part of the identity.
+    # 429/5xx and network errors are retried with exponential backoff; a page that still fails comes back
+    # as (None, message) instead of raising, so the other queries of the batch carry on.
+    key = content_key(endpoint, cse_id, q, start)
+    js = cache.get_json(key) if cache is not None else None
+    if js is not None:
+        return js.get("items", []), None
+    params = {"key": cse_key, "cx": cse_id, "q": q, "start": start}
+    for attempt in range(CSE_MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            r = session.get(endpoint, params=params, timeout=15)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            if r.status_code == 200:
+                js = r.json()
+                if cache is not None:
+                    cache.set_json(key, js)
+                return js.get("items", []), None
+            error = f"HTTP {r.status_code} {r.text[:200]}"
+            if r.status_code not in CSE_RETRY_STATUSES:
                 break
-            js = r.json()
-            batch = js.get("items", [])
-            if not batch:
+        if attempt < CSE_MAX_RETRIES:
+            time.sleep(min(30.0, 2 ** attempt) * (0.5 + random.random() / 2))
+    return None, f"{q!r} start={start}: {error}"
+
+def google_search_batch(queries: List[str], cse_key: str, cse_id: str, site_indiamart: bool = False,
+                        max_results: int = 20, concurrency: int = 4, max_rps: float = 5.0,
+                        cache_ttl: Optional[float] = CSE_CACHE_TTL, cache_dir: str = None,
+                        endpoint: str = None) -> pd.DataFrame:
+    # Fetches pages concurrently under one rate limiter, then builds a single frame with URLs deduped across
+    # queries. Pages go in rounds: page 1 of every query, then the next page only of queries whose last page
+    # was full, so a query with few hits costs no further (billable) calls. A page that failed after retries
+    # ends its query's paging and is listed in df.attrs["search_errors"]. cache_ttl=None disables the
+    # on-disk response cache.
+    endpoint = endpoint or CSE_ENDPOINT
+    qs = []
+    for query in queries:
+        q = query.strip()
+        if site_indiamart and "site:" not in q:
+            q = f"site:indiamart.com {q}"
+        if q and q not in qs:
+            qs.append(q)
+    starts = list(range(1, min(max_results, CSE_MAX_RESULTS) + 1, CSE_PAGE_SIZE))
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    limiter = TokenBucket(max_rps)
+    cache = DiskCache("google_cse", directory=cache_dir, ttl=cache_ttl, max_bytes=CSE_CACHE_BYTES) \
+        if cache_ttl is not None else None
+    pages, errors = {}, []  # (query, start) -> items
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        live = list(qs)
+        for start in starts:
+            got = pool.map(lambda q: _fetch_page(session, q, start, cse_key, cse_id, endpoint, limiter, cache), live)
+            for q, (items, error) in zip(live, got):
+                pages[q, start] = items or []
+                if error:
+                    errors.append(error)
+            live = [q for q in live if len(pages[q, start]) >= CSE_PAGE_SIZE]
+            if not live:
+                break
+    if cache is not None:
+        cache.prune()
+
+    rows, seen, per_query = [], set(), {}
+    for q, start in [(q, s) for q in qs for s in starts if (q, s) in pages]:
+        items = pages[q, start]
+        for it in items:
+            if per_query.get(q, 0) >= max_results:
                 break
-            items.extend(batch)
-            start += 10
-            time.sleep(0.2)
-        rows = []
-        for it in items[:max_results]:
+            per_query[q] = per_query.get(q, 0) + 1
             url = it.get("link") or it.get("formattedUrl") or ""
+            if _url_key(url) in seen:
+                continue
+            seen.add(_url_key(url))
             title = it.get("title") or it.get("htmlTitle") or ""
             snippet = it.get("snippet") or ""
-            rows.append({
-                "company_name": None,
-                "contact_name": None,
-                "email": None,
-                "phone": None,
-                "website": url,
-                "country": None,
-                "state": None,
-                "city": None,
-                "industry": None,
-                "job_title": None,
-                "notes": f"google:{title} | {snippet}".strip()
-            })
-        return pd.DataFrame(rows)
-    else:
-        params = {"q": q}
-        r = requests.get("https://www.google.com/search", params=params, headers={"User-Agent":"Mozilla/5.0"}, timeout=15)
-        urls = []
-        if r.status_code == 200:
-            urls = re.findall(r'href="/url\\?q=(https?://[^"&]+)', r.text)
-        rows = [{
-            "company_name": None,
-            "contact_name": None,
-            "email": None,
-            "phone": None,
-            "website": u,
-            "country": None,
-            "state": None,
-            "city": None,
-            "industry": None,
-            "job_title": None,
-            "notes": "google_fallback"
-        } for u in urls[:max_results]]
-        return pd.DataFrame(rows)
+            rows.append(_lead_row(url, f"google:{title} | {snippet}".strip()))
+    df = pd.DataFrame(rows)
+    df.attrs["search_errors"] = errors
+    return df
+
+def google_search_leads(query: str, cse_key: Optional[str]=None, cse_id: Optional[str]=None, site_indiamart: bool=False, max_results: int=20) -> pd.DataFrame:
+    # Uses Google Programmable Search Engine if key+cx provided.
+    # If not, falls back to a simple public results page scrape (brittle; for demo).
+    if cse_key and cse_id:
+        return google_search_batch([query], cse_key, cse_id, site_indiamart=site_indiamart, max_results=max_results)
+    q = query.strip()
+    if site_indiamart and "site:" not in q:
+        q = f"site:indiamart.com {q}"
+    params = {"q": q}
+    r = requests.get("https://www.google.com/search", params=params, headers={"User-Agent":"Mozilla/5.0"}, timeout=15)
+    urls = []
+    if r.status_code == 200:
+        urls = re.findall(r'href="/url\\?q=(https?://[^"&]+)', r.text)
+    rows = [_lead_row(u, "google_fallback") for u in urls[:max_results]]
+    return pd.DataFrame(rows)
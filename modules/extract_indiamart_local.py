@@ -1,47 +1,154 @@
 
-from bs4 import BeautifulSoup
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+from lxml import etree
+
+from modules.ingest import read_table
+
+COLUMNS = ["company_name","contact_name","email","phone","website","country","state","city","industry","job_title","notes"]
+PARSER_VERSION = 3  # bump when parsing changes so cached frames are re-parsed
+POOL_MIN_FILES = 4  # below this a process pool costs more than it saves
+
+INDIAN_STATES = {
+    "andhra pradesh", "arunachal pradesh", "assam", "bihar", "chhattisgarh", "goa", "gujarat", "haryana",
+    "himachal pradesh", "jharkhand", "karnataka", "kerala", "madhya pradesh", "maharashtra", "manipur",
+    "meghalaya", "mizoram", "nagaland", "odisha", "punjab", "rajasthan", "sikkim", "tamil nadu", "telangana",
+    "tripura", "uttar pradesh", "uttarakhand", "west bengal", "delhi", "jammu and kashmir", "ladakh",
+    "puducherry", "chandigarh", "dadra and nagar haveli and daman and diu", "lakshadweep",
+    "andaman and nicobar islands",
+}
+
+def _class_re(*names, token=False):
+    # Class matchers: substrings by default (IndiaMART mixes BEM, camelCase and short names); token=True
+    # needs a whole class name, so "cards-grid" is not a "card"
+    alt = "|".join(re.escape(n) for n in names)
+    return re.compile(rf"(?:^|\s)(?:{alt})(?:\s|$)" if token else alt)
+
+# Listing, supplier and product-card layouts. Only outermost matches are cards, so nested
+# "prd-card > card" style wrappers yield one row instead of several.
+CARD_RE = _class_re("card", "prd-card", "prod-card", "product-card", "lst_cl", "supplier-card", "cmpny-card",
+                    "listing-item", "prdlist", "supplierInfoDiv", token=True)
+FIELD_RES = {
+    "company": _class_re("companyname", "company-name", "cmpname", "cmpny", "lcname", "supp-name", "comp-name"),
+    "product": _class_re("prd-name", "prod-name", "product-name", "producttitle", "prdTitle"),
+    "location": _class_re("newLocationUi", "cityLocation", "location", "cloc"),
+    "address": _class_re("city", "addr", "address", token=True),
+    "phone": _class_re("pns_h", "contactnumber", "phone", "mobile"),
+}
+HTML_PARSER = etree.HTMLParser()  # plain elements; lxml.html's element lookup doubles the walk cost
+TEXT_XP = etree.XPath(".//text()[not(ancestor::script) and not(ancestor::style)]")
+
+PHONE_RE = re.compile(r"(?:\+91[\s-]?|\b0)?[6-9]\d{4}[\s-]?\d{5}\b|\+?\d[\d\s-]{8,14}\d")
+SPACE_RE = re.compile(r"\s+")
+
+def _text(el) -> str:
+    return SPACE_RE.sub(" ", " ".join(TEXT_XP(el))).strip()
+
+def _outermost_cards(doc):
+    # Walked with iter() rather than "//*[@class]": libxml2's descendant XPath goes quadratic on wide pages
+    cards, seen = [], set()
+    for el in doc.iter(etree.Element):
+        cls = el.get("class")
+        if cls and CARD_RE.search(cls) and not any(a in seen for a in el.iterancestors()):
+            seen.add(el)
+            cards.append(el)
+    return cards
+
+def _outermost_links(doc):
+    return [a for a in doc.iter("a") if a.get("href") is not None and next(a.iterancestors("a"), None) is None]
+
+def _card_fields(card) -> dict:
+    # One walk below the card: the first element whose class matches each role, plus tel:/http links
+    found = {}
+    for el in card.iterdescendants():
+        if not isinstance(el.tag, str):
+            continue
+        cls = el.get("class")
+        if cls:
+            for role, rx in FIELD_RES.items():
+                if role not in found and rx.search(cls):
+                    t = _text(el)
+                    if t:
+                        found[role] = t
+        if el.tag in ("h2", "h3") and "heading" not in found:
+            found["heading"] = _text(el)
+        href = el.get("href")
+        if href:
+            if href.startswith("tel:"):
+                found.setdefault("tel", href[4:])
+            elif href.startswith("http"):
+                found.setdefault("link", href)
+    return found
+
+def _split_location(loc: str):
+    # "Vatva, Ahmedabad, Gujarat" -> ("Ahmedabad", "Gujarat"); "Pune" -> ("Pune", None)
+    parts = [p.strip() for p in re.split(r"[,|]", loc) if p.strip()]
+    if not parts:
+        return None, None
+    if len(parts) > 1 and parts[-1].lower() in INDIAN_STATES:
+        return parts[-2], parts[-1]
+    if parts[-1].lower() in INDIAN_STATES:
+        return None, parts[-1]
+    return parts[-1], None
+
+def _card_row(card) -> dict:
+    f = _card_fields(card)
+    company = f.get("company")
+    product = f.get("product") or f.get("heading")
+    city, state = _split_location(f.get("location") or f.get("address") or "")
+    phone = f.get("tel") or f.get("phone")
+    text = _text(card) if not (product and phone) else ""
+    if not (product or text):
+        return None
+    if not phone:
+        m = PHONE_RE.search(text)
+        phone = m.group(0) if m else None
+    link = card.get("href") if (card.get("href") or "").startswith("http") else f.get("link")
+    return {
+        "company_name": company or None,
+        "contact_name": None,
+        "email": None,
+        "phone": phone or None,
+        "website": link,
+        "country": "India",
+        "state": state,
+        "city": city,
+        "industry": None,
+        "job_title": None,
+        # Product text stays in notes, which is what the scoring rules read
+        "notes": f"indiamart_html:{(product or text)[:140]}"
+    }
 
 def _parse_html(file_bytes: bytes):
-    soup = BeautifulSoup(file_bytes, "lxml")
-    rows = []
-    cards = soup.select("[class*=prod] , [class*=card] , [class*=cmpny] , [class*=supplier]")
-    if not cards:
-        cards = soup.find_all("a")
-    for el in cards:
-        text = el.get_text(" ", strip=True)
-        link = el.get("href") or ""
-        if not text: continue
-        rows.append({
-            "company_name": None,
-            "contact_name": None,
-            "email": None,
-            "phone": None,
-            "website": link if link and link.startswith("http") else None,
-            "country": "India",
-            "state": None,
-            "city": None,
-            "industry": None,
-            "job_title": None,
-            "notes": f"indiamart_html:{text[:140]}"
-        })
-    return pd.DataFrame(rows)
-
-def parse_indiamart_files(files) -> pd.DataFrame:
-    frames = []
+    doc = etree.fromstring(file_bytes, HTML_PARSER) if file_bytes else None
+    if doc is None:
+        return pd.DataFrame(columns=COLUMNS)
+    cards = _outermost_cards(doc) or _outermost_links(doc)
+    rows = [r for r in map(_card_row, cards) if r]
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+def parse_indiamart_files(files, workers: int = None) -> pd.DataFrame:
+    # HTML pages are parsed in a process pool once there are enough of them; workers=1 keeps it in-process
+    frames, pages = [], []
     for file in files:
         name = file.name.lower()
         if name.endswith((".html",".htm")):
-            content = file.read()
-            frames.append(_parse_html(content))
-        elif name.endswith(".csv"):
-            frames.append(pd.read_csv(file))
-        elif name.endswith((".xls",".xlsx")):
-            frames.append(pd.read_excel(file))
+            pages.append(file.read())
+        elif name.endswith((".csv",".xls",".xlsx")):
+            frames.append(read_table(file))
+    workers = workers or min(len(pages), os.cpu_count() or 1)
+    if workers > 1 and len(pages) >= POOL_MIN_FILES:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames.extend(pool.map(_parse_html, pages, chunksize=max(1, len(pages) // (workers * 4))))
+    else:
+        frames.extend(map(_parse_html, pages))
+    frames = [f for f in frames if not f.empty]
     if not frames:
         return pd.DataFrame()
     df = pd.concat(frames, ignore_index=True).drop_duplicates()
-    for r in ["company_name","contact_name","email","phone","website","country","state","city","industry","job_title","notes"]:
+    for r in COLUMNS:
         if r not in df.columns: df[r] = None
     df["notes"] = df.get("notes","").fillna("") + " | source=indiamart_local"
-    return df[["company_name","contact_name","email","phone","website","country","state","city","industry","job_title","notes"]]
+    return df[COLUMNS]
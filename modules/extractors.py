@@ -0,0 +1,117 @@
+import sys
+import importlib
+import threading
+
+from modules.schema import CANONICAL_COLUMNS
+
+ENTRY_POINT_GROUP = "leadgen.extractors"
+
+class Extractor:
+    # A lead source as the UI and pipeline see it: what it accepts and yields, and where its code lives.
+    # The module is imported on the first load()/module() call, so pdfplumber, lxml, requests and friends
+    # are only paid for by the sources actually used in a process.
+    def __init__(self, name: str, label: str, target: str, file_types=(), columns=CANONICAL_COLUMNS,
+                 multiple: bool = False, description: str = ""):
+        self.name, self.label = name, label
+        self.module_name, _, self.attr = target.partition(":")  # "package.module:function"
+        self.file_types = tuple(t.lower().lstrip(".") for t in file_types)
+        self.columns = list(columns)
+        self.multiple = multiple  # the extractor takes a list of files
+        self.description = description
+        self._fn = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.module_name in sys.modules
+
+    def module(self):
+        return importlib.import_module(self.module_name)
+
+    def load(self):
+        if self._fn is None:
+            self._fn = getattr(self.module(), self.attr)
+        return self._fn
+
+    def handles(self, filename: str) -> bool:
+        return str(filename).lower().rpartition(".")[2] in self.file_types
+
+    def __repr__(self):
+        return f"Extractor({self.name!r}, {self.module_name}:{self.attr}, file_types={self.file_types})"
+
+# Built-in sources, in tab order. A file goes to the first extractor that handles its type, so the generic
+# table reader comes before the source-specific ones that also accept spreadsheets.
+BUILTIN = [
+    Extractor("table", "Upload CSV", "modules.ingest:read_table", ["csv", "xlsx", "xls"],
+              description="Any lead table; header row and columns are detected"),
+    Extractor("google", "Google Search", "modules.extract_google:google_search_leads",
+              description="Google Custom Search results, or scraped result pages without an API key"),
+    Extractor("event", "Event List", "modules.extract_event:parse_event_file", ["xlsx", "xls", "csv", "pdf"],
+              description="Exhibitor and attendee lists"),
+    Extractor("crm", "CRM Export", "modules.extract_crm:parse_crm_export", ["xlsx", "xls", "csv"]),
+    Extractor("indiamart", "IndiaMART (No API)", "modules.extract_indiamart_local:parse_indiamart_files",
+              ["html", "htm", "csv", "xls", "xlsx"], multiple=True, description="Saved IndiaMART pages and downloads"),
+]
+
+def _plugin(ep) -> Extractor:
+    # An entry point names an Extractor (or the dict of its arguments) in a light module of the plugin
+    # package; the extractor's own heavy module is still only imported when it is used
+    spec = ep.load()
+    if isinstance(spec, dict):
+        spec = Extractor(**{"name": ep.name, **spec})
+    if not isinstance(spec, Extractor):
+        raise TypeError(f"entry point {ep.value} is not an Extractor")
+    return spec
+
+def discover():
+    # (extractors, errors) registered by installed packages under the leadgen.extractors entry point group, e.g.
+    #   [project.entry-points."leadgen.extractors"]
+    #   tradeindia = "leadgen_tradeindia.plugin:EXTRACTOR"
+    from importlib.metadata import entry_points
+    found, errors = [], []
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            found.append(_plugin(ep))
+        except Exception as e:  # one broken plugin must not take the app down
+            errors.append(f"{ep.name}: {type(e).__name__}: {e}")
+    return found, errors
+
+class Registry:
+    def __init__(self, extractors=(), errors=()):
+        self._by_name = {}
+        self.errors = list(errors)  # plugins that failed to load
+        for ext in extractors:
+            self.register(ext)
+
+    def register(self, ext: Extractor):
+        # A later registration under the same name replaces the earlier one, so a plugin can override a built-in
+        self._by_name[ext.name] = ext
+
+    def __getitem__(self, name: str) -> Extractor:
+        return self._by_name[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def __iter__(self):
+        return iter(self._by_name.values())
+
+    def names(self) -> list:
+        return list(self._by_name)
+
+    def for_file(self, filename: str) -> Extractor:
+        return next((ext for ext in self if ext.handles(filename)), None)
+
+    def file_types(self) -> tuple:
+        return tuple(dict.fromkeys(t for ext in self for t in ext.file_types))
+
+_default = None
+_default_lock = threading.Lock()
+
+def registry() -> Registry:
+    # Process-wide registry: built-ins plus whatever entry points were installed when it was first used
+    global _default
+    with _default_lock:
+        if _default is None:
+            plugins, errors = discover()
+            _default = Registry(BUILTIN + plugins, errors)
+        return _default
@@ -0,0 +1,66 @@
+import re
+import numpy as np
+import pandas as pd
+
+from modules.schema import to_text
+from modules.normalize import map_unique
+
+_TOKEN = re.compile(r"\w+")
+# Last label of the host in a URL, bare host or email
+_TLD = r"^(?:[a-z][a-z0-9+.-]*://)?(?:[^/@\s]*@)?[^/:?#@\s]*\.([a-z]+)\.?(?:[/:?#]|$)"
+
+def _tokens(value) -> list:
+    if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+        return []
+    return _TOKEN.findall(str(value).lower())
+
+class RegionResolver:
+    # Region hints ({region: ["india", "abu dhabi", ".in", ...]}) split into a TLD -> region-bit map and a
+    # gazetteer of whole place phrases. Place columns match on word n-grams (so "oman" is not in "romania"),
+    # email/website columns on the TLD of their registrable domain (so ".co" is not in ".com").
+    def __init__(self, hints: dict):
+        self.regions = list(hints)
+        self.tlds, self.places = {}, {}
+        for i, words in enumerate(hints.values()):
+            for w in words:
+                w = w.strip().lower()
+                if w.startswith("."):
+                    self.tlds[w[1:]] = self.tlds.get(w[1:], 0) | 1 << i
+                elif _tokens(w):
+                    phrase = " ".join(_tokens(w))
+                    self.places[phrase] = self.places.get(phrase, 0) | 1 << i
+        self.max_words = max((p.count(" ") + 1 for p in self.places), default=1)
+
+    def place_mask(self, value) -> int:
+        tokens, mask = _tokens(value), 0
+        for n in range(1, min(self.max_words, len(tokens)) + 1):
+            for i in range(len(tokens) - n + 1):
+                mask |= self.places.get(" ".join(tokens[i:i + n]), 0)
+        return mask
+
+    def tld_masks(self, values: pd.Series) -> np.ndarray:
+        # Regex-extracted in one vectorized pass: unlike place columns, emails and websites rarely repeat
+        tld = to_text(values).str.lower().str.extract(_TLD, expand=False)
+        return tld.map(self.tlds).fillna(0).to_numpy(dtype=np.int64)
+
+    def masks(self, df: pd.DataFrame, place_columns=("country", "state", "city"),
+              domain_columns=("email", "website")) -> np.ndarray:
+        # Region bitmask per row; place columns are resolved over their unique values only
+        out = np.zeros(len(df), dtype=np.int64)
+        for c in place_columns:
+            if c in df.columns:
+                out |= map_unique(df[c], self.place_mask, dtype=np.int64)
+        for c in domain_columns:
+            if c in df.columns:
+                out |= self.tld_masks(df[c])
+        return out
+
+    def hits(self, df: pd.DataFrame, **kw) -> np.ndarray:
+        # rows x regions bool matrix, columns in hint order
+        return (self.masks(df, **kw)[:, None] >> np.arange(len(self.regions))) & 1 == 1
+
+    def resolve(self, df: pd.DataFrame, **kw) -> pd.Series:
+        # First matching region per row in hint order, None when nothing matches
+        hits = self.hits(df, **kw)
+        labels = np.asarray(self.regions + [None], dtype=object)
+        return pd.Series(labels[np.where(hits.any(axis=1), hits.argmax(axis=1), -1)], index=df.index)
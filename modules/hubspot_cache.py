@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_PATH = os.getenv("HUBSPOT_CACHE_PATH", ".hubspot_cache.sqlite")
+DEFAULT_TTL = 7 * 24 * 3600  # seconds; stale IDs fall back to a remote search
+
+def props_hash(props: dict) -> str:
+    return hashlib.sha1(json.dumps(props, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class HubSpotCache:
+    # Local SQLite map of domain -> company_id and email -> (contact_id, hash of last pushed properties)
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS companies (domain TEXT PRIMARY KEY, company_id TEXT NOT NULL, updated_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS contacts (email TEXT PRIMARY KEY, contact_id TEXT NOT NULL, props_hash TEXT, updated_at REAL NOT NULL);
+        """)
+
+    def _fresh_after(self) -> float:
+        return time.time() - self.ttl if self.ttl else 0.0
+
+    def _get(self, sql, key):
+        with self._lock:
+            row = self._db.execute(sql, (key, self._fresh_after())).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return row
+
+    def get_company(self, domain: str):
+        row = self._get("SELECT company_id FROM companies WHERE domain = ? AND updated_at >= ?", domain.lower())
+        return row[0] if row else None
+
+    def get_contact(self, email: str):
+        # (contact_id, props_hash) or None
+        return self._get("SELECT contact_id, props_hash FROM contacts WHERE email = ? AND updated_at >= ?", email.lower())
+
+    def put_companies(self, items):
+        # items: iterable of (domain, company_id)
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO companies VALUES (?, ?, ?)",
+                                 [(d.lower(), str(cid), now) for d, cid in items if d])
+
+    def put_contacts(self, items):
+        # items: iterable of (email, contact_id, props_hash or None)
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO contacts VALUES (?, ?, ?, ?)",
+                                 [(e.lower(), str(cid), h, now) for e, cid, h in items if e])
+
+    def put_company(self, domain: str, company_id):
+        self.put_companies([(domain, company_id)])
+
+    def put_contact(self, email: str, contact_id, phash: str = None):
+        self.put_contacts([(email, contact_id, phash)])
+
+    def invalidate(self, domain: str = None, email: str = None):
+        with self._lock, self._db:
+            if domain:
+                self._db.execute("DELETE FROM companies WHERE domain = ?", (domain.lower(),))
+            if email:
+                self._db.execute("DELETE FROM contacts WHERE email = ?", (email.lower(),))
+
+    def purge_expired(self) -> int:
+        cutoff = self._fresh_after()
+        with self._lock, self._db:
+            n = self._db.execute("DELETE FROM companies WHERE updated_at < ?", (cutoff,)).rowcount
+            n += self._db.execute("DELETE FROM contacts WHERE updated_at < ?", (cutoff,)).rowcount
+        return n
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM companies")
+            self._db.execute("DELETE FROM contacts")
+
+    def stats(self) -> dict:
+        with self._lock:
+            companies = self._db.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+            contacts = self._db.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+        return {"companies": companies, "contacts": contacts, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self._db.close()
+
+def _list_all(kind: str, prop: str, **http):
+    # Pages through GET /crm/v3/objects/<kind> 100 at a time, yielding (prop value, id)
+    from modules.sync_hubspot import _request
+    after = None
+    while True:
+        params = {"limit": 100, "properties": prop, "archived": "false"}
+        if after:
+            params["after"] = after
+        r = _request("GET", f"/crm/v3/objects/{kind}", params=params, **http)
+        r.raise_for_status()
+        js = r.json()
+        for res in js.get("results", []):
+            value = (res.get("properties") or {}).get(prop)
+            if value:
+                yield value, res["id"]
+        after = ((js.get("paging") or {}).get("next") or {}).get("after")
+        if not after:
+            return
+
+def warm_cache(cache: HubSpotCache, **http) -> dict:
+    # Bulk-loads every company domain and contact email so the next sync starts with cache hits
+    companies = list(_list_all("companies", "domain", **http))
+    cache.put_companies(companies)
+    contacts = list(_list_all("contacts", "email", **http))
+    cache.put_contacts((email, cid, None) for email, cid in contacts)
+    return {"companies": len(companies), "contacts": len(contacts)}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Manage the local HubSpot company/contact ID cache.")
+    parser.add_argument("command", choices=["warm", "stats", "purge", "clear"])
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="Entry lifetime in seconds (0 = never expire)")
+    parser.add_argument("--max-rps", type=float, default=10.0)
+    args = parser.parse_args()
+    cache = HubSpotCache(args.path, ttl=args.ttl)
+    if args.command == "warm":
+        from modules.sync_hubspot import hubspot_session
+        from modules.utils import TokenBucket
+        print(warm_cache(cache, session=hubspot_session(), limiter=TokenBucket(args.max_rps)))
+    elif args.command == "purge":
+        print({"purged": cache.purge_expired()})
+    elif args.command == "clear":
+        cache.clear()
+    print(cache.stats())
+    cache.close()
@@ -0,0 +1,307 @@
+import io
+import re
+import csv
+import difflib
+import zipfile
+import operator
+import posixpath
+import itertools
+from functools import lru_cache
+import pandas as pd
+
+from modules.schema import CANONICAL_COLUMNS
+
+PARSER_VERSION = 2  # bump when ingestion changes so cached frames are re-parsed
+HEADER_SCAN_ROWS = 20  # rows searched for the header on every sheet
+MIN_HEADER_MATCHES = 2  # a sheet needs this many recognised columns unless no sheet has them
+FUZZY_CUTOFF = 0.85
+CHUNKSIZE = 50_000
+
+# The one header alias table: canonical column -> spellings seen in CRM exports, event lists and
+# IndiaMART downloads. first_name/last_name are joined into contact_name when there is no full name.
+ALIASES = {
+    "company_name": ["company", "company name", "companyname", "account", "account name", "organization",
+                     "organisation", "organization name", "exhibitor", "exhibitor name", "firm", "firm name",
+                     "business name", "supplier", "supplier name", "seller name"],
+    "contact_name": ["name", "contact", "contact name", "contact person", "full name", "person", "buyer name"],
+    "first_name": ["first name", "firstname", "given name"],
+    "last_name": ["last name", "lastname", "surname", "family name"],
+    "email": ["email", "e-mail", "mail", "email address", "email id", "e-mail id", "mail id"],
+    "phone": ["phone", "phone number", "phone no", "tel", "telephone", "mobile", "mobile number", "mobile no",
+              "contact number", "contact no", "cell", "whatsapp"],
+    "website": ["website", "web", "site", "url", "website url", "web address", "homepage", "company domain name",
+                "domain"],
+    "country": ["country", "country/region", "nation"],
+    "state": ["state", "state/province", "province", "state/region", "region"],
+    "city": ["city", "town", "location"],
+    "industry": ["industry", "sector", "segment", "business type"],
+    "job_title": ["title", "job title", "job", "designation", "position", "role"],
+    "notes": ["notes", "note", "description", "remarks", "comments", "requirement", "product", "products"],
+}
+# Header words that mean a column is about a field rather than the field itself ("Email opt out"), or about
+# someone on the exporting side rather than the lead ("Contact owner", "Assigned to", "Created by")
+NOT_A_FIELD = {"opt", "out", "optout", "unsubscribed", "bounce", "bounced", "date", "count", "status", "type",
+               "key", "has", "free", "flag", "verified", "score", "stage", "source", "id", "owner", "owners",
+               "assigned", "assignee", "created", "modified", "updated", "by", "rep", "representative"}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+def _norm(header) -> str:
+    return " ".join(_NON_ALNUM.sub(" ", str(header).lower()).split())
+
+ALIAS_INDEX = {}
+for _canonical, _aliases in ALIASES.items():
+    for _alias in [_canonical] + _aliases:
+        ALIAS_INDEX.setdefault(_norm(_alias), _canonical)
+        ALIAS_INDEX.setdefault(_norm(_alias).replace(" ", ""), _canonical)
+# Longest phrases first, so "company name" wins over "name" inside "Company Name (Legal)"
+_PHRASES = sorted((a for a in ALIAS_INDEX if " " in a or len(a) > 3), key=len, reverse=True)
+
+@lru_cache(maxsize=4096)
+def match_header(header, fuzzy: bool = True):
+    # (canonical column, strength) for a header: 3 exact alias, 2 alias phrase inside it, 1 close spelling
+    h = _norm(header)
+    if not h:
+        return None, 0
+    if h in ALIAS_INDEX or h.replace(" ", "") in ALIAS_INDEX:
+        return ALIAS_INDEX.get(h) or ALIAS_INDEX[h.replace(" ", "")], 3
+    if not fuzzy or NOT_A_FIELD & set(h.split()):
+        return None, 0
+    padded = f" {h} "
+    for phrase in _PHRASES:
+        if f" {phrase} " in padded:
+            return ALIAS_INDEX[phrase], 2
+    close = difflib.get_close_matches(h, ALIAS_INDEX.keys(), n=1, cutoff=FUZZY_CUTOFF)
+    return (ALIAS_INDEX[close[0]], 1) if close else (None, 0)
+
+def resolve_columns(headers, fuzzy: bool = True) -> dict:
+    # {position: canonical column}; each canonical column comes from its best-matching header (first on ties)
+    best = {}
+    for i, h in enumerate(headers):
+        canonical, strength = match_header(h, fuzzy) if h is not None else (None, 0)
+        if canonical and strength > best.get(canonical, (None, 0))[1]:
+            best[canonical] = (i, strength)
+    # Split name columns beat a contact_name that was only guessed from a phrase or a close spelling
+    if best.get("contact_name", (None, 3))[1] < 3 and ("first_name" in best or "last_name" in best):
+        del best["contact_name"]
+    return {i: c for c, (i, _) in best.items()}
+
+def sniff_header(rows, fuzzy: bool = True):
+    # (row index, {position: canonical}) of the row among `rows` that resolves the most columns
+    best = (None, {})
+    for i, row in enumerate(rows):
+        mapping = resolve_columns(row, fuzzy)
+        if len(mapping) > len(best[1]):
+            best = (i, mapping)
+    return best
+
+def _finish(df: pd.DataFrame) -> pd.DataFrame:
+    # Canonical column order; split first/last names become contact_name
+    if "first_name" in df.columns or "last_name" in df.columns:
+        if "contact_name" not in df.columns:
+            parts = [df[c].astype(object).where(df[c].notna(), "").astype(str).str.strip()
+                     for c in ["first_name", "last_name"] if c in df.columns]
+            full = parts[0] if len(parts) == 1 else (parts[0] + " " + parts[1]).str.strip()
+            df["contact_name"] = full.where(full != "", None)
+        df = df.drop(columns=[c for c in ["first_name", "last_name"] if c in df.columns])
+    return df.reindex(columns=CANONICAL_COLUMNS)
+
+def _frame(rows, mapping: dict) -> pd.DataFrame:
+    # rows: tuples of the mapped cells only, in mapping order
+    return _finish(pd.DataFrame(rows, columns=list(mapping.values()), dtype=object))
+
+def _pick_sheets(sheets):
+    # (mapping, rows) pairs with a real header; a lone weaker sheet is still taken when nothing better exists
+    good = [s for s in sheets if len(s[0]) >= MIN_HEADER_MATCHES]
+    if good:
+        return good
+    best = max(sheets, key=lambda s: len(s[0]), default=None)
+    return [best] if best and best[0] else []
+
+def _row_chunks(rows, mapping: dict, chunksize: int):
+    # Mapped cells are picked with one itemgetter call per row; short rows are padded first
+    cols = list(mapping)
+    width, blank = max(cols) + 1, len(cols)
+    pick = operator.itemgetter(*cols) if len(cols) > 1 else (lambda row: (row[cols[0]],))
+    pad = (None,) * width
+    buf = []
+    for row in rows:
+        if len(row) < width:
+            row = tuple(row) + pad[len(row):]
+        cells = pick(row)
+        if cells.count(None) < blank:
+            buf.append(cells)
+            if len(buf) >= chunksize:
+                yield _frame(buf, mapping)
+                buf = []
+    if buf:
+        yield _frame(buf, mapping)
+
+def _sniffed(rows):
+    # (mapping, remaining data rows) for one sheet's row iterator
+    rows = iter(rows)
+    head = [row for _, row in zip(range(HEADER_SCAN_ROWS), rows)]
+    h, mapping = sniff_header(head)
+    return mapping, itertools.chain(head[h + 1:] if h is not None else [], rows)
+
+def _local(tag) -> str:
+    return tag.rpartition("}")[2]
+
+def _xlsx_index(zf: zipfile.ZipFile):
+    # (shared strings, is-date flag per cell style, worksheet part names in workbook order). Namespaces are
+    # matched by local name only, so transitional and strict OOXML files both work.
+    from lxml import etree
+    from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+    rels = {}
+    for rel in etree.fromstring(zf.read("xl/_rels/workbook.xml.rels")):
+        target = rel.get("Target")
+        if rel.get("Type", "").endswith("/worksheet"):
+            rels[rel.get("Id")] = target.lstrip("/") if target.startswith("/") else posixpath.normpath(f"xl/{target}")
+    parts = []
+    for el in etree.fromstring(zf.read("xl/workbook.xml")).iter():
+        if _local(el.tag) == "sheet":
+            rid = next(v for k, v in el.attrib.items() if _local(k) == "id")
+            if rid in rels:
+                parts.append(rels[rid])
+    strings = []
+    if "xl/sharedStrings.xml" in zf.namelist():
+        for _, si in etree.iterparse(zf.open("xl/sharedStrings.xml"), events=("end",), tag="{*}si"):
+            strings.append("".join(t.text or "" for t in si.iter("{*}t") if _local(t.getparent().tag) != "rPh"))
+            si.clear()
+    dates = []
+    if "xl/styles.xml" in zf.namelist():
+        styles = etree.fromstring(zf.read("xl/styles.xml"))
+        custom = {int(f.get("numFmtId")): f.get("formatCode") for f in styles.iter("{*}numFmt")}
+        for xfs in styles.iter("{*}cellXfs"):
+            for xf in xfs:
+                fmt = int(xf.get("numFmtId", 0))
+                dates.append(is_date_format(custom.get(fmt) or BUILTIN_FORMATS.get(fmt) or "General"))
+    return strings, dates, parts
+
+@lru_cache(maxsize=1024)
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+class _XlsxSheet:
+    # Row tuples of one worksheet straight from its XML, valued like openpyxl's read-only values_only rows
+    # (shared/inline strings, int or float numbers, dates for date-styled numbers, booleans). Once `columns`
+    # is set (after the header is sniffed), cells outside it are skipped without being decoded.
+    def __init__(self, zf: zipfile.ZipFile, part: str, strings: list, dates: list):
+        self.zf, self.part, self.strings, self.dates = zf, part, strings, dates
+        self.columns = None
+
+    def __iter__(self):
+        from lxml import etree
+        from openpyxl.utils.datetime import from_excel
+        strings, dates = self.strings, self.dates
+        for _, row in etree.iterparse(self.zf.open(self.part), events=("end",), tag="{*}row"):
+            cells = self._cells(row, strings, dates, from_excel)
+            if cells:
+                yield tuple(map(cells.get, range(max(cells) + 1)))
+            row.clear()
+            while row.getprevious() is not None:
+                del row.getparent()[0]
+
+    def _cells(self, row, strings, dates, from_excel) -> dict:
+        # {column index: value} of one <row> element
+        cells, col, columns = {}, -1, self.columns
+        for c in row:
+            ref = c.get("r")
+            col = _col_index(ref.rstrip("0123456789")) if ref else col + 1
+            if columns is not None and col not in columns:
+                continue
+            t = c.get("t", "n")
+            if t == "inlineStr":
+                cells[col] = "".join(x.text or "" for x in c.iter("{*}t"))
+                continue
+            v = next((x.text for x in c if _local(x.tag) == "v"), None)
+            if v is None:
+                continue
+            if t == "s":
+                cells[col] = strings[int(v)]
+            elif t == "n":
+                num = float(v) if "." in v or "E" in v or "e" in v else int(v)
+                style = int(c.get("s", 0))
+                cells[col] = from_excel(num) if style < len(dates) and dates[style] else num
+            elif t == "b":
+                cells[col] = v == "1"
+            else:  # str (formula result), e (error), d (ISO date)
+                cells[col] = v
+        return cells
+
+def _excel_chunks(source, chunksize: int):
+    # Sheets are parsed from their XML with lxml, skipping openpyxl's per-cell objects; workbooks that
+    # reader does not understand go through openpyxl read-only mode. Either way rows stream, so unmapped
+    # columns and sheets are never materialised.
+    from lxml import etree
+    with zipfile.ZipFile(source) as zf:
+        try:
+            strings, dates, parts = _xlsx_index(zf)
+        except (KeyError, ValueError, StopIteration, etree.LxmlError):
+            parts = None
+        if parts:
+            sheets = []
+            for part in parts:
+                rows = _XlsxSheet(zf, part, strings, dates)
+                mapping, rest = _sniffed(rows)
+                rows.columns = set(mapping)
+                sheets.append((mapping, rest))
+            for mapping, rows in _pick_sheets(sheets):
+                yield from _row_chunks(rows, mapping, chunksize)
+            return
+    yield from _openpyxl_chunks(source, chunksize)
+
+def _openpyxl_chunks(source, chunksize: int):
+    from openpyxl import load_workbook
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheets = [_sniffed(ws.iter_rows(values_only=True)) for ws in wb.worksheets]
+        for mapping, rows in _pick_sheets(sheets):
+            yield from _row_chunks(rows, mapping, chunksize)
+    finally:
+        wb.close()
+
+def _xls_chunks(source, chunksize: int):
+    # Legacy .xls has no streaming reader; sniff and map the fully loaded sheets instead
+    sheets = [_sniffed(raw.astype(object).where(raw.notna(), None).itertuples(index=False, name=None))
+              for raw in pd.read_excel(source, header=None, sheet_name=None, dtype=object).values()]
+    for mapping, rows in _pick_sheets(sheets):
+        yield from _row_chunks(rows, mapping, chunksize)
+
+def _csv_chunks(source, chunksize: int):
+    # Header sniffed with the csv module (it tolerates preamble lines narrower than the header, unlike
+    # pandas' field-count guess); then pandas streams only the mapped columns from the line after it
+    fh = open(source, newline="", encoding="utf-8-sig", errors="replace") if isinstance(source, str) else \
+        io.TextIOWrapper(source, encoding="utf-8-sig", errors="replace", newline="") if not isinstance(source, io.TextIOBase) else source
+    try:
+        head = [[v.strip() or None for v in row] for _, row in zip(range(HEADER_SCAN_ROWS), csv.reader(fh))]
+        h, mapping = sniff_header(head)
+        if h is None:
+            return
+        fh.seek(0)
+        for chunk in pd.read_csv(fh, header=None, skiprows=h + 1, usecols=list(mapping), dtype=object, chunksize=chunksize):
+            chunk = chunk.dropna(how="all").rename(columns=mapping)
+            if len(chunk):
+                yield _finish(chunk.astype(object).where(chunk.notna(), None).reset_index(drop=True))
+    finally:
+        if isinstance(source, str):
+            fh.close()
+        elif isinstance(fh, io.TextIOWrapper) and fh is not source:
+            fh.detach()  # leave the caller's binary file open
+
+def iter_table(source, chunksize: int = CHUNKSIZE):
+    # source: path or uploaded file object (CSV/XLSX/XLSM/XLS); yields canonical-column frames of at most chunksize rows
+    name = str(getattr(source, "name", source)).lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        yield from _excel_chunks(source, chunksize)
+    elif name.endswith(".xls"):
+        yield from _xls_chunks(source, chunksize)
+    else:
+        yield from _csv_chunks(source, chunksize)
+
+def read_table(source) -> pd.DataFrame:
+    frames = list(iter_table(source))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=CANONICAL_COLUMNS)
@@ -0,0 +1,214 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+from modules.diskcache import DiskCache, content_key
+from modules.parse_cache import parse_cache
+
+WORKERS = int(os.getenv("LEADGEN_JOB_WORKERS", 2))
+KEEP_FINISHED = 32  # finished jobs kept in memory; older ones are reloaded from disk on demand
+# Seconds a finished result is served for its key, per job kind. A search result lives as long as the raw CSE
+# pages it came from (extract_google.CSE_CACHE_TTL); 0 keeps it in memory only, and only until the key is
+# submitted again (rescores describe the store at one moment).
+RESULT_TTL = {"google_search": 24 * 3600, "event_pdf": 30 * 24 * 3600, "hubspot_sync": 7 * 24 * 3600, "rescore": 0}
+DEFAULT_RESULT_TTL = 24 * 3600
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+class JobCancelled(Exception):
+    # Raised by Job.check(); a job function may raise it with the result it got to (JobCancelled(totals))
+    pass
+
+class Job:
+    # One background job. Only its worker thread writes it; Streamlit reruns read it through snapshot(),
+    # since a worker thread has no script context and cannot touch st.session_state itself.
+    def __init__(self, key: str, kind: str, label: str = ""):
+        self.key, self.kind, self.label = key, kind, label
+        self.status = QUEUED
+        self.done, self.total, self.message = 0, None, ""
+        self.result, self.error = None, None
+        self.created, self.started, self.finished = time.time(), None, None
+        self._partial = []
+        self._rows = 0
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def reusable(self) -> bool:
+        # Served again for its key: still running, or finished cleanly within its kind's TTL. A result that
+        # reports failed rows (a sync with failures) is rerun, so its journal retries just those rows.
+        if self.active:
+            return True
+        if self.status != DONE or (isinstance(self.result, dict) and self.result.get("failed")):
+            return False
+        ttl = RESULT_TTL.get(self.kind, DEFAULT_RESULT_TTL)
+        return ttl > 0 and time.time() - (self.finished or 0) <= ttl
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check(self):
+        # Cooperative cancellation point for job functions
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def progress(self, done: int, total: int = None, message: str = None, check: bool = True):
+        # check=False for callers that poll job.cancelled themselves and must not be unwound mid-step
+        with self._lock:
+            self.done = done
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+        if check:
+            self.check()
+
+    def emit(self, df: pd.DataFrame):
+        # Partial rows as they are extracted; kept if the job is cancelled or fails part-way
+        if df is not None and len(df):
+            with self._lock:
+                self._partial.append(df)
+                self._rows += len(df)
+
+    def partial(self) -> pd.DataFrame:
+        with self._lock:
+            frames = list(self._partial)
+        return pd.concat(frames, ignore_index=True) if frames else None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = (self.finished or time.time()) - (self.started or self.created)
+            return {"key": self.key, "kind": self.kind, "label": self.label, "status": self.status,
+                    "done": self.done, "total": self.total, "message": self.message, "partial_rows": self._rows,
+                    "error": self.error, "elapsed_s": round(elapsed, 1) if self.started else 0.0}
+
+class JobRunner:
+    # Thread pool for extractions, rescoring and HubSpot syncs that outlive the Streamlit rerun which
+    # started them. Jobs are identified by a caller-chosen content key: submitting a key that is queued,
+    # running or finished (within its kind's RESULT_TTL) returns that job instead of starting another, and
+    # clean results (frames or JSON-able dicts) are persisted, so a rerun or a restarted server picks them
+    # up instead of restarting. force=True always starts over.
+    def __init__(self, workers: int = WORKERS, directory: str = None):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="leadgen-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = DiskCache("jobs", directory=directory, ttl=max([DEFAULT_RESULT_TTL, *RESULT_TTL.values()]))
+        self._store.prune()
+
+    def submit(self, kind: str, key: str, fn, label: str = "", force: bool = False) -> Job:
+        # fn(job) -> result. One lock spans the lookup and the start, so sessions submitting the same key
+        # at once share one job.
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None and not force:
+                job = self._load(key)
+            if job is not None and not force and job.reusable:
+                self._jobs[key] = job
+                self._jobs.move_to_end(key)
+                return job
+            if job is not None and job.active:
+                job.cancel()  # forced restart of a job that is still running
+            job = Job(key, kind, label)
+            self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            self._prune()
+            self._pool.submit(self._run, job, fn)
+        return job
+
+    def get(self, key: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(key)
+        if job is None and key:
+            job = self._load(key)
+            if job is not None:
+                with self._lock:
+                    job = self._jobs.setdefault(key, job)
+        return job
+
+    def cancel(self, key: str):
+        job = self.get(key)
+        if job is not None:
+            job.cancel()
+
+    def forget(self, key: str):
+        # Drop a finished job and its stored result (a running one is cancelled first)
+        with self._lock:
+            job = self._jobs.pop(key, None)
+        if job is not None:
+            job.cancel()
+        self._store.delete(key)
+
+    def jobs(self) -> list:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run(self, job: Job, fn):
+        job.status, job.started = RUNNING, time.time()
+        try:
+            job.check()
+            result = fn(job)
+            job.result, job.status = result, DONE
+        except JobCancelled as e:
+            job.result, job.status = e.args[0] if e.args else job.partial(), CANCELLED
+        except Exception as e:
+            job.result, job.status, job.error = job.partial(), FAILED, f"{type(e).__name__}: {e}"
+        finally:
+            job.finished = time.time()
+        if job.reusable:
+            try:
+                self._save(job)
+            except Exception as e:  # an unpersistable result is still served from memory
+                job.error = f"not persisted: {type(e).__name__}: {e}"
+
+    def _save(self, job: Job):
+        meta = {k: getattr(job, k) for k in ["kind", "label", "done", "total", "message", "started", "finished"]}
+        if isinstance(job.result, pd.DataFrame):
+            # Frames go through the parse cache's Parquet store, which is already size-capped
+            parse_cache().put(content_key("job", job.key), job.result)
+            meta["frame"] = True
+        else:
+            meta["result"] = job.result
+        self._store.set_json(job.key, meta)
+
+    def _load(self, key: str) -> Job:
+        meta = self._store.get_json(key)
+        if meta is None:
+            return None
+        job = Job(key, meta["kind"], meta.get("label", ""))
+        for k in ["done", "total", "message", "started", "finished"]:
+            setattr(job, k, meta.get(k))
+        job.status = DONE
+        if not job.reusable:  # past its kind's RESULT_TTL
+            self._store.delete(key)
+            return None
+        job.result = parse_cache().get(content_key("job", key)) if meta.get("frame") else meta.get("result")
+        if meta.get("frame") and job.result is None:
+            return None  # frame evicted from the parse cache
+        return job
+
+    def _prune(self):
+        finished = [k for k, j in self._jobs.items() if not j.active]
+        for k in finished[:max(len(finished) - KEEP_FINISHED, 0)]:
+            del self._jobs[k]
+
+_default = None
+_default_lock = threading.Lock()
+
+def job_runner() -> JobRunner:
+    # Process-wide instance: jobs survive reruns and are visible to every Streamlit session
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = JobRunner()
+        return _default
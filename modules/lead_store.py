@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import pandas as pd
+
+from modules.dedupe import normalize_company
+from modules.normalize import email_key, domain_key, phone_e164, calling_code
+from modules.score import score_leads, assign_lifecycle_stage
+
+DEFAULT_PATH = os.getenv("LEADGEN_STORE_PATH", "leads.sqlite")
+COLUMNS = ["company_name","contact_name","email","phone","website","country","state","city","industry","job_title","notes"]
+SCORE_COLUMNS = ["lead_score","lifecycle_stage","customer_type","priority_region","competitor_flag"]
+KEY_COLUMNS = ["email_key","domain_key","phone_key","company_key"]
+KEY_VERSION = 1  # PRAGMA user_version; bump when _keys changes so stored keys are re-derived on open
+_MISSING = {"", "nan", "none", "null", "<na>"}
+
+def _clean(v):
+    # Canonical text for storage: blanks become NULL, 9876543210.0 becomes "9876543210"
+    if v is None:
+        return None
+    if isinstance(v, float):
+        if v != v:
+            return None
+        if v.is_integer():
+            v = int(v)
+    s = str(v).strip()
+    return None if s.lower() in _MISSING else s
+
+def _row_hash(rec: dict) -> str:
+    return hashlib.sha1("\x1f".join(rec.get(c) or "" for c in COLUMNS).encode("utf-8")).hexdigest()
+
+def campaign_hash(industry_focus=None, regions=None, product_needs=None) -> str:
+    # Identifies the scoring parameters a stored score was computed with
+    params = {"industry_focus": sorted(industry_focus or []), "regions": list(regions or []),
+              "product_needs": sorted(product_needs or [])}
+    return hashlib.sha1(json.dumps(params).encode("utf-8")).hexdigest()[:16]
+
+def _keys(rec: dict) -> dict:
+    cc = next((c for c in map(calling_code, [rec.get("country"), rec.get("website"), rec.get("email")]) if c), None)
+    return {
+        "email_key": email_key(rec.get("email") or ""),
+        "domain_key": domain_key(rec.get("website") or ""),
+        "phone_key": phone_e164(rec.get("phone") or "", cc),
+        "company_key": normalize_company(rec.get("company_name") or ""),
+    }
+
+class LeadStore:
+    # SQLite lead repository. Identity: the normalized email when a row has one; otherwise the
+    # website domain, phone or company key, matched only against leads that have no email either
+    # side of the merge (a company-level row enriches the first contact-less lead of that company).
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        cols = ",\n".join(f"{c} TEXT" for c in COLUMNS + KEY_COLUMNS)
+        self._db.executescript(f"""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            CREATE TABLE IF NOT EXISTS leads (
+                id INTEGER PRIMARY KEY,
+                {cols},
+                row_hash TEXT NOT NULL,
+                lead_score INTEGER,
+                lifecycle_stage TEXT,
+                customer_type TEXT,
+                priority_region TEXT,
+                competitor_flag INTEGER,
+                scored_with TEXT,
+                first_seen REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS leads_email ON leads(email_key) WHERE email_key != '';
+            CREATE INDEX IF NOT EXISTS leads_domain ON leads(domain_key) WHERE domain_key != '';
+            CREATE INDEX IF NOT EXISTS leads_phone ON leads(phone_key) WHERE phone_key != '';
+            CREATE INDEX IF NOT EXISTS leads_company ON leads(company_key) WHERE company_key != '';
+            CREATE INDEX IF NOT EXISTS leads_score ON leads(lead_score);
+            CREATE INDEX IF NOT EXISTS leads_stage ON leads(lifecycle_stage, lead_score);
+            CREATE INDEX IF NOT EXISTS leads_region ON leads(priority_region, lead_score);
+        """)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] < KEY_VERSION:
+            self._rekey()
+
+    def _rekey(self):
+        # Stores written by an older _keys (e.g. last-10-digit phones) get their identity keys re-derived
+        with self._lock, self._db:
+            rows = self._db.execute(f"SELECT id, {', '.join(COLUMNS)} FROM leads").fetchall()
+            self._db.executemany(f"UPDATE leads SET {', '.join(f'{k} = ?' for k in KEY_COLUMNS)} WHERE id = ?",
+                                 [[*_keys(dict(zip(COLUMNS, r[1:]))).values(), r[0]] for r in rows])
+            self._db.execute(f"PRAGMA user_version = {KEY_VERSION}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def _match(self, recs) -> dict:
+        # batch position -> existing lead id, resolved with one indexed join per key kind
+        self._db.execute("DROP TABLE IF EXISTS temp.batch")
+        self._db.execute("CREATE TEMP TABLE batch (pos INTEGER PRIMARY KEY, email_key TEXT, domain_key TEXT, phone_key TEXT, company_key TEXT)")
+        self._db.executemany("INSERT INTO temp.batch VALUES (?, ?, ?, ?, ?)",
+                             [(i, r["email_key"], r["domain_key"], r["phone_key"], r["company_key"]) for i, r in enumerate(recs)])
+        found = {}
+        sql = """SELECT b.pos, MIN(l.id) FROM temp.batch b JOIN leads l ON l.{k} = b.{k}
+                 WHERE b.{k} != '' AND l.{k} != '' AND ({cond}) GROUP BY b.pos"""
+        steps = [("email_key", "b.email_key != ''")] + \
+                [(k, "b.email_key = '' OR l.email_key = ''") for k in ["domain_key", "phone_key", "company_key"]]
+        for k, cond in steps:
+            for pos, lead_id in self._db.execute(sql.format(k=k, cond=cond)):
+                found.setdefault(pos, lead_id)  # earlier key kinds win
+        self._db.execute("DROP TABLE temp.batch")
+        return found
+
+    def _existing(self, ids) -> dict:
+        out = {}
+        names = ["id"] + COLUMNS + KEY_COLUMNS + ["row_hash"]
+        ids = list(ids)
+        for i in range(0, len(ids), 900):
+            chunk = ids[i:i + 900]
+            q = f"SELECT {', '.join(names)} FROM leads WHERE id IN ({','.join('?' * len(chunk))})"
+            for row in self._db.execute(q, chunk):
+                out[row[0]] = dict(zip(names, row))
+        return out
+
+    def merge(self, df: pd.DataFrame, industry_focus=None, regions=None, product_needs=None) -> dict:
+        # Upsert a batch: non-empty incoming values overwrite stored ones, empty values never erase.
+        # Only inserted or changed leads are scored; unchanged matches are left alone.
+        batch = df.reindex(columns=COLUMNS)
+        recs = []
+        for values in batch.itertuples(index=False, name=None):
+            rec = {c: _clean(v) for c, v in zip(COLUMNS, values)}
+            if any(rec.values()):
+                rec.update(_keys(rec))
+                recs.append(rec)
+        now = time.time()
+        with self._lock, self._db:
+            matched = self._match(recs)
+            existing = self._existing(set(matched.values()))
+            pending, by_key = {}, {}  # merged records keyed by lead id (int) or new-row slot ("n<i>")
+            for pos, rec in enumerate(recs):
+                slot = matched.get(pos)
+                if slot is None:
+                    # Same identity rules for rows that only exist in this batch
+                    slot = by_key.get(("email_key", rec["email_key"])) if rec["email_key"] else None
+                    if slot is None:
+                        slot = next((by_key[(k, rec[k])] for k in ["domain_key", "phone_key", "company_key"]
+                                     if rec[k] and (k, rec[k]) in by_key
+                                     and not (rec["email_key"] and pending[by_key[(k, rec[k])]]["email_key"])), None)
+                cur = (pending.get(slot) or existing.get(slot) or {}) if slot is not None else {}
+                if rec["email_key"] and cur.get("email_key") and cur["email_key"] != rec["email_key"]:
+                    slot, cur = None, {}  # an earlier row in this batch already gave that lead another email
+                if slot is None:
+                    slot = f"n{pos}"
+                merged = {c: rec[c] if rec[c] is not None else cur.get(c) for c in COLUMNS}
+                merged.update(_keys(merged))
+                if "id" in cur:
+                    merged["id"] = cur["id"]
+                pending[slot] = merged
+                for k in KEY_COLUMNS:
+                    if merged[k]:
+                        by_key.setdefault((k, merged[k]), slot)
+            changed = []
+            for slot, rec in pending.items():
+                rec["row_hash"] = _row_hash(rec)
+                old = existing.get(slot)
+                if old is None or old["row_hash"] != rec["row_hash"]:
+                    changed.append(rec)
+            stats = {"rows": len(recs), "inserted": 0, "updated": 0, "unchanged": len(pending) - len(changed)}
+            if changed:
+                scored = assign_lifecycle_stage(score_leads(pd.DataFrame(changed, columns=COLUMNS),
+                                                            industry_focus, regions, product_needs))
+                tag = campaign_hash(industry_focus, regions, product_needs)
+                inserts, updates = [], []
+                for rec, s in zip(changed, scored[SCORE_COLUMNS].itertuples(index=False, name=None)):
+                    values = [rec[c] for c in COLUMNS + KEY_COLUMNS] + [rec["row_hash"], int(s[0]), s[1], s[2],
+                              _clean(s[3]), int(bool(s[4])), tag]
+                    if "id" in rec:
+                        updates.append(values + [now, rec["id"]])
+                    else:
+                        inserts.append(values + [now, now])
+                names = COLUMNS + KEY_COLUMNS + ["row_hash"] + SCORE_COLUMNS + ["scored_with"]
+                self._db.executemany(f"INSERT INTO leads ({', '.join(names)}, first_seen, updated_at) "
+                                     f"VALUES ({', '.join('?' * (len(names) + 2))})", inserts)
+                self._db.executemany(f"UPDATE leads SET {', '.join(f'{c} = ?' for c in names)}, updated_at = ? WHERE id = ?", updates)
+                stats["inserted"], stats["updated"] = len(inserts), len(updates)
+        return stats
+
+    def rescore(self, industry_focus=None, regions=None, product_needs=None, chunksize: int = 100_000,
+                progress=None) -> int:
+        # Recompute scores only for leads last scored with different campaign parameters. Each chunk commits
+        # on its own, so progress(rescored_so_far) may raise to stop between chunks and a later call resumes.
+        tag = campaign_hash(industry_focus, regions, product_needs)
+        n, last = 0, 0
+        while True:
+            with self._lock:
+                chunk = pd.read_sql_query(
+                    f"SELECT id, {', '.join(COLUMNS)} FROM leads WHERE id > ? AND (scored_with IS NULL OR scored_with != ?) ORDER BY id LIMIT ?",
+                    self._db, params=(last, tag, chunksize))
+            if chunk.empty:
+                return n
+            scored = assign_lifecycle_stage(score_leads(chunk, industry_focus, regions, product_needs))
+            rows = [(int(s), st, ct, _clean(pr), int(bool(cf)), tag, int(i))
+                    for i, s, st, ct, pr, cf in scored[["id"] + SCORE_COLUMNS].itertuples(index=False, name=None)]
+            with self._lock, self._db:
+                self._db.executemany("UPDATE leads SET lead_score = ?, lifecycle_stage = ?, customer_type = ?, "
+                                     "priority_region = ?, competitor_flag = ?, scored_with = ? WHERE id = ?", rows)
+            n += len(rows)
+            last = int(chunk["id"].iloc[-1])
+            if progress:
+                progress(n)
+
+    def _where(self, min_score=None, max_score=None, regions=None, stages=None):
+        clauses, params = [], []
+        if min_score is not None:
+            clauses.append("lead_score >= ?")
+            params.append(int(min_score))
+        if max_score is not None:
+            clauses.append("lead_score <= ?")
+            params.append(int(max_score))
+        if regions:
+            marks = ",".join("?" * len(regions))
+            clauses.append(f"(priority_region IN ({marks}) OR state IN ({marks}) OR country IN ({marks}))")
+            params += list(regions) * 3
+        if stages:
+            clauses.append(f"lifecycle_stage IN ({','.join('?' * len(stages))})")
+            params += list(stages)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def iter_query(self, min_score=None, max_score=None, regions=None, stages=None, columns=None,
+                   chunksize: int = 50_000):
+        # Filtered leads as DataFrame chunks, so large selections never sit in memory at once
+        where, params = self._where(min_score, max_score, regions, stages)
+        cols = ", ".join(columns or COLUMNS + SCORE_COLUMNS)
+        last = 0
+        while True:
+            with self._lock:
+                chunk = pd.read_sql_query(f"SELECT id, {cols} FROM leads{where}{' AND' if where else ' WHERE'} id > ? "
+                                          f"ORDER BY id LIMIT ?", self._db, params=params + [last, chunksize])
+            if chunk.empty:
+                return
+            last = int(chunk["id"].iloc[-1])
+            yield chunk.drop(columns="id")
+
+    def query(self, min_score=None, max_score=None, regions=None, stages=None, columns=None, limit: int = None) -> pd.DataFrame:
+        where, params = self._where(min_score, max_score, regions, stages)
+        cols = ", ".join(columns or COLUMNS + SCORE_COLUMNS)
+        sql = f"SELECT {cols} FROM leads{where} ORDER BY lead_score DESC, id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            df = pd.read_sql_query(sql, self._db, params=params)
+        if "competitor_flag" in df.columns:
+            df["competitor_flag"] = df["competitor_flag"].astype(bool)
+        return df
+
+    def close(self):
+        self._db.close()
+
+if __name__ == "__main__":
+    import argparse
+    from modules.campaigns import load_profiles
+    from modules.ingest import read_table
+    parser = argparse.ArgumentParser(description="Merge lead files into the local lead store, or query it.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    m = sub.add_parser("merge")
+    m.add_argument("inputs", nargs="+", help="CSV or XLSX lead files")
+    m.add_argument("--profile", help="Campaign profile JSON (see modules.campaigns) with industry_focus/regions/product_needs")
+    m.add_argument("--campaign", help="Name of the profile to score with (default: the first one)")
+    q = sub.add_parser("query")
+    q.add_argument("--min-score", type=int)
+    q.add_argument("--region", action="append")
+    q.add_argument("--stage", action="append")
+    q.add_argument("--out", help="CSV path (default: print the first rows)")
+    parser.add_argument("--db", default=DEFAULT_PATH)
+    args = parser.parse_args()
+    store = LeadStore(args.db)
+    if args.command == "merge":
+        profiles = load_profiles(args.profile) if args.profile else [{}]
+        profile = next((p for p in profiles if p.get("name") == args.campaign), None) if args.campaign else profiles[0]
+        if profile is None:
+            parser.error(f"no campaign named {args.campaign!r} in {args.profile}")
+        params = {k: profile.get(k) for k in ["industry_focus", "regions", "product_needs"]}
+        for path in args.inputs:
+            t = time.perf_counter()
+            stats = store.merge(read_table(path), **params)
+            print(path, stats, f"{time.perf_counter() - t:.2f}s")
+    else:
+        if args.out:
+            n = 0
+            for i, chunk in enumerate(store.iter_query(args.min_score, regions=args.region, stages=args.stage)):
+                chunk.to_csv(args.out, mode="w" if i == 0 else "a", header=i == 0, index=False)
+                n += len(chunk)
+            print({"rows": n, "out": args.out})
+        else:
+            print(store.query(args.min_score, regions=args.region, stages=args.stage, limit=20).to_string())
+    store.close()
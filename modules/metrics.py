@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import time
+import threading
+import contextvars
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is not reported
+    resource = None
+
+PROFILE_DIR = os.getenv("LEADGEN_PROFILE_DIR")  # set to dump cProfile/tracemalloc output for every collected run
+_ID_RE = re.compile(r"/\d+(?=/|$)")
+
+def _peak_rss() -> int:
+    # Process high-water mark in bytes (ru_maxrss is KiB on Linux, bytes on macOS)
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+def _rows(x):
+    return x if x is None or isinstance(x, int) else len(x)
+
+class Metrics:
+    # Stage and external-call records for one run. Thread-safe, so sync workers can record calls.
+    def __init__(self):
+        self.records = []
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, **rec):
+        rec.setdefault("ts", round(time.time(), 3))
+        with self._lock:
+            self.records.append(rec)
+
+    @contextmanager
+    def stage(self, name: str, rows_in=None, **extra):
+        # Yields the record; set rec["rows_out"] (a count or a frame) before the block ends.
+        # Peak memory is the growth of the process RSS high-water mark, plus the Python allocation
+        # peak when tracemalloc is on (tracemalloc's peak is reset, so nested stages share it).
+        rec = {"kind": "stage", "name": name, "rows_in": _rows(rows_in), "rows_out": None, **extra}
+        rss = _peak_rss()
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        t = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["wall_s"] = round(time.perf_counter() - t, 4)
+            rec["rows_out"] = _rows(rec["rows_out"])
+            rec["peak_rss_delta_mb"] = round((_peak_rss() - rss) / 1e6, 1)
+            if tracing:
+                rec["py_peak_delta_mb"] = round((tracemalloc.get_traced_memory()[1] - base) / 1e6, 1)
+            if rec["rows_in"] and rec["rows_out"] is not None:
+                rec["ratio"] = round(rec["rows_out"] / rec["rows_in"], 4)
+            self.add(**rec)
+
+    def call(self, name: str, wall_s: float, **extra):
+        self.add(kind="call", name=name, wall_s=round(wall_s, 4), **extra)
+
+    def summary(self) -> pd.DataFrame:
+        # One row per stage / call name: count, total and max wall time, rows, output ratio, peak memory, cache hits
+        if not self.records:
+            return pd.DataFrame()
+        df = pd.DataFrame(self.records)
+        for c in ["rows_in", "rows_out", "peak_rss_delta_mb", "status", "error"]:
+            if c not in df.columns:
+                df[c] = None
+        g = df.groupby(["kind", "name"], sort=False)
+        out = g.agg(count=("wall_s", "size"), total_s=("wall_s", "sum"), max_s=("wall_s", "max"),
+                    rows_in=("rows_in", lambda s: s.sum(min_count=1)), rows_out=("rows_out", lambda s: s.sum(min_count=1)),
+                    peak_rss_delta_mb=("peak_rss_delta_mb", "max")).reset_index()
+        out["ratio"] = (out["rows_out"] / out["rows_in"].where(out["rows_in"] > 0)).round(4)
+        failed = (pd.to_numeric(df["status"], errors="coerce") >= 400) | df["error"].notna()
+        out["errors"] = failed.groupby([df["kind"], df["name"]], sort=False).sum().values
+        if "cache" in df.columns:  # stages that may be served from the parse or stage cache
+            out["cache_hits"] = (df["cache"] == "hit").groupby([df["kind"], df["name"]], sort=False).sum().values
+        out[["rows_in", "rows_out"]] = out[["rows_in", "rows_out"]].astype("Int64")
+        return out.sort_values("total_s", ascending=False, kind="stable").reset_index(drop=True)
+
+    def write_jsonl(self, path: str, run: dict = None):
+        # Appends one line per record, each tagged with the run start so nightly files can be grouped
+        run = {"run_started": round(self.started, 3), **(run or {})}
+        with self._lock:
+            records = list(self.records)
+        with open(path, "a", encoding="utf-8") as fh:
+            for rec in records:
+                fh.write(json.dumps({**run, **rec}, default=str) + "\n")
+
+# The collector is per context, not per process: every Streamlit session runs its script in its own thread
+# of one server process, and a new thread (a job runner or pool thread included) starts with none active
+_active = contextvars.ContextVar("leadgen_metrics", default=None)
+
+def active():
+    return _active.get()
+
+def activate(m):
+    # Sets the current thread's collector and returns the previous one; stage()/call() below are no-ops while
+    # none is active
+    previous = _active.get()
+    _active.set(m)
+    return previous
+
+def propagate(fn):
+    # fn, run under the caller's collector from whichever pool thread calls it
+    m = _active.get()
+    def run(*args, **kwargs):
+        previous = activate(m)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            activate(previous)
+    return run
+
+@contextmanager
+def stage(name: str, rows_in=None, **extra):
+    m = _active.get()
+    if m is None:
+        yield {}
+        return
+    with m.stage(name, rows_in=rows_in, **extra) as rec:
+        yield rec
+
+def call(name: str, wall_s: float, **extra):
+    m = _active.get()
+    if m is not None:
+        m.call(name, wall_s, **extra)
+
+def endpoint(method: str, path: str) -> str:
+    # "PATCH /crm/v3/objects/contacts/123" -> "PATCH /crm/v3/objects/contacts/{id}"
+    return f"{method} {_ID_RE.sub('/{id}', path.split('?', 1)[0])}"
+
+@contextmanager
+def collect(path: str = None, profile_dir: str = None, run: dict = None):
+    # Activates a fresh Metrics for the block; appends it to `path` (JSONL) on exit. With profile_dir
+    # (or LEADGEN_PROFILE_DIR) the block also runs under cProfile and tracemalloc and dumps
+    # <stamp>.prof (open with pstats/snakeviz) and <stamp>.tracemalloc.txt (top allocation sites).
+    profile_dir = profile_dir or PROFILE_DIR
+    m = Metrics()
+    previous = activate(m)
+    profiler = None
+    if profile_dir:
+        import cProfile
+        os.makedirs(profile_dir, exist_ok=True)
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()  # one frame per trace; deep tracebacks make allocation-heavy parsers crawl
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield m
+    finally:
+        activate(previous)
+        if profiler is not None:
+            profiler.disable()
+            stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(m.started))
+            profiler.dump_stats(os.path.join(profile_dir, f"{stamp}.prof"))
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, cProfile.__file__), tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")])
+            top = snapshot.statistics("lineno")[:50]
+            with open(os.path.join(profile_dir, f"{stamp}.tracemalloc.txt"), "w", encoding="utf-8") as fh:
+                fh.write("\n".join(str(s) for s in top) + "\n")
+            if started_tracing:
+                tracemalloc.stop()
+        if path:
+            m.write_jsonl(path, run)
@@ -0,0 +1,186 @@
+import os
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# Multi-label public suffixes (plus hosting platforms whose subdomains are separate sites). Any other
+# TLD is its own suffix, as under the public suffix list's default "*" rule.
+PUBLIC_SUFFIXES = [
+    "co.in", "net.in", "org.in", "firm.in", "gen.in", "ind.in", "ac.in", "edu.in", "res.in", "gov.in", "nic.in",
+    "co.uk", "org.uk", "me.uk", "ltd.uk", "plc.uk", "ac.uk", "gov.uk",
+    "com.au", "net.au", "org.au", "edu.au", "co.nz", "co.za", "co.jp", "ne.jp", "or.jp", "co.kr", "or.kr",
+    "com.cn", "net.cn", "org.cn", "com.hk", "com.tw", "com.sg", "edu.sg", "com.my", "net.my", "co.id", "or.id",
+    "ac.id", "web.id", "co.th", "or.th", "in.th", "com.vn", "net.vn", "com.ph", "net.ph",
+    "co.ae", "net.ae", "org.ae", "ac.ae", "gov.ae", "com.sa", "net.sa", "com.qa", "com.om", "co.om", "com.bh",
+    "com.kw", "com.eg", "com.tr", "co.il", "com.pk", "com.bd", "com.np", "com.lk",
+    "com.br", "net.br", "org.br", "ind.br", "com.ar", "com.co", "com.pe", "com.mx", "cl",
+    "blogspot.com", "wixsite.com", "wordpress.com", "weebly.com", "github.io", "business.site", "godaddysites.com",
+]
+# Hosts shared by unrelated companies (mail providers, marketplaces, social sites): no domain key
+FREE_MAIL_PROVIDERS = {"gmail", "googlemail", "yahoo", "ymail", "rocketmail", "hotmail", "outlook", "live", "msn",
+                       "aol", "icloud", "me", "rediffmail", "protonmail", "gmx", "mail", "yandex"}
+SHARED_DOMAINS = {
+    "gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "rediffmail.com", "indiamart.com",
+    "tradeindia.com", "justdial.com", "exportersindia.com", "facebook.com", "linkedin.com",
+    "google.com", "youtube.com", "instagram.com", "twitter.com", "x.com", "wa.me",
+}
+# Country name, ISO code or ccTLD -> ITU calling code
+CALLING_CODES = {
+    "91": ["india", "in", "ind", "bharat"],
+    "971": ["uae", "united arab emirates", "ae", "dubai", "abu dhabi", "sharjah"],
+    "966": ["saudi", "saudi arabia", "ksa", "sa"], "968": ["oman", "om"], "974": ["qatar", "qa"],
+    "973": ["bahrain", "bh"], "965": ["kuwait", "kw"], "62": ["indonesia", "id"], "60": ["malaysia", "my"],
+    "66": ["thailand", "th"], "84": ["vietnam", "viet nam", "vn"], "63": ["philippines", "ph"], "65": ["singapore", "sg"],
+    "55": ["brazil", "brasil", "br"], "54": ["argentina", "ar"], "57": ["colombia", "co"], "56": ["chile", "cl"],
+    "51": ["peru", "pe"], "39": ["italy", "italia", "it"], "359": ["bulgaria", "bg"], "49": ["germany", "deutschland", "de"],
+    "33": ["france", "fr"], "34": ["spain", "espana", "es"], "44": ["uk", "united kingdom", "great britain", "england", "gb"],
+    "48": ["poland", "pl"], "31": ["netherlands", "holland", "nl"], "1": ["usa", "us", "united states", "united states of america", "canada", "ca"],
+    "52": ["mexico", "mx"], "86": ["china", "cn"], "81": ["japan", "jp"], "82": ["south korea", "korea", "kr"],
+    "61": ["australia", "au"], "64": ["new zealand", "nz"], "27": ["south africa", "za"], "20": ["egypt", "eg"],
+    "90": ["turkey", "turkiye", "tr"], "92": ["pakistan", "pk"], "880": ["bangladesh", "bd"], "94": ["sri lanka", "lk"],
+    "977": ["nepal", "np"], "972": ["israel", "il"], "7": ["russia", "ru"], "380": ["ukraine", "ua"],
+}
+CALLING_CODE = {name: code for code, names in CALLING_CODES.items() for name in names}
+# National numbers without a country hint are read as this country's
+DEFAULT_CALLING_CODE = os.getenv("LEADGEN_DEFAULT_CALLING_CODE", "91")
+# Countries whose leading 0 is part of the subscriber number rather than a trunk prefix
+KEEP_LEADING_ZERO = {"39"}
+KEY_COLUMNS = ["email_key", "domain_key", "phone_key", "free_email"]
+CACHE_SIZE = 1 << 18
+
+_HOST = re.compile(r"^(?:[a-z][a-z0-9+.-]*://)?(?:[^/@\s]*@)?([^/:?#@\s]+)")
+_IP = re.compile(r"^[\d.]+$")
+_PHONE_SPLIT = re.compile(r"[/,;]|\bor\b|\bext\b|\bx\d", re.I)
+_NON_DIGIT = re.compile(r"\D")
+_MISSING = {"", "nan", "none", "null", "<na>"}
+
+def _build_trie(suffixes) -> dict:
+    # Labels right to left; a "" key marks the end of a listed suffix
+    trie = {}
+    for suffix in suffixes:
+        node = trie
+        for label in reversed(suffix.split(".")):
+            node = node.setdefault(label, {})
+        node[""] = {}
+    return trie
+
+SUFFIX_TRIE = _build_trie(PUBLIC_SUFFIXES)
+
+def _text(v) -> str:
+    if v is None or v is pd.NA or (isinstance(v, float) and v != v):
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    s = str(v).strip()
+    return "" if s.lower() in _MISSING else s
+
+@lru_cache(maxsize=CACHE_SIZE)
+def registrable_domain(value) -> str:
+    # "https://shop.acme.co.in/x" -> "acme.co.in"; also takes bare hosts and emails. "" for IPs and bare suffixes.
+    m = _HOST.match(_text(value).lower())
+    labels = m.group(1).strip(".").split(".") if m else []
+    if len(labels) < 2 or _IP.match(m.group(1)):
+        return ""
+    node, depth = SUFFIX_TRIE, 1
+    for i, label in enumerate(reversed(labels)):
+        node = node.get(label)
+        if node is None:
+            break
+        if "" in node:
+            depth = i + 1
+    return ".".join(labels[-depth - 1:]) if len(labels) > depth else ""
+
+def domain_key(value) -> str:
+    # Registrable domain that identifies a company: "" for shared hosts and free-mail providers
+    dom = registrable_domain(value)
+    return "" if dom in SHARED_DOMAINS or dom.split(".", 1)[0] in FREE_MAIL_PROVIDERS else dom
+
+@lru_cache(maxsize=CACHE_SIZE)
+def email_key(value) -> str:
+    e = _text(value).lower().removeprefix("mailto:").split("?", 1)[0].strip()
+    local, _, host = e.rpartition("@")
+    return e if local and "." in host else ""
+
+def is_free_email(value) -> bool:
+    return registrable_domain(email_key(value)).split(".", 1)[0] in FREE_MAIL_PROVIDERS
+
+def calling_code(hint) -> str:
+    # Calling code for a country name/ISO code, or for the ccTLD of a website/email; "" when unknown
+    h = _text(hint).lower()
+    if h in CALLING_CODE:
+        return CALLING_CODE[h]
+    dom = registrable_domain(h) if "." in h else ""
+    return CALLING_CODE.get(dom.rsplit(".", 1)[-1], "") if dom else ""
+
+@lru_cache(maxsize=CACHE_SIZE)
+def phone_e164(value, cc: str = None) -> str:
+    # E.164 for the first number in `value`; national numbers (trunk 0 dropped) get calling code `cc`
+    s = _PHONE_SPLIT.split(_text(value).replace("(0)", ""), 1)[0].strip()
+    digits = _NON_DIGIT.sub("", s)
+    intl = s.startswith("+")
+    if digits.startswith("00"):
+        digits, intl = digits[2:], True
+    if not intl and digits:
+        cc = cc or DEFAULT_CALLING_CODE
+        if digits.startswith("0"):
+            digits = cc + (digits if cc in KEEP_LEADING_ZERO else digits.lstrip("0"))
+        elif not (digits.startswith(cc) and len(digits) > 10):
+            digits = cc + digits
+    return "+" + digits if 8 <= len(digits) <= 15 and digits[0] != "0" else ""
+
+def map_unique(values, fn, dtype=object) -> np.ndarray:
+    # fn over each distinct value once, broadcast back to every row
+    codes, uniq = pd.factorize(pd.Series(values, dtype=object).to_numpy(dtype=object), use_na_sentinel=False)
+    return np.asarray([fn(v) for v in uniq], dtype=dtype)[codes] if len(codes) else np.empty(0, dtype=dtype)
+
+def domain_keys(websites) -> np.ndarray:
+    return map_unique(websites, domain_key)
+
+def email_keys(emails) -> np.ndarray:
+    return map_unique(emails, email_key)
+
+def free_email_flags(emails) -> np.ndarray:
+    return map_unique(emails, is_free_email, dtype=bool)
+
+def calling_codes(*hints) -> np.ndarray:
+    # Calling code per row from the first hint column that resolves (e.g. country, then website, then email)
+    ccs = None
+    for h in hints:
+        cc = map_unique(h, calling_code)
+        ccs = cc if ccs is None else np.where(ccs == "", cc, ccs)
+    return ccs
+
+def phone_keys(phones, ccs=None) -> np.ndarray:
+    # E.164 per row; `ccs` (see calling_codes) gives the calling code of national numbers
+    phones = pd.Series(phones, dtype=object).to_numpy(dtype=object)
+    if ccs is None:
+        return map_unique(phones, phone_e164)
+    codes, uniq = pd.factorize(pd.MultiIndex.from_arrays([phones, ccs]), use_na_sentinel=False)
+    return np.asarray([phone_e164(p, c or None) for p, c in uniq], dtype=object)[codes] if len(codes) else phones
+
+def contact_keys(df: pd.DataFrame, keys=KEY_COLUMNS) -> pd.DataFrame:
+    # Derived key columns shared by dedupe, scoring, sync and the lead store. Keys already on the frame
+    # are reused as-is, so a stage downstream of add_contact_keys never re-derives them.
+    col = lambda c: df[c] if c in df.columns else pd.Series(None, index=df.index, dtype=object)
+    out = pd.DataFrame(index=df.index)
+    for k in keys:
+        if k in df.columns:
+            out[k] = df[k].to_numpy()
+        elif k == "email_key":
+            out[k] = email_keys(col("email"))
+        elif k == "domain_key":
+            out[k] = domain_keys(col("website"))
+        elif k == "free_email":
+            out[k] = free_email_flags(col("email"))
+        elif k == "phone_key":
+            # Country column first, else the ccTLD of the website, then of the email
+            out[k] = phone_keys(col("phone"), calling_codes(col("country"), col("website"), col("email")))
+    return out
+
+def add_contact_keys(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    keys = contact_keys(df)
+    for k in KEY_COLUMNS:
+        df[k] = keys[k]
+    return df
@@ -0,0 +1,180 @@
+import os
+from contextlib import nullcontext
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+POOL_MIN_ROWS = int(os.getenv("LEADGEN_POOL_MIN_ROWS", 200_000))  # smaller frames are processed in-process
+MIN_PARTITION_ROWS = 50_000  # below this a partition costs more to ship than to process
+
+def pool_workers(rows: int, workers: int = None) -> int:
+    # Processes worth using for a frame of `rows` rows; 1 means run in-process. Parallelism is opt-in:
+    # workers=None is 1, since forking from a threaded server (Streamlit, the job runner) risks deadlocks;
+    # the pipeline and CLIs pass their --workers.
+    if not workers or workers <= 1 or rows < POOL_MIN_ROWS:
+        return 1
+    return max(1, min(workers, rows // MIN_PARTITION_ROWS))
+
+def partition_bounds(n: int, parts: int) -> list:
+    # [(start, stop)] of `parts` contiguous, near-equal row ranges
+    edges = np.linspace(0, n, parts + 1).astype(np.int64)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    # The resource tracker is started first, so forked workers share it: segments a worker creates are
+    # tracked by this process and removed with it if a run dies half-way
+    resource_tracker.ensure_running()
+    return ProcessPoolExecutor(max_workers=workers)
+
+def to_arrow(df: pd.DataFrame) -> pa.Table:
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, ValueError):
+        # Mixed-type object columns (e.g. phones read as both int and str) are shipped as text
+        fixed = df.copy()
+        for c in fixed.columns[fixed.dtypes == object]:
+            fixed[c] = fixed[c].where(fixed[c].isna(), fixed[c].astype(str))
+        return pa.Table.from_pandas(fixed, preserve_index=False)
+
+def from_arrow(table: pa.Table) -> pd.DataFrame:
+    # Inverse of to_arrow: string[pyarrow] columns (large_string in Arrow) come back as string[pyarrow] rather
+    # than the pandas default string[python]
+    return table.to_pandas(types_mapper={pa.large_string(): pd.StringDtype("pyarrow")}.get)
+
+def _write_segment(table: pa.Table) -> SharedMemory:
+    # A new segment holding `table` as one Arrow IPC stream, sized exactly
+    sizer = pa.MockOutputStream()
+    with pa.ipc.new_stream(sizer, table.schema) as w:
+        w.write_table(table)
+    shm = SharedMemory(create=True, size=max(sizer.size(), 1))
+    try:
+        with pa.ipc.new_stream(pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf)), table.schema) as w:
+            w.write_table(table)
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return shm
+
+class SharedFrame:
+    # Row partitions of a frame as Arrow IPC streams in POSIX shared memory. Workers get a segment name and
+    # read the partition from it; nothing but names, offsets and small results crosses the process boundary,
+    # so no DataFrame is ever pickled. The creating process owns the segments and unlinks them on close.
+    def __init__(self, table: pa.Table, bounds):
+        self.parts, self._segments = [], []
+        try:
+            for start, stop in bounds:
+                shm = _write_segment(table.slice(start, stop - start))
+                self._segments.append(shm)
+                self.parts.append((shm.name, start, stop))
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def share(table: pa.Table) -> str:
+    # Worker-side output: writes `table` to a new segment and returns its name. The segment outlives the
+    # worker; the reader removes it with read_shared(name, remove=True), and the parent's unlink() is the
+    # backstop if a later step fails.
+    shm = _write_segment(table)
+    shm.close()
+    return shm.name
+
+def read_shared(name: str, remove: bool = False) -> pa.Table:
+    # One memcpy out of the mapping: Arrow-backed columns would otherwise keep it mapped (and unclosable)
+    # for as long as the reader holds any of their values
+    shm = SharedMemory(name=name)
+    try:
+        data = pa.py_buffer(bytes(shm.buf))
+    finally:
+        shm.close()
+        if remove:
+            shm.unlink()
+    with pa.ipc.open_stream(data) as reader:
+        return reader.read_all()
+
+def unlink(names):
+    # Removes segments by name; ones already removed by their reader are skipped
+    for name in names:
+        try:
+            shm = SharedMemory(name=name)
+        except FileNotFoundError:
+            continue
+        shm.close()
+        shm.unlink()
+
+def read_partition(name: str) -> pd.DataFrame:
+    return read_shared(name).to_pandas()
+
+def _partition_task(fn, name: str, args):
+    return fn(read_partition(name), *args)
+
+def _rows_task(fn, name: str, start: int, out_name: str, shape, dtype, args):
+    block = fn(read_partition(name), *args)
+    shm = SharedMemory(name=out_name)
+    try:
+        out = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        out[start:start + len(block)] = block
+        del out
+    finally:
+        shm.close()
+    return len(block)
+
+def map_partitions(fn, data, bounds=None, columns=None, workers: int = None, args=(), pool=None) -> list:
+    # [fn(partition, *args)] per row range in `bounds` (default: one contiguous range per worker), or
+    # [fn(frame, *args)] in-process for small inputs or workers=1. data is a DataFrame or an Arrow table (already
+    # gathered into partition order, say). fn must be a module-level function; results should be small
+    # (positions, counts, segment names from share()), since they are pickled back. pool: a process_pool()
+    # to reuse across calls.
+    is_table = isinstance(data, pa.Table)
+    if columns is not None:
+        data = data.select(columns) if is_table else data[columns]
+    n = pool_workers(len(data), workers)
+    if n <= 1:
+        return [fn(data.to_pandas() if is_table else data, *args)]
+    bounds = bounds or partition_bounds(len(data), n)
+    with SharedFrame(data if is_table else to_arrow(data), bounds) as shared, \
+            nullcontext(pool) if pool is not None else process_pool(min(n, len(bounds))) as pool:
+        return list(pool.map(_partition_task, [fn] * len(bounds), [name for name, _, _ in shared.parts],
+                             [args] * len(bounds)))
+
+def map_tasks(fn, items, workers: int = None, args=(), pool=None) -> list:
+    # [fn(item, *args)] for small picklable items (lists of segment names, say); in-process for workers=1
+    if pool is None and (not workers or workers <= 1 or len(items) <= 1):
+        return [fn(item, *args) for item in items]
+    with nullcontext(pool) if pool is not None else process_pool(min(workers, len(items))) as pool:
+        return list(pool.map(fn, items, *[[a] * len(items) for a in args]))
+
+def map_rows(fn, df: pd.DataFrame, width: int, dtype, columns=None, workers: int = None, args=()) -> np.ndarray:
+    # fn(partition, *args) -> (rows, width) array per contiguous partition, written by each worker straight
+    # into one shared (len(df), width) result; fn(df, *args) in-process for small frames
+    df = df[[c for c in columns if c in df.columns]] if columns is not None else df
+    n = pool_workers(len(df), workers)
+    if n <= 1:
+        return np.asarray(fn(df, *args), dtype=dtype).reshape(len(df), width)
+    shape, dtype = (len(df), width), np.dtype(dtype)
+    out_shm = SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    try:
+        with SharedFrame(to_arrow(df), partition_bounds(len(df), n)) as shared, process_pool(n) as pool:
+            parts = shared.parts
+            list(pool.map(_rows_task, [fn] * len(parts), [p[0] for p in parts], [p[1] for p in parts],
+                          [out_shm.name] * len(parts), [shape] * len(parts), [dtype] * len(parts), [args] * len(parts)))
+        out = np.ndarray(shape, dtype=dtype, buffer=out_shm.buf).copy()
+    finally:
+        out_shm.close()
+        out_shm.unlink()
+    return out
@@ -0,0 +1,139 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+import pandas as pd
+import pyarrow as pa
+
+from modules import ingest
+from modules.diskcache import CACHE_DIR, content_key
+
+MAX_BYTES = int(os.getenv("LEADGEN_PARSE_CACHE_BYTES", 512 * 1024 * 1024))
+MEMO_ENTRIES = 16
+
+def _file_digest(f) -> str:
+    # Hash an uploaded file's bytes without consuming it for the parser
+    pos = f.tell() if hasattr(f, "tell") else 0
+    data = f.read()
+    f.seek(pos)
+    return content_key(getattr(f, "name", ""), data)
+
+class ParseCache:
+    # Parsed frames keyed by (extractor, PARSER_VERSIONs, input bytes): an in-process LRU in front of
+    # Parquet files on disk, whose total size is capped by evicting the least recently used
+    def __init__(self, directory: str = None, max_bytes: int = MAX_BYTES, memo_entries: int = MEMO_ENTRIES):
+        self.root = os.path.join(directory or CACHE_DIR, "parsed")
+        self.max_bytes = max_bytes
+        self.memo_entries = memo_entries
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, parser, files, **kwargs) -> str:
+        # The file parsers read tables and map columns through modules.ingest, so its version is part of every
+        # key next to the parser module's own: an ingest change re-parses without bumping each extractor
+        module = sys.modules.get(parser.__module__)
+        version = (getattr(module, "PARSER_VERSION", 0), ingest.PARSER_VERSION)
+        files = files if isinstance(files, (list, tuple)) else [files]
+        return content_key(parser.__module__, parser.__qualname__, version, sorted(kwargs.items()),
+                           *[_file_digest(f) for f in files])
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.parquet")
+
+    def _remember(self, key: str, df: pd.DataFrame):
+        with self._lock:
+            self._memo[key] = df
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_entries:
+                self._memo.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            df = self._memo.get(key)
+            if df is not None:
+                self._memo.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return df
+        path = self._path(key)
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)  # mtime doubles as the LRU clock
+        except (OSError, pa.ArrowException):
+            return None
+        self.stats["disk_hits"] += 1
+        self._remember(key, df)
+        return df
+
+    def put(self, key: str, df: pd.DataFrame):
+        self._remember(key, df)
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp, index=False)
+        except (pa.ArrowException, ValueError):
+            # Mixed-type object columns (e.g. phones read as both int and str) are stored as text
+            fixed = df.copy()
+            for c in fixed.columns[fixed.dtypes == object]:
+                fixed[c] = fixed[c].where(fixed[c].isna(), fixed[c].astype(str))
+            fixed.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith(".parquet"):
+                st = os.stat(os.path.join(self.root, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                pass
+            total -= size
+
+    def parse(self, parser, files, **kwargs) -> pd.DataFrame:
+        # parser(files, **kwargs), or the cached result for the same bytes; callers get their own copy
+        key = self.key(parser, files, **kwargs)
+        df = self.get(key)
+        if df is None:
+            self.stats["misses"] += 1
+            df = parser(files, **kwargs)
+            if df is None:
+                return None
+            self.put(key, df)
+        return df.copy()
+
+    def info(self) -> dict:
+        files = [os.path.join(self.root, n) for n in os.listdir(self.root) if n.endswith(".parquet")]
+        return {**self.stats, "memory_entries": len(self._memo), "disk_entries": len(files),
+                "disk_bytes": sum(os.path.getsize(p) for p in files)}
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
+            for name in os.listdir(self.root):
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except OSError:
+                    pass
+            self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+_default = None
+_default_lock = threading.Lock()
+
+def parse_cache() -> ParseCache:
+    # Process-wide instance, so every Streamlit session and rerun shares one memo
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ParseCache()
+        return _default
+
+def cached_parse(parser, files, **kwargs) -> pd.DataFrame:
+    return parse_cache().parse(parser, files, **kwargs)
@@ -0,0 +1,142 @@
+import os
+import sys
+import time
+import inspect
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+
+from modules import metrics
+from modules.utils import normalize_columns
+from modules.schema import apply_schema
+from modules.dedupe import dedupe_leads
+from modules.campaigns import load_profiles, write_campaign_exports
+from modules.extractors import registry
+
+DEFAULT_PROFILE = {"name": "default", "min_score": 65}
+
+def discover(input_dir: str) -> list:
+    # Every supported file below input_dir, skipping Office lock files and dotfiles
+    paths = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if registry().for_file(name) and not name.startswith(("~$", ".")):
+                paths.append(os.path.join(root, name))
+    return paths
+
+def extract_file(path: str) -> pd.DataFrame:
+    # First registered extractor for the file type: tables as lead lists, PDFs as event lists, HTML as saved
+    # IndiaMART pages, then plugins. Extractors run in-process here; the pipeline already parallelizes across files.
+    ext = registry().for_file(path)
+    fn = ext.load()
+    kwargs = {"workers": 1} if "workers" in inspect.signature(fn).parameters else {}
+    with open(path, "rb") as fh:
+        df = fn([fh] if ext.multiple else fh, **kwargs)
+    return normalize_columns(df)
+
+def _extract_task(path: str):
+    # Worker: (path, frame or None, error or None, metric records); errors are returned so one bad file
+    # never kills the run, and the worker's own stage record travels back to the parent's collector
+    m = metrics.Metrics()
+    df, error = None, None
+    with m.stage(f"extract{os.path.splitext(path)[1].lower()}", path=path) as rec:
+        try:
+            df = rec["rows_out"] = extract_file(path)
+        except Exception as e:
+            error = rec["error"] = f"{type(e).__name__}: {e}"
+    return path, df, error, m.records
+
+def run_pipeline(input_dir: str, profiles, out_dir: str, workers: int = None, fuzzy: bool = False,
+                 lead_source: str = "Indiamart", sync: bool = False, sync_options: dict = None,
+                 progress=None) -> dict:
+    # extract (process pool) -> merge -> schema -> dedupe -> score per profile -> HubSpot CSVs [-> sync]
+    progress = progress or (lambda msg: None)
+    paths = discover(input_dir)
+    result = {"files": len(paths), "failed_files": [], "rows_extracted": 0, "rows_deduped": 0, "exports": {}, "sync": {}}
+    if not paths:
+        return result
+    frames = []
+    collector = metrics.active()
+    workers = workers or os.cpu_count() or 1
+    # workers=1 extracts in-process (no pickling, and visible to a profiler)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    done = as_completed([pool.submit(_extract_task, p) for p in paths]) if pool else map(_extract_task, paths)
+    with pool or nullcontext():
+        for i, res in enumerate(done, 1):
+            path, df, error, records = res.result() if pool else res
+            if collector is not None:
+                for rec in records:
+                    collector.add(**rec)
+            if error:
+                result["failed_files"].append({"path": path, "error": error})
+                progress(f"[{i}/{len(paths)}] FAIL {path}: {error}")
+                continue
+            frames.append(df)
+            progress(f"[{i}/{len(paths)}] ok   {path} ({len(df)} rows, {records[-1]['wall_s']:.2f}s)")
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return result
+    with metrics.stage("merge", sum(len(f) for f in frames), files=len(frames)) as rec:
+        df = rec["rows_out"] = apply_schema(pd.concat(frames, ignore_index=True))
+    result["rows_extracted"] = len(df)
+    # Dedupe and scoring use the same process count; frames under parallel.POOL_MIN_ROWS stay in-process
+    with metrics.stage("dedupe", df, fuzzy=fuzzy) as rec:
+        df = rec["rows_out"] = dedupe_leads(df, fuzzy=fuzzy, workers=workers)
+    result["rows_deduped"] = len(df)
+    progress(f"merged {result['rows_extracted']} rows, {result['rows_deduped']} after dedupe")
+    result["exports"] = write_campaign_exports(df, profiles, out_dir, lead_source=lead_source, workers=workers)
+    for name, (path, n) in result["exports"].items():
+        progress(f"{name}: {n} leads -> {path}")
+    if sync:
+        from modules.sync_hubspot import sync_dataframe_to_hubspot_batch
+        from modules.hubspot_cache import HubSpotCache, DEFAULT_PATH
+        opts = dict(sync_options or {})
+        cache = HubSpotCache(opts.pop("cache_path", DEFAULT_PATH))
+        for name, (path, n) in result["exports"].items():
+            if not n:
+                continue
+            with metrics.stage(f"sync:{name}", n) as rec:
+                res = sync_dataframe_to_hubspot_batch(pd.read_csv(path), cache=cache, journal_path=f"{path}.journal.jsonl",
+                                                      resume=True, **opts)
+                rec["rows_out"] = res["contacts_synced"]
+            res.pop("batches", None)
+            result["sync"][name] = res
+            progress(f"sync {name}: {res['contacts_synced']} synced, {res['unchanged']} unchanged, {res['failed']} failed")
+        cache.close()
+    return result
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Headless extract -> dedupe -> score -> HubSpot CSV run over a directory of lead files.")
+    parser.add_argument("input_dir", help="Directory of CSV/XLSX/PDF/HTML inputs (searched recursively)")
+    parser.add_argument("--campaigns", help="Campaign profile JSON (see modules.campaigns); default: one profile, min_score 65")
+    parser.add_argument("--out-dir", default="exports", help="Directory for hubspot_<profile>.csv files")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction, dedupe and scoring processes (default: CPU count, 1 with --profile)")
+    parser.add_argument("--fuzzy", action="store_true", help="Merge near-duplicate companies before scoring")
+    parser.add_argument("--lead-source", default="Indiamart")
+    parser.add_argument("--sync", action="store_true", help="Sync each export to HubSpot (batch mode, journaled, resumable)")
+    parser.add_argument("--max-rps", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary")
+    parser.add_argument("--metrics", help="Append per-stage and per-HubSpot-call metrics to this JSONL file")
+    parser.add_argument("--profile", help="Dump cProfile and tracemalloc output for this run into this directory")
+    args = parser.parse_args()
+    profiles = load_profiles(args.campaigns) if args.campaigns else [dict(DEFAULT_PROFILE)]
+    log = (lambda msg: None) if args.quiet else (lambda msg: print(msg, file=sys.stderr, flush=True))
+    t = time.perf_counter()
+    with metrics.collect(args.metrics, profile_dir=args.profile, run={"input_dir": args.input_dir}) as perf:
+        res = run_pipeline(args.input_dir, profiles, args.out_dir, workers=args.workers or (1 if args.profile else None), fuzzy=args.fuzzy,
+                           lead_source=args.lead_source, sync=args.sync, progress=log,
+                           sync_options={"max_rps": args.max_rps, "concurrency": args.concurrency})
+    if not args.quiet and perf.records:
+        print(perf.summary().to_string(index=False), file=sys.stderr)
+    summary = {k: res[k] for k in ["files", "rows_extracted", "rows_deduped"]}
+    summary.update(failed_files=len(res["failed_files"]), exports={n: c for n, (_, c) in res["exports"].items()},
+                   sync_failed=sum(s["failed"] for s in res["sync"].values()), seconds=round(time.perf_counter() - t, 2))
+    print(summary)
+    for f in res["failed_files"][:20]:
+        print(f"  {f['path']}: {f['error']}")
+    if not res["files"]:
+        raise SystemExit(2)
+    raise SystemExit(1 if res["failed_files"] or summary["sync_failed"] else 0)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+# Canonical lead frame: Arrow-backed strings for free text, categoricals for low-cardinality
+# columns, int8 score and a real bool flag. Applied once after extraction; later stages keep it.
+CANONICAL_COLUMNS = ["company_name","contact_name","email","phone","website","country","state","city","industry","job_title","notes"]
+TEXT_DTYPE = "string[pyarrow]"
+TEXT_COLUMNS = ["company_name", "contact_name", "email", "phone", "website", "job_title", "notes"]
+CATEGORY_COLUMNS = ["country", "state", "city", "industry", "customer_type", "priority_region", "lifecycle_stage"]
+LIFECYCLE_STAGES = ["lead", "marketingqualifiedlead", "salesqualifiedlead"]
+_MISSING = ["", "nan", "none", "null", "<na>"]
+
+def to_text(s: pd.Series) -> pd.Series:
+    # Arrow strings with blanks and "nan"/"None" placeholders as NA; 9876543210.0 stays "9876543210"
+    if s.dtype == TEXT_DTYPE:
+        return s
+    if pd.api.types.is_float_dtype(s.dtype):
+        vals = s.dropna()
+        if (vals == np.floor(vals)).all() and (vals.abs() < 2**63).all():
+            s = s.astype("Int64")
+    out = s.astype(TEXT_DTYPE).str.strip()
+    return out.mask(out.str.lower().isin(_MISSING))
+
+def to_category(s: pd.Series, categories=None) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype) and categories is None:
+        return s
+    text = to_text(s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s)
+    return pd.Series(pd.Categorical(text, categories=categories), index=s.index, name=s.name)
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for c in CANONICAL_COLUMNS:
+        if c not in df.columns:
+            df[c] = pd.Series(pd.NA, index=df.index, dtype=TEXT_DTYPE)
+    for c in TEXT_COLUMNS:
+        df[c] = to_text(df[c])
+    for c in CATEGORY_COLUMNS:
+        if c in df.columns:
+            df[c] = to_category(df[c], LIFECYCLE_STAGES if c == "lifecycle_stage" else None)
+    if "lead_score" in df.columns:
+        score = pd.to_numeric(df["lead_score"], errors="coerce").clip(0, 100)
+        df["lead_score"] = score.astype("int8") if score.notna().all() else score.astype("Int8")
+    if "competitor_flag" in df.columns:
+        df["competitor_flag"] = df["competitor_flag"].fillna(False).astype(bool)
+    return df
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
@@ -1,6 +1,12 @@
+import numpy as np
 import pandas as pd
 import re
 
+from modules.schema import TEXT_DTYPE, LIFECYCLE_STAGES, to_text, to_category
+from modules.normalize import KEY_COLUMNS, contact_keys
+from modules.geo import RegionResolver
+from modules.parallel import map_rows
+
 # EPS-tuned dictionaries
 INDUSTRY_KEYWORDS = {
     "Chemicals": ["chemical", "chem", "specialty", "resin", "solvent", "polymer", "intermediate"],
@@ -21,14 +27,28 @@ PRODUCT_KEYWORDS = {
 }
 
 REGION_HINTS = {
-    "India": ["india", "mumbai", "pune", "gujarat", "hyderabad", "vizag", "visakhapatnam", "bengaluru", "delhi", "noida", ".in"],
-    "Middle East": ["uae", "dubai", "abu dhabi", "saudi", "oman", "qatar", "bahrain", "kuwait", ".ae", ".sa", ".qa", ".om", ".bh", ".kw"],
-    "SE Asia": ["indonesia", "jakarta", "malaysia", "kuala lumpur", "thailand", "vietnam", "philippines", "singapore", ".id", ".my", ".th", ".vn", ".ph", ".sg"],
-    "South America": ["brazil", "argentina", "colombia", "chile", "peru", ".br", ".ar", ".co", ".cl", ".pe"],
-    "Italy": ["italy", "italia", "milan", "torino", ".it"],
-    "Bulgaria": ["bulgaria", "sofia", ".bg"],
-    "Europe": ["germany", "france", "spain", "uk", "poland", "netherlands", ".de", ".fr", ".es", ".uk", ".pl", ".nl"],
-    "North America": ["usa", "united states", "canada", "mexico", ".us", ".ca", ".mx"]
+    "India": ["india", "mumbai", "pune", "gujarat", "hyderabad", "vizag", "visakhapatnam", "bengaluru", "delhi", "noida", ".in",
+              "bharat", "bombay", "bangalore", "chennai", "kolkata", "ahmedabad", "vadodara", "surat", "ankleshwar", "vapi",
+              "bharuch", "thane", "nagpur", "nashik", "aurangabad", "maharashtra", "tamil nadu", "karnataka", "telangana",
+              "andhra pradesh", "uttar pradesh", "madhya pradesh", "west bengal", "rajasthan", "haryana", "punjab",
+              "kerala", "gurgaon", "gurugram", "ghaziabad", "faridabad", "indore", "jaipur", "lucknow", "kochi"],
+    "Middle East": ["uae", "dubai", "abu dhabi", "saudi", "oman", "qatar", "bahrain", "kuwait", ".ae", ".sa", ".qa", ".om", ".bh", ".kw",
+                    "united arab emirates", "sharjah", "ajman", "jebel ali", "riyadh", "jeddah", "dammam", "jubail", "yanbu",
+                    "ksa", "muscat", "sohar", "doha", "manama"],
+    "SE Asia": ["indonesia", "jakarta", "malaysia", "kuala lumpur", "thailand", "vietnam", "philippines", "singapore", ".id", ".my", ".th", ".vn", ".ph", ".sg",
+                "viet nam", "surabaya", "penang", "johor", "bangkok", "rayong", "hanoi", "ho chi minh", "manila", "cebu"],
+    "South America": ["brazil", "argentina", "colombia", "chile", "peru", ".br", ".ar", ".co", ".cl", ".pe",
+                      "brasil", "sao paulo", "são paulo", "rio de janeiro", "buenos aires", "bogota", "bogotá", "medellin",
+                      "santiago", "lima"],
+    "Italy": ["italy", "italia", "milan", "torino", ".it", "milano", "turin", "rome", "roma", "naples", "napoli", "bologna",
+              "venice", "lombardy", "lombardia", "piedmont", "piemonte", "veneto", "emilia romagna"],
+    "Bulgaria": ["bulgaria", "sofia", ".bg", "plovdiv", "varna", "burgas"],
+    "Europe": ["germany", "france", "spain", "uk", "poland", "netherlands", ".de", ".fr", ".es", ".uk", ".pl", ".nl",
+               "united kingdom", "england", "deutschland", "berlin", "hamburg", "munich", "frankfurt", "paris", "lyon",
+               "madrid", "barcelona", "london", "manchester", "warsaw", "amsterdam", "rotterdam"],
+    "North America": ["usa", "united states", "canada", "mexico", ".us", ".ca", ".mx",
+                      "united states of america", "us", "texas", "houston", "california", "new york", "new jersey",
+                      "louisiana", "ontario", "toronto", "alberta", "quebec", "monterrey", "mexico city"]
 }
 
 CUSTOMER_TYPES = {
@@ -40,84 +60,165 @@ CUSTOMER_TYPES = {
 
 COMPETITORS = ["busch", "edwards", "atlas copco", "pfeiffer", "leybold", "ingersoll rand", "gardner denver"]
 
-def _contains_any(text, keywords):
-    t = str(text).lower()
-    return any(k in t for k in keywords)
-
-def score_leads(df: pd.DataFrame, industry_focus=None, regions=None, product_needs=None):
+def _compile(keywords):
+    # One alternation per keyword group; matched in a single vectorized pass
+    return "|".join(re.escape(k) for k in keywords) if keywords else None
+
+INDUSTRY_PATTERNS = {k: _compile(v) for k, v in INDUSTRY_KEYWORDS.items()}
+PRODUCT_PATTERNS = {k: _compile(v) for k, v in PRODUCT_KEYWORDS.items()}
+CUSTOMER_TYPE_PATTERNS = {k: _compile(v) for k, v in CUSTOMER_TYPES.items()}
+REGION_RESOLVER = RegionResolver(REGION_HINTS)
+COMPETITOR_PATTERN = _compile(COMPETITORS)
+DECISION_MAKER_PATTERN = "director|manager|head|vp|chief|owner|ceo|cto|operations|procurement|maintenance|project"
+
+TEXT_COLUMNS = ["company_name", "website", "industry", "job_title", "notes"]
+
+def _text(df: pd.DataFrame, col: str) -> pd.Series:
+    # Lower-cased Arrow text with missing values (and missing columns) as ""
+    if col not in df.columns:
+        return pd.Series("", index=df.index, dtype=TEXT_DTYPE)
+    return to_text(df[col]).str.lower().fillna("")
+
+def _haystack(texts: dict, cols) -> pd.Series:
+    hay = texts[cols[0]]
+    for c in cols[1:]:
+        hay = hay + " " + texts[c]
+    return hay.astype("string[pyarrow]")
+
+def _matches(hay: pd.Series, pattern) -> np.ndarray:
+    if not pattern:
+        return np.zeros(len(hay), dtype=bool)
+    return hay.str.contains(pattern, regex=True).to_numpy(dtype=bool, na_value=False)
+
+# One uint8 column per rule component; built once per dataset, campaigns are weights over it
+BASE_FEATURES = ["has_email", "has_phone", "has_website", "decision_maker", "free_email", "competitor"]
+FEATURE_COLUMNS = (
+    BASE_FEATURES
+    + [f"industry:{k}" for k in INDUSTRY_KEYWORDS]
+    + [f"product:{k}" for k in PRODUCT_KEYWORDS]
+    + [f"region:{k}" for k in REGION_HINTS]
+    + [f"customer_type:{k}" for k in CUSTOMER_TYPES]
+)
+_FEATURE_INDEX = {c: i for i, c in enumerate(FEATURE_COLUMNS)}
+# Columns the rules read; only these are shipped to worker processes
+FEATURE_INPUTS = ["company_name", "contact_name", "email", "phone", "website", "country", "state", "city",
+                  "industry", "job_title", "notes"] + KEY_COLUMNS
+
+def _feature_block(df: pd.DataFrame) -> np.ndarray:
+    n = len(df)
+    feats = np.zeros((n, len(FEATURE_COLUMNS)), dtype=np.uint8)
+    def put(name, values):
+        feats[:, _FEATURE_INDEX[name]] = values
+
+    # Lower-cased text of every column a rule looks at, rendered once
+    texts = {c: _text(df, c) for c in TEXT_COLUMNS}
+
+    for c in ["email", "phone", "website"]:
+        put(f"has_{c}", df[c].notna().to_numpy() if c in df.columns else False)
+    if "contact_name" in df.columns:
+        put("decision_maker", df["contact_name"].fillna("").str.lower().str.contains(DECISION_MAKER_PATTERN).to_numpy(dtype=bool))
+    put("free_email", contact_keys(df, ["free_email"])["free_email"].to_numpy(dtype=bool))
+    put("competitor", _matches(_haystack(texts, ["notes", "website", "company_name"]), COMPETITOR_PATTERN))
+
+    hay = _haystack(texts, ["industry", "notes"])
+    for k, pattern in INDUSTRY_PATTERNS.items():
+        put(f"industry:{k}", _matches(hay, pattern))
+    hay = _haystack(texts, ["notes", "website"])
+    for k, pattern in PRODUCT_PATTERNS.items():
+        put(f"product:{k}", _matches(hay, pattern))
+    for k, hit in zip(REGION_HINTS, REGION_RESOLVER.hits(df).T):
+        put(f"region:{k}", hit)
+    hay = _haystack(texts, ["industry", "job_title", "notes", "company_name"])
+    for k, pattern in CUSTOMER_TYPE_PATTERNS.items():
+        put(f"customer_type:{k}", _matches(hay, pattern))
+    return feats
+
+def build_feature_matrix(df: pd.DataFrame, workers: int = None) -> pd.DataFrame:
+    # Rows are independent, so large frames are split across processes (see modules.parallel)
+    feats = map_rows(_feature_block, df, len(FEATURE_COLUMNS), np.uint8, columns=FEATURE_INPUTS, workers=workers)
+    return pd.DataFrame(feats, index=df.index, columns=FEATURE_COLUMNS)
+
+def campaign_weights(industry_focus=None, product_needs=None) -> np.ndarray:
+    # int16 keeps the uint8 @ weights product small; the largest possible sum is well under 2**15
+    w = np.zeros(len(FEATURE_COLUMNS), dtype=np.int16)
+    w[_FEATURE_INDEX["has_email"]] = 10
+    w[_FEATURE_INDEX["has_phone"]] = 5
+    w[_FEATURE_INDEX["has_website"]] = 5
+    w[_FEATURE_INDEX["decision_maker"]] = 10
+    w[_FEATURE_INDEX["free_email"]] = -10  # +5 company email becomes -5 free email
+    w[_FEATURE_INDEX["competitor"]] = -20
+    for ind in industry_focus or []:
+        if f"industry:{ind}" in _FEATURE_INDEX:
+            w[_FEATURE_INDEX[f"industry:{ind}"]] += 15
+    for p in product_needs or []:
+        if f"product:{p}" in _FEATURE_INDEX:
+            w[_FEATURE_INDEX[f"product:{p}"]] += 15
+    return w
+
+def _first_hit(hits: np.ndarray) -> np.ndarray:
+    # Column index of the first non-zero entry per row, -1 when the row has none
+    if hits.shape[1] == 0:
+        return np.full(hits.shape[0], -1, dtype=np.int64)
+    return np.where(hits.any(axis=1), hits.argmax(axis=1), -1)
+
+def region_hits(features: pd.DataFrame, regions=None) -> np.ndarray:
+    # Index into `regions` of the first selected region each row matches
+    X = features.to_numpy()
+    hits = np.zeros((len(X), len(regions or [])), dtype=np.uint8)
+    for j, r in enumerate(regions or []):
+        if f"region:{r}" in _FEATURE_INDEX:
+            hits[:, j] = X[:, _FEATURE_INDEX[f"region:{r}"]]
+    return _first_hit(hits)
+
+def campaign_score(features: pd.DataFrame, industry_focus=None, regions=None, product_needs=None):
+    score = (features.to_numpy() @ campaign_weights(industry_focus, product_needs)).astype(np.int64) + 5
+    first = region_hits(features, regions)
+    score += (first >= 0) * 10
+    return np.clip(score, 0, 100), first
+
+def customer_types(features: pd.DataFrame) -> np.ndarray:
+    labels = np.array(list(CUSTOMER_TYPES) + ["Unknown"], dtype=object)
+    first = _first_hit(features[[f"customer_type:{k}" for k in CUSTOMER_TYPES]].to_numpy())
+    return labels[first]  # -1 picks the trailing "Unknown"
+
+def score_with_features(df: pd.DataFrame, features: pd.DataFrame, industry_focus=None, regions=None, product_needs=None):
     df = df.copy()
     for col in ["lead_score","customer_type","priority_region","competitor_flag"]:
         if col not in df.columns: df[col] = None
-    df["lead_score"] = 0
-
-    # Base quality
-    df["lead_score"] += df["email"].notna().astype(int) * 10
-    df["lead_score"] += df["phone"].notna().astype(int) * 5
-    df["lead_score"] += df["website"].notna().astype(int) * 5
-
-    # Industry fit
-    if industry_focus:
-        for ind in industry_focus:
-            kws = INDUSTRY_KEYWORDS.get(ind, [])
-            df["lead_score"] += df.apply(
-                lambda r: 15 if _contains_any(f"{r.get('industry','')} {r.get('notes','')}", kws) else 0,
-                axis=1
-            )
-
-    # Product/process fit
-    if product_needs:
-        for p in product_needs:
-            kws = PRODUCT_KEYWORDS.get(p, [])
-            df["lead_score"] += df.apply(
-                lambda r: 15 if _contains_any(f"{r.get('notes','')} {r.get('website','')}", kws) else 0,
-                axis=1
-            )
-
-    # Region priority + priority_region tag
-    def region_bonus(row):
-        hay = f"{row.get('country','')} {row.get('state','')} {row.get('city','')} {row.get('email','')} {row.get('website','')}"
-        for reg in regions or []:
-            if _contains_any(hay, REGION_HINTS.get(reg, [])):
-                row["priority_region"] = reg
-                return 10
-        return 0
-    df["lead_score"] += df.apply(region_bonus, axis=1)
-
-    # Customer type detect
-    def detect_customer_type(row):
-        hay = f"{row.get('industry','')} {row.get('job_title','')} {row.get('notes','')} {row.get('company_name','')}"
-        for ctype, kws in CUSTOMER_TYPES.items():
-            if _contains_any(hay, kws):
-                return ctype
-        return "Unknown"
-    df["customer_type"] = df.apply(detect_customer_type, axis=1)
-
-    # Decision-maker hint
-    df["lead_score"] += df["contact_name"].fillna("").str.lower().str.contains(
-        "director|manager|head|vp|chief|owner|ceo|cto|operations|procurement|maintenance|project"
-    ).astype(int) * 10
-
-    # Company vs free email
-    df["lead_score"] += df["email"].fillna("").str.contains("@(gmail|yahoo|hotmail|outlook)\\.").apply(lambda x: -5 if x else 5)
-
-    # Competitor penalty and flag
-    def competitor_penalty(row):
-        hay = f"{row.get('notes','')} {row.get('website','')} {row.get('company_name','')}"
-        if _contains_any(hay, COMPETITORS):
-            row["competitor_flag"] = True
-            return -20
-        row["competitor_flag"] = False
-        return 0
-    df["lead_score"] += df.apply(competitor_penalty, axis=1)
-
-    df["lead_score"] = df["lead_score"].clip(0, 100)
+    score, first = campaign_score(features, industry_focus, regions, product_needs)
+    tag = df["priority_region"].to_numpy(dtype=object, copy=True)
+    hit = first >= 0
+    if hit.any():
+        tag[hit] = np.asarray(regions, dtype=object)[first[hit]]
+    df["priority_region"] = to_category(pd.Series(tag, index=df.index))
+    df["customer_type"] = pd.Categorical(customer_types(features), categories=list(CUSTOMER_TYPES) + ["Unknown"])
+    df["competitor_flag"] = features["competitor"].to_numpy(dtype=bool)
+    df["lead_score"] = score.astype(np.int8)
     return df
 
+def score_leads(df: pd.DataFrame, industry_focus=None, regions=None, product_needs=None, workers: int = None):
+    return score_with_features(df, build_feature_matrix(df, workers), industry_focus, regions, product_needs)
+
+def score_campaigns(df: pd.DataFrame, profiles, features: pd.DataFrame = None):
+    # Scores every campaign profile off one shared feature matrix: rows x profiles in a single matmul.
+    # Returns (scores, stages), both indexed like df with one column per profile name.
+    if features is None:
+        features = build_feature_matrix(df)
+    names = [p.get("name") or f"campaign_{i+1}" for i, p in enumerate(profiles)]
+    W = np.column_stack([campaign_weights(p.get("industry_focus"), p.get("product_needs")) for p in profiles]) \
+        if profiles else np.zeros((len(FEATURE_COLUMNS), 0), dtype=np.int16)
+    scores = (features.to_numpy() @ W).astype(np.int64) + 5
+    for j, p in enumerate(profiles):
+        scores[:, j] += (region_hits(features, p.get("regions")) >= 0) * 10
+    scores = pd.DataFrame(np.clip(scores, 0, 100).astype(np.int8), index=df.index, columns=names)
+    stages = pd.DataFrame({n: lifecycle_stages(scores[n].to_numpy()) for n in names}, index=df.index, columns=names)
+    return scores, stages
+
+def lifecycle_stages(scores) -> np.ndarray:
+    scores = np.asarray(scores)
+    return np.select([scores >= 80, scores >= 65], ["salesqualifiedlead", "marketingqualifiedlead"], "lead").astype(object)
+
 def assign_lifecycle_stage(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
-    def stage(score):
-        if score >= 80: return "salesqualifiedlead"
-        if score >= 65: return "marketingqualifiedlead"
-        return "lead"
-    df["lifecycle_stage"] = df["lead_score"].apply(stage)
+    df["lifecycle_stage"] = pd.Categorical(lifecycle_stages(df["lead_score"].to_numpy()), categories=LIFECYCLE_STAGES)
     return df
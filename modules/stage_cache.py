@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+from modules.diskcache import content_key
+from modules.schema import memory_bytes
+
+MAX_BYTES = int(os.getenv("LEADGEN_STAGE_CACHE_BYTES", 512 * 1024 * 1024))
+
+def fingerprint(df: pd.DataFrame) -> str:
+    # Content hash of a frame: column names, dtypes, index and every value
+    try:
+        values = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    except TypeError:  # unhashable cells (lists, dicts) are hashed by their text
+        values = pd.util.hash_pandas_object(df.astype(str), index=True).to_numpy()
+    return content_key("frame", list(df.columns), [str(t) for t in df.dtypes], values.tobytes())
+
+def _size(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return memory_bytes(value)
+    if isinstance(value, (tuple, list)):
+        return sum(_size(v) for v in value)
+    return sys.getsizeof(value)
+
+class StageCache:
+    # In-process LRU of pipeline stage results keyed by (stage, input key, the stage's own parameters),
+    # evicted by the summed deep memory size of the cached values. A result's key is the input key of the
+    # next stage, so only the raw input is ever fingerprinted. Cached values are shared: never mutate them.
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key(stage: str, input_key: str, **params) -> str:
+        return content_key(stage, input_key, *(f"{k}={json.dumps(v, sort_keys=True, default=str)}"
+                                               for k, v in sorted(params.items())))
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key: str, value):
+        size = _size(value)
+        if size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.stats["evictions"] += 1
+
+    def run(self, stage: str, input_key: str, fn, **params):
+        # (fn() or its cached result, this result's key, whether it was a hit)
+        key = self.key(stage, input_key, **params)
+        value = self.get(key)
+        if value is not None:
+            return value, key, True
+        with self._lock:
+            self.stats["misses"] += 1
+        value = fn()
+        if value is not None:
+            self.put(key, value)
+        return value, key, False
+
+    def info(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+_default = None
+_default_lock = threading.Lock()
+
+def stage_cache() -> StageCache:
+    # Process-wide instance shared by every Streamlit session and rerun
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = StageCache()
+        return _default
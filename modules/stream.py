@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from modules.score import score_leads, assign_lifecycle_stage
+from modules.dedupe import dedupe_leads
+from modules.schema import apply_schema
+from modules.export_hubspot import export_for_hubspot
+from modules.utils import normalize_columns
+from modules.ingest import iter_table
+
+CHUNKSIZE = 50_000
+
+class DedupeIndex:
+    # Hashes of (company_name, email) keys already emitted, kept as sorted uint64 runs that are
+    # merged like a binary counter: 8 bytes per key and O(log n) runs to probe per chunk.
+    def __init__(self):
+        self._runs = []
+        self.rows_seen = 0
+
+    def __len__(self):
+        return sum(len(r) for r in self._runs)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        hit = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            pos = np.searchsorted(run, hashes).clip(0, len(run) - 1)
+            hit |= run[pos] == hashes
+        return hit
+
+    def add(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        run = np.unique(hashes)
+        while self._runs and len(self._runs[-1]) <= len(run):
+            run = np.union1d(self._runs.pop(), run)
+        self._runs.append(run)
+
+    def dedupe(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Within a chunk the best-ranked row wins as in dedupe_leads; across chunks the first one does
+        self.rows_seen += len(df)
+        df = dedupe_leads(df)
+        hashes = pd.util.hash_pandas_object(df[["company_name", "email"]], index=False).to_numpy()
+        fresh = ~self.contains(hashes)
+        self.add(hashes[fresh])
+        return df[fresh]
+
+def stream_leads(source, industry_focus=None, regions=None, product_needs=None, min_score: int = 0,
+                 lead_source: str = "Indiamart", chunksize: int = CHUNKSIZE, index: DedupeIndex = None):
+    # Generator pipeline: read -> normalize -> dedupe -> score -> lifecycle -> HubSpot frame, one chunk at a time
+    index = index if index is not None else DedupeIndex()
+    for chunk in iter_table(source, chunksize):
+        df = index.dedupe(apply_schema(normalize_columns(chunk)))
+        if df.empty:
+            continue
+        df = assign_lifecycle_stage(score_leads(df, industry_focus=industry_focus, regions=regions, product_needs=product_needs))
+        df = df[df["lead_score"] >= min_score]
+        if len(df):
+            yield export_for_hubspot(df, lead_source=lead_source)
+
+def write_hubspot_csv(frames, out) -> int:
+    # out: path or text buffer; the header is written with the first chunk only
+    written = 0
+    close = isinstance(out, str)
+    fh = open(out, "w", newline="", encoding="utf-8") if close else out
+    try:
+        for hs in frames:
+            hs.to_csv(fh, index=False, header=written == 0)
+            written += len(hs)
+    finally:
+        if close:
+            fh.close()
+    return written
+
+if __name__ == "__main__":
+    import argparse
+    from modules.campaigns import load_profiles
+    parser = argparse.ArgumentParser(description="Stream a large lead file to a HubSpot-ready CSV in bounded memory.")
+    parser.add_argument("input_path", help="CSV or XLSX lead file")
+    parser.add_argument("output_path", help="HubSpot CSV to write")
+    parser.add_argument("--profile", help="Campaign profile JSON (first profile is used)")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    parser.add_argument("--lead-source", default="Indiamart")
+    args = parser.parse_args()
+    p = load_profiles(args.profile)[0] if args.profile else {"min_score": 0}
+    index = DedupeIndex()
+    frames = stream_leads(args.input_path, p.get("industry_focus"), p.get("regions"), p.get("product_needs"),
+                          min_score=p.get("min_score", 0), lead_source=args.lead_source, chunksize=args.chunksize, index=index)
+    n = write_hubspot_csv(frames, args.output_path)
+    print({"rows_read": index.rows_seen, "unique_keys": len(index), "rows_written": n})
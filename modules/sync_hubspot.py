@@ -1,9 +1,25 @@
 import os
+import json
 import time
+import random
+import hashlib
+import threading
 import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 
-HUBSPOT_BASE = "https://api.hubapi.com"
+from modules import metrics
+from modules.utils import TokenBucket
+from modules.normalize import domain_key, domain_keys
+from modules.hubspot_cache import DEFAULT_PATH as CACHE_PATH, DEFAULT_TTL as CACHE_TTL, HubSpotCache, props_hash
+
+HUBSPOT_BASE = os.getenv("HUBSPOT_BASE_URL", "https://api.hubapi.com")
+BATCH_SIZE = 100  # HubSpot's per-call limit for batch read/create/upsert/associate
+CONTACT_TO_COMPANY = 279  # HUBSPOT_DEFINED association type id
+CREATE_MATCH_KEYS = ["firstname", "lastname", "phone", "jobtitle", "website", "city"]  # identify an email-less created contact
+MAX_RETRIES = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 def _headers():
     token = os.getenv("HUBSPOT_PRIVATE_APP_TOKEN")
@@ -11,24 +27,80 @@ def _headers():
         raise RuntimeError("HUBSPOT_PRIVATE_APP_TOKEN not set")
     return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 
-def _create_or_get_company(domain: str, name: str):
-    headers = _headers()
+def hubspot_session(pool_size: int = 10) -> requests.Session:
+    # Keep-alive session with a connection pool sized for the number of concurrent callers
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(_headers())
+    return session
+
+def _retry_delay(resp, attempt: int) -> float:
+    # Honour Retry-After (seconds) when HubSpot sends it, else exponential backoff with jitter
+    retry_after = resp.headers.get("Retry-After") if resp is not None else None
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    return min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random() / 2)
+
+def _request(method: str, path: str, session=None, limiter=None, base_url=None, **kwargs) -> requests.Response:
+    # Retries 429/5xx and connection errors up to MAX_RETRIES; the last response is returned as-is
+    http = session or requests
+    if session is None:
+        kwargs.setdefault("headers", _headers())
+    kwargs.setdefault("timeout", 30)
+    url = f"{(base_url or HUBSPOT_BASE).rstrip('/')}{path}"
+    t, waited, resp = time.perf_counter(), 0.0, None
+    try:
+        for attempt in range(MAX_RETRIES + 1):
+            if limiter is not None:
+                waited += limiter.acquire()
+            try:
+                resp = http.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == MAX_RETRIES:
+                    raise
+                time.sleep(_retry_delay(None, attempt))
+                continue
+            if resp.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return resp
+            time.sleep(_retry_delay(resp, attempt))
+        return resp
+    finally:
+        # Wall time includes rate-limit waits and retries; status None means the connection failed
+        metrics.call(f"hubspot {metrics.endpoint(method, path)}", time.perf_counter() - t, attempts=attempt + 1,
+                     status=resp.status_code if resp is not None else None, limiter_wait_s=round(waited, 4),
+                     rows_in=len((kwargs.get("json") or {}).get("inputs", [])) or 1)
+
+def _create_or_get_company(domain: str, name: str, cache: HubSpotCache = None, **http):
+    # Returns (company_id, created)
+    if domain and cache is not None:
+        cached = cache.get_company(domain)
+        if cached:
+            return cached, False
     # Try search by domain if present
     if domain:
         # Search endpoint (simple)
-        r = requests.get(f"{HUBSPOT_BASE}/crm/v3/objects/companies", headers=headers, params={"limit":1, "properties":"domain", "q":domain})
+        r = _request("GET", "/crm/v3/objects/companies", params={"limit":1, "properties":"domain", "q":domain}, **http)
         if r.status_code == 200 and r.json().get("results"):
-            return r.json()["results"][0]["id"]
+            company_id = r.json()["results"][0]["id"]
+            if cache is not None:
+                cache.put_company(domain, company_id)
+            return company_id, False
     # Create
     payload = {"properties": {"domain": domain or "", "name": name or ""}}
-    r = requests.post(f"{HUBSPOT_BASE}/crm/v3/objects/companies", headers=headers, json=payload)
+    r = _request("POST", "/crm/v3/objects/companies", json=payload, **http)
     r.raise_for_status()
-    return r.json()["id"]
+    if domain and cache is not None:
+        cache.put_company(domain, r.json()["id"])
+    return r.json()["id"], True
 
-def _create_or_update_contact(row: pd.Series, company_id=None):
-    headers = _headers()
+def _contact_props(row) -> dict:
     email = (row.get("email") or "").strip()
-    props = {
+    return {
         "email": email,
         "firstname": row.get("firstname") or "",
         "lastname": row.get("lastname") or "",
@@ -47,67 +119,380 @@ def _create_or_update_contact(row: pd.Series, company_id=None):
         "lead_score": int(row.get("lead_score") or 0)
     }
 
+def _contact_hash(row) -> str:
+    # What was last pushed for a contact: its properties plus the company it hangs off
+    return props_hash({**_contact_props(row), "company": row.get("company") or ""})
+
+def _cached_contact(row, cache: HubSpotCache):
+    # (contact_id, props_hash) of the row's email, or None; looked up once per row and passed along
+    email = (row.get("email") or "").strip()
+    return cache.get_contact(email) if email and cache is not None else None
+
+def _unchanged(row, cached) -> bool:
+    return bool(cached) and cached[1] == _contact_hash(row)
+
+def _create_or_update_contact(row: pd.Series, company_id=None, cache: HubSpotCache = None, cached=None, **http):
+    email = (row.get("email") or "").strip()
+    props = _contact_props(row)
+
+    # Known contact (cached: the row's _cached_contact entry): patch by cached id, skipping the search
+    if cached:
+        cid = cached[0]
+        ur = _request("PATCH", f"/crm/v3/objects/contacts/{cid}", json={"properties": props}, **http)
+        if ur.status_code == 404:  # deleted in HubSpot since it was cached
+            cache.invalidate(email=email)
+            cached = None
+        else:
+            ur.raise_for_status()
+
     # Upsert by email (if provided)
-    if email:
+    if cached:
+        pass
+    elif email:
         # Try simple list endpoint with ?email=
-        sr = requests.get(f"{HUBSPOT_BASE}/crm/v3/objects/contacts", headers=headers, params={"limit":1, "properties":"email", "q":email})
+        sr = _request("GET", "/crm/v3/objects/contacts", params={"limit":1, "properties":"email", "q":email}, **http)
         if sr.status_code == 200 and sr.json().get("results"):
             cid = sr.json()["results"][0]["id"]
-            ur = requests.patch(f"{HUBSPOT_BASE}/crm/v3/objects/contacts/{cid}", headers=headers, json={"properties": props})
+            ur = _request("PATCH", f"/crm/v3/objects/contacts/{cid}", json={"properties": props}, **http)
             ur.raise_for_status()
         else:
-            cr = requests.post(f"{HUBSPOT_BASE}/crm/v3/objects/contacts", headers=headers, json={"properties": props})
+            cr = _request("POST", "/crm/v3/objects/contacts", json={"properties": props}, **http)
             cr.raise_for_status()
             cid = cr.json()["id"]
     else:
-        cr = requests.post(f"{HUBSPOT_BASE}/crm/v3/objects/contacts", headers=headers, json={"properties": props})
+        cr = _request("POST", "/crm/v3/objects/contacts", json={"properties": props}, **http)
         cr.raise_for_status()
         cid = cr.json()["id"]
 
-    # Associate with company
+    # Associate with company (best effort; the contact itself is already written)
     if company_id:
-        try:
-            # Associations v3 (simple)
-            assoc = requests.put(
-                f"{HUBSPOT_BASE}/crm/v3/objects/contacts/{cid}/associations/companies/{company_id}/contact_to_company",
-                headers=headers
-            )
-        except Exception:
-            pass
+        # Associations v3 (simple)
+        _request("PUT", f"/crm/v3/objects/contacts/{cid}/associations/companies/{company_id}/contact_to_company", **http)
 
+    if email and cache is not None:
+        cache.put_contact(email, cid, _contact_hash(row))
     return cid
 
-def sync_dataframe_to_hubspot(hs_df: pd.DataFrame) -> dict:
-    contacts_created = 0
-    companies_created = 0
-    for _, row in hs_df.iterrows():
-        company = (row.get("company") or "").strip()
-        website = (row.get("website") or "").strip()
-        # crude domain extraction
-        domain = ""
-        if website:
-            w = website.replace("http://","").replace("https://","")
-            domain = w.split("/",1)[0]
-
-        company_id = None
-        if company or domain:
+def row_key(row) -> str:
+    # Content hash of a row: a rerun skips rows whose exact values were already pushed
+    payload = json.dumps({k: row.get(k) for k in sorted(row.keys())}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class SyncJournal:
+    # Append-only JSONL checkpoint: one line per row that reached HubSpot
+    def __init__(self, path: str, resume: bool = True):
+        self.path = path
+        self._lock = threading.Lock()
+        self._done = set()
+        if resume and os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        self._done.add(json.loads(line)["key"])
+                    except (ValueError, KeyError):
+                        continue  # torn last line after a crash
+        self._fh = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._done
+
+    def record(self, key: str, **info):
+        with self._lock:
+            self._done.add(key)
+            self._fh.write(json.dumps({"key": key, **info}, default=str) + "\n")
+            self._fh.flush()
+
+    def close(self):
+        self._fh.close()
+
+def _sync_row(row, cache: HubSpotCache = None, **http) -> dict:
+    company = (row.get("company") or "").strip()
+    domain = domain_key(row.get("website"))
+    out = {"companies_created": 0, "unchanged": 0, "errors": []}
+    cached = _cached_contact(row, cache)
+    if _unchanged(row, cached):
+        out["unchanged"] = 1
+        return out
+
+    company_id = None
+    if company or domain:
+        try:
+            company_id, created = _create_or_get_company(domain, company or domain, cache=cache, **http)
+            out["companies_created"] = int(created)
+        except Exception as e:
+            # The contact is not written either: the row is not journaled, and a retry must not POST a
+            # second email-less contact for it
+            out["errors"].append(f"company {domain or company}: {e}")
+            return out
+
+    out["contact_id"] = _create_or_update_contact(row, company_id=company_id, cache=cache, cached=cached, **http)
+    out["company_id"] = company_id
+    return out
+
+def _batch_call(path, payload, stats, **http):
+    t = time.perf_counter()
+    r = _request("POST", path, json=payload, **http)
+    stats["calls"] += 1
+    stats["http_s"] += time.perf_counter() - t
+    if r.status_code >= 400:
+        stats["errors"].append(f"{path}: HTTP {r.status_code} {r.text[:200]}")
+        return None
+    js = r.json() if r.content else {}
+    for err in js.get("errors", []):  # 207 multi-status
+        stats["errors"].append(f"{path}: {err.get('message', err)}")
+    return js
+
+def _sync_companies(rows, stats, cache: HubSpotCache = None, **http) -> dict:
+    # domain (or name, when there is no domain) -> company id, or None when the search for it failed; existing
+    # companies are found via cache, then search
+    ids = {}
+    domains = sorted({d for d, _ in rows if d})
+    if cache is not None:
+        for d in domains:
+            cached = cache.get_company(d)
+            if cached:
+                ids[d] = cached
+        domains = [d for d in domains if d not in ids]
+    if domains:
+        js = _batch_call("/crm/v3/objects/companies/search", {
+            "filterGroups": [{"filters": [{"propertyName": "domain", "operator": "IN", "values": domains}]}],
+            "properties": ["domain"], "limit": BATCH_SIZE,
+        }, stats, **http)
+        found = {}
+        for res in (js or {}).get("results", []):
+            found.setdefault((res.get("properties") or {}).get("domain") or "", res["id"])
+        ids.update(found)
+        stats["companies_found"] += len(found)
+        if js is None:
+            # Unknown whether they exist: creating them could duplicate companies, so their rows fail this run
+            ids.update(dict.fromkeys(domains))
+    missing = {}
+    for domain, name in rows:
+        key = domain or name
+        if key and key not in ids and key not in missing:
+            missing[key] = {"domain": domain or "", "name": name or domain}
+    if missing:
+        js = _batch_call("/crm/v3/objects/companies/batch/create",
+                         {"inputs": [{"properties": p} for p in missing.values()]}, stats, **http)
+        for res in (js or {}).get("results", []):
+            props = res.get("properties") or {}
+            key = props.get("domain") or props.get("name") or ""
+            if key in missing:
+                ids[key] = res["id"]
+                stats["companies_created"] += 1
+    if cache is not None:
+        cache.put_companies((d, ids[d]) for d in {d for d, _ in rows if d and ids.get(d)})
+    return ids
+
+def _sync_contacts(batch: pd.DataFrame, company_ids: dict, domains, stats, cache: HubSpotCache = None, **http) -> list:
+    # Returns the batch positions whose contact was written; `domains` is the company domain key per row.
+    # Rows whose company could not be found or created are not written (nor journaled) and count as failed,
+    # so a resume retries them whole instead of leaving unassociated (or, without an email, duplicate) contacts.
+    by_email, no_email = {}, []
+    for pos, (_, row) in enumerate(batch.iterrows()):
+        props = _contact_props(row)
+        key = domains[pos] or (row.get("company") or "").strip()
+        cid = company_ids.get(key)
+        if key and not cid:
+            stats["failed"] += 1
+            continue
+        if props["email"]:
+            entry = by_email.setdefault(props["email"].lower(), [None, None, [], None])
+            entry[0], entry[1], entry[3] = props, cid, _contact_hash(row)  # last row per email wins
+            entry[2].append(pos)
+        else:
+            no_email.append((pos, props, cid))
+    done, assoc = [], []
+    if by_email:
+        js = _batch_call("/crm/v3/objects/contacts/batch/upsert", {"inputs": [
+            {"idProperty": "email", "id": email, "properties": props} for email, (props, _, _, _) in by_email.items()
+        ]}, stats, **http)
+        written = []
+        for res in (js or {}).get("results", []):
+            email = ((res.get("properties") or {}).get("email") or "").lower()
+            if email in by_email:
+                _, cid, positions, phash = by_email.pop(email)
+                written.append((email, res["id"], phash))
+                done.extend(positions)
+                stats["contacts_upserted"] += 1
+                if cid:
+                    assoc.append({"from": {"id": res["id"]}, "to": {"id": cid}})
+        stats["failed"] += sum(len(e[2]) for e in by_email.values())
+        if cache is not None:
+            cache.put_contacts(written)
+    if no_email:
+        # Create inline-associates, so results don't need to be matched back to rows for that
+        js = _batch_call("/crm/v3/objects/contacts/batch/create", {"inputs": [
+            {"properties": props, "objectWriteTraceId": str(pos), "associations": [{"to": {"id": cid}, "types": [
+                {"associationCategory": "HUBSPOT_DEFINED", "associationTypeId": CONTACT_TO_COMPANY}]}] if cid else []}
+            for pos, props, cid in no_email
+        ]}, stats, **http)
+        created = _created_positions(no_email, (js or {}).get("results", []))
+        stats["contacts_created"] += len(created)
+        stats["failed"] += len(no_email) - len(created)
+        done.extend(created)
+    if assoc:
+        _batch_call("/crm/v4/associations/contacts/companies/batch/associate/default", {"inputs": assoc}, stats, **http)
+    return done
+
+def _created_positions(inputs, results) -> list:
+    # Batch positions of the created contacts in a (possibly partial, 207) batch/create response. Results
+    # come back unordered: match them by the trace id each input carried, else by the properties echoed back.
+    pending = {str(pos): props for pos, props, _ in inputs}
+    created = []
+    for res in results:
+        pos = res.get("objectWriteTraceId")
+        if pos not in pending:
+            echoed = res.get("properties") or {}
+            pos = next((p for p, props in pending.items()
+                        if all(str(echoed.get(k) or "") == str(props.get(k) or "") for k in CREATE_MATCH_KEYS)), None)
+        if pos is not None:
+            del pending[pos]
+            created.append(int(pos))
+    return created
+
+def _sync_batch(batch: pd.DataFrame, cache: HubSpotCache = None, **http):
+    stats = {"contacts_upserted": 0, "contacts_created": 0, "companies_found": 0, "companies_created": 0,
+             "unchanged": 0, "failed": 0, "calls": 0, "http_s": 0.0, "errors": []}
+    t = time.perf_counter()
+    unchanged = [pos for pos, (_, r) in enumerate(batch.iterrows()) if _unchanged(r, _cached_contact(r, cache))]
+    stats["unchanged"] = len(unchanged)
+    skip = set(unchanged)
+    rest = [pos for pos in range(len(batch)) if pos not in skip]
+    done = list(unchanged)
+    if rest:
+        sub = batch.iloc[rest]
+        domains = domain_keys(sub["website"] if "website" in sub.columns else [None] * len(sub))
+        company_rows = [(d, (r.get("company") or "").strip()) for d, (_, r) in zip(domains, sub.iterrows())]
+        company_ids = _sync_companies(company_rows, stats, cache=cache, **http)
+        done += [rest[p] for p in _sync_contacts(sub, company_ids, domains, stats, cache=cache, **http)]
+    stats.update(rows=len(batch), latency_s=round(time.perf_counter() - t, 4), http_s=round(stats["http_s"], 4))
+    return stats, done
+
+def run_sync(hs_df: pd.DataFrame, batch_size: int = None, concurrency: int = 1, max_rps: float = 10.0,
+             journal_path: str = None, resume: bool = False, base_url: str = None, session=None,
+             cache: HubSpotCache = None, progress=None, should_stop=None) -> dict:
+    # Sync engine: rows (batch_size=None) or batches of rows go through a bounded thread pool sharing one
+    # pooled session and rate limiter. Completed rows are journaled, so a rerun with resume=True skips them;
+    # with an ID cache, known companies/contacts skip the search and unchanged contacts are not sent at all.
+    # progress(rows_done, rows_total) follows each finished unit; once should_stop() is true, units not yet
+    # started are dropped and the totals are returned with stopped=True.
+    hs_df = hs_df.astype(object).where(hs_df.notna(), None)  # NaN is not valid JSON
+    http = {"session": session or hubspot_session(pool_size=max(concurrency, 1)),
+            "limiter": TokenBucket(max_rps), "base_url": base_url}
+    journal = SyncJournal(journal_path, resume=resume) if journal_path else None
+    keys = [row_key(row) for _, row in hs_df.iterrows()]
+    todo = [i for i, k in enumerate(keys) if not (journal and k in journal)]
+    totals = {"rows": len(hs_df), "skipped": len(hs_df) - len(todo), "contacts_synced": 0, "unchanged": 0,
+              "companies_created": 0, "failed": 0, "errors": [], "batches": [], "stopped": False}
+
+    def row_task(i):
+        return _sync_row(hs_df.iloc[i], cache=cache, **http)
+
+    def batch_task(positions):
+        stats, done = _sync_batch(hs_df.iloc[positions], cache=cache, **http)
+        return stats, [positions[p] for p in done]
+
+    units = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)] if batch_size else todo
+    task = metrics.propagate(batch_task if batch_size else row_task)  # HTTP calls land in the caller's collector
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        futures = {pool.submit(task, u): (n, u) for n, u in enumerate(units)}
+        finished = 0
+        for fut in as_completed(futures):
+            n, unit = futures[fut]
+            if fut.cancelled():
+                continue  # dropped by should_stop; not journaled, so a resumed sync picks it up
+            finished += len(unit) if batch_size else 1
+            if progress:
+                progress(totals["skipped"] + finished, len(hs_df))
+            if should_stop and should_stop() and not totals["stopped"]:
+                totals["stopped"] = True
+                for f in futures:
+                    f.cancel()
             try:
-                company_id = _create_or_get_company(domain, company or domain)
-                companies_created += 1
-            except Exception:
-                pass
+                res = fut.result()
+            except Exception as e:
+                totals["failed"] += len(unit) if batch_size else 1
+                totals["errors"].append(f"{'batch' if batch_size else 'row'} {unit if not batch_size else unit[0]}: {e}")
+                continue
+            if batch_size:
+                stats, done = res
+                stats["batch"] = n
+                totals["batches"].append(stats)
+                totals["companies_created"] += stats["companies_created"]
+                totals["unchanged"] += stats["unchanged"]
+                totals["failed"] += len(unit) - len(done)
+                totals["errors"].extend(stats["errors"])
+            else:
+                # A row whose company failed was not written nor journaled, so --resume retries all of it
+                done = [] if res["errors"] else [unit]
+                totals["failed"] += int(bool(res["errors"]))
+                totals["companies_created"] += res["companies_created"]
+                totals["unchanged"] += res["unchanged"]
+                totals["errors"].extend(res["errors"])
+            # Unchanged rows are journaled but were not sent, so they only count under "unchanged"
+            totals["contacts_synced"] += len(done) - (stats["unchanged"] if batch_size else res["unchanged"])
+            if journal:
+                for i in done:
+                    journal.record(keys[i], row=i)
+    if journal:
+        journal.close()
+    totals["batches"].sort(key=lambda b: b["batch"])
+    if cache is not None:
+        totals["cache"] = cache.stats()
+    return totals
 
-        _ = _create_or_update_contact(row, company_id=company_id)
-        contacts_created += 1
-        time.sleep(0.2)  # polite pacing
+def sync_dataframe_to_hubspot(hs_df: pd.DataFrame, concurrency: int = 1, max_rps: float = 10.0,
+                              journal_path: str = None, resume: bool = False, base_url: str = None,
+                              cache: HubSpotCache = None, progress=None, should_stop=None) -> dict:
+    res = run_sync(hs_df, concurrency=concurrency, max_rps=max_rps, journal_path=journal_path,
+                   resume=resume, base_url=base_url, cache=cache, progress=progress, should_stop=should_stop)
+    res["contacts_created"] = res["contacts_synced"]
+    res.pop("batches")
+    return res
 
-    return {"contacts_created": contacts_created, "companies_created": companies_created}
+def sync_dataframe_to_hubspot_batch(hs_df: pd.DataFrame, batch_size: int = BATCH_SIZE, max_rps: float = 10.0,
+                                    base_url: str = None, session: requests.Session = None, concurrency: int = 1,
+                                    journal_path: str = None, resume: bool = False, cache: HubSpotCache = None,
+                                    progress=None, should_stop=None) -> dict:
+    # Batch mode: per 100 rows one company search + create, one contact upsert/create and one
+    # association call, over a pooled session paced by a token bucket instead of a fixed sleep.
+    res = run_sync(hs_df, batch_size=batch_size, concurrency=concurrency, max_rps=max_rps,
+                   journal_path=journal_path, resume=resume, base_url=base_url, session=session, cache=cache,
+                   progress=progress, should_stop=should_stop)
+    for k in ["contacts_upserted", "contacts_created", "companies_found", "calls"]:
+        res[k] = sum(b[k] for b in res["batches"])
+    return res
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Sync a HubSpot-ready CSV to HubSpot via Private App token.")
     parser.add_argument("csv_path", help="Path to hubspot export CSV")
+    parser.add_argument("--batch", action="store_true", help="Use batch upsert endpoints (100 records per call)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=4, help="Rows (or batches) in flight at once")
+    parser.add_argument("--max-rps", type=float, default=10.0, help="Request rate limit (HubSpot allows 100-190 per 10 s)")
+    parser.add_argument("--journal", help="Checkpoint journal path (default: <csv_path>.journal.jsonl)")
+    parser.add_argument("--resume", action="store_true", help="Skip rows already recorded in the journal")
+    parser.add_argument("--cache", default=CACHE_PATH, help="SQLite ID cache (warm it with python -m modules.hubspot_cache warm)")
+    parser.add_argument("--cache-ttl", type=float, default=CACHE_TTL, help="Cache entry lifetime in seconds")
+    parser.add_argument("--no-cache", action="store_true", help="Always search HubSpot instead of using the ID cache")
+    parser.add_argument("--metrics", help="Append per-call timings (JSONL) to this file")
     args = parser.parse_args()
     df = pd.read_csv(args.csv_path)
-    res = sync_dataframe_to_hubspot(df)
+    journal = args.journal or f"{args.csv_path}.journal.jsonl"
+    cache = None if args.no_cache else HubSpotCache(args.cache, ttl=args.cache_ttl)
+    with metrics.collect(args.metrics, run={"csv_path": args.csv_path}):
+        if args.batch:
+            res = sync_dataframe_to_hubspot_batch(df, batch_size=args.batch_size, max_rps=args.max_rps, cache=cache,
+                                                  concurrency=args.concurrency, journal_path=journal, resume=args.resume)
+        else:
+            res = sync_dataframe_to_hubspot(df, concurrency=args.concurrency, max_rps=args.max_rps, cache=cache,
+                                            journal_path=journal, resume=args.resume)
+    for b in res.pop("batches", []):
+        print({k: b[k] for k in ["batch", "rows", "latency_s", "calls", "failed"]}, *b["errors"], sep="\n  ")
+    errors = res.pop("errors")
     print(res)
+    for e in errors[:20]:
+        print("  " + e)
+    raise SystemExit(1 if res["failed"] else 0)
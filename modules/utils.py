@@ -1,29 +1,46 @@
 
+import time
+import threading
 import pandas as pd
 
-COL_MAP = {
-    "company": "company_name",
-    "companyname": "company_name",
-    "name": "contact_name",
-    "contact": "contact_name",
-    "mail": "email",
-    "e-mail": "email",
-    "phone number": "phone",
-    "mobile": "phone",
-    "site": "website",
-    "url": "website",
-    "state/province": "state",
-    "province": "state",
-    "job": "job_title",
-    "title": "job_title"
-}
+from modules.schema import CANONICAL_COLUMNS
+from modules.ingest import resolve_columns
 
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
-    df.rename(columns={k:v for k,v in COL_MAP.items() if k in df.columns}, inplace=True)
+    # Same alias table as file ingestion, exact spellings only: frames reaching here are already tabular
+    present = set(df.columns)
+    df.rename(columns={df.columns[i]: c for i, c in resolve_columns(df.columns, fuzzy=False).items()
+                       if c not in present and c in CANONICAL_COLUMNS}, inplace=True)
     required = ["company_name","contact_name","email","phone","website","country","state","city","industry","notes","job_title"]
     for r in required:
         if r not in df.columns:
             df[r] = None
     return df
+
+class TokenBucket:
+    # Thread-safe token bucket: `rate` tokens/second refilled up to `capacity`; rate <= 0 disables pacing
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(self.rate, 1.0))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        # Blocks until `tokens` are available; returns seconds spent waiting
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait